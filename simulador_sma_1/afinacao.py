@@ -0,0 +1,312 @@
+"""
+Afinação de hiperparâmetros do Q-learning com successive halving / Hyperband.
+
+Um ensaio é uma configuração de alpha, gamma, epsilon, decaimento_epsilon e
+coeficiente_revisitas (PenalizacaoRevisitas, 0 = sem penalização). Em cada
+degrau, os ensaios vivos treinam mais episódios num ProcessPoolExecutor,
+continuando da Q-table e do epsilon onde ficaram. Depois são ordenados pela
+taxa_sucesso e, em empate, pela media_recompensa_por_passo
+(Agente.calculo_metricas) dos episódios desse degrau. Só o melhor 1/eta passa
+ao degrau seguinte; os outros param aí.
+
+O Hyperband corre vários successive halving ("colchetes"). Os primeiros começam
+com muitas configurações e poucos episódios; os últimos com poucas
+configurações treinadas até ao fim.
+
+    python cli.py afinar --cenario farol --max-episodios 81 --eta 3 --workers 4 --seed 0
+
+Ficam na pasta de saída o leaderboard (JSON e CSV) e a Q-table do melhor ensaio.
+"""
+import csv
+import json
+import math
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# nome -> (mínimo, máximo, "lin" | "log") ou lista de valores possíveis
+Espaco = Dict[str, Union[Tuple[float, float, str], Sequence[Any]]]
+
+ESPACO_OMISSAO: Espaco = {
+    "alpha": (0.05, 1.0, "log"),
+    "gamma": (0.8, 0.999, "lin"),
+    "epsilon": (0.02, 0.5, "log"),
+    "decaimento_epsilon": (0.98, 0.9999, "lin"),
+    "coeficiente_revisitas": (0.0, 0.2, "lin"),
+}
+# os que vão para Agente.cria; coeficiente_revisitas vai para o ambiente
+HIPER_AGENTE = ("alpha", "gamma", "epsilon", "decaimento_epsilon", "q_inicial")
+
+
+def amostra_configuracao(espaco: Espaco, gerador: np.random.Generator) -> Dict[str, Any]:
+    config: Dict[str, Any] = {}
+    for nome, dominio in espaco.items():
+        if isinstance(dominio, tuple) and len(dominio) == 3 and dominio[2] in ("lin", "log"):
+            minimo, maximo, escala = dominio
+            if escala == "log":
+                config[nome] = float(np.exp(gerador.uniform(np.log(minimo), np.log(maximo))))
+            else:
+                config[nome] = float(gerador.uniform(minimo, maximo))
+        else:
+            config[nome] = list(dominio)[int(gerador.integers(len(dominio)))]
+    return config
+
+
+# --------------------------------------------------------------
+#   Um degrau de um ensaio (corre num worker)
+# --------------------------------------------------------------
+
+def corre_ensaio(pedido: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Treina o ensaio mais pedido["episodios"] episódios a partir de pedido["q_table"] / ["epsilon"]
+    (None no primeiro degrau) e devolve a nova Q-table, o epsilon e as métricas médias desses episódios.
+    """
+    # importados aqui: o processo principal só precisa deles se correr sem workers
+    from agente import Agente
+    from aleatorio import fluxos
+    from cenarios import constroi_ambiente
+    from codificadores import cria_codificador
+    from main import executar_experiencia
+    from modelagem import PenalizacaoRevisitas
+    from sensor import SensorPosicao
+
+    inicio = time.perf_counter()
+    cenario, config = pedido["cenario"], pedido["config"]
+    # fluxos próprios de cada (ensaio, degrau): o resultado não depende da ordem nem do nº de workers
+    rng_ambiente, rng_agente = fluxos(np.random.SeedSequence([pedido["semente"], pedido["degrau"]]), 2)
+
+    ambiente = constroi_ambiente(cenario, "treino", rng=rng_ambiente)
+    agente = Agente.cria(
+        cenario["nome"],
+        modo="learn",
+        codificador=cria_codificador(pedido.get("codificador")),
+        rng=rng_agente,
+        **{k: config[k] for k in HIPER_AGENTE if k in config},
+    )
+    if pedido.get("q_table") is not None:
+        agente.q_table = pedido["q_table"]
+        agente.epsilon = pedido["epsilon"]
+    agente.instala(SensorPosicao())
+    ambiente.adicionaAgente(agente, cenario["inicio"])
+
+    fase = cenario["treino"]
+    coeficiente = config.get("coeficiente_revisitas", 0.06 if fase["penalizar_revisitas"] else 0.0)
+    if coeficiente > 0:
+        ambiente.adicionaModelagem(PenalizacaoRevisitas(coeficiente))
+
+    historico = executar_experiencia(
+        ambiente,
+        [agente],
+        episodios=pedido["episodios"],
+        passos_por_episodio=fase["passos_por_episodio"],
+        penalizar_revisitas=False,
+        verboso=False,
+    )
+    metricas = [m for ep in historico for m in ep.values()]
+    return {
+        "id": pedido["id"],
+        "q_table": agente.q_table,
+        "epsilon": agente.epsilon,
+        "taxa_sucesso": float(np.mean([m["taxa_sucesso"] for m in metricas])),
+        "media_recompensa_por_passo": float(np.mean([m["media_recompensa_por_passo"] for m in metricas])),
+        "tempo_s": time.perf_counter() - inicio,
+    }
+
+
+def _chave(ensaio: Dict[str, Any]) -> Tuple[float, float]:
+    return ensaio["taxa_sucesso"], ensaio["media_recompensa_por_passo"]
+
+
+# --------------------------------------------------------------
+#   Successive halving e Hyperband
+# --------------------------------------------------------------
+
+def successive_halving(
+    cenario: Dict[str, Any],
+    configuracoes: Sequence[Dict[str, Any]],
+    episodios_iniciais: int,
+    max_episodios: int,
+    eta: int = 3,
+    mapeia: Callable = map,
+    sementes: Optional[Sequence[int]] = None,
+    colchete: int = 0,
+    codificador: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Todos os ensaios treinam episodios_iniciais episódios; fica o melhor 1/eta e esses treinam
+    até eta vezes mais (no total), e assim até max_episodios ou sobrar um. Devolve todos os ensaios,
+    com "parou_no_degrau" (None nos que chegaram ao fim) e a Q-table só nos que chegaram ao fim.
+    """
+    if eta < 2:
+        raise ValueError("eta tem de ser pelo menos 2")
+    sementes = list(sementes) if sementes is not None else list(range(len(configuracoes)))
+    ensaios = [
+        {
+            "id": f"{colchete}-{i}",
+            "colchete": colchete,
+            "config": dict(config),
+            "semente": int(sementes[i]),
+            "episodios": 0,
+            "degraus": [],
+            "parou_no_degrau": None,
+            "q_table": None,
+            "epsilon": None,
+            "tempo_s": 0.0,
+        }
+        for i, config in enumerate(configuracoes)
+    ]
+    por_id = {e["id"]: e for e in ensaios}
+
+    vivos = ensaios
+    alvo = min(episodios_iniciais, max_episodios)
+    degrau = 0
+    while vivos:
+        pedidos = [
+            {
+                "id": e["id"],
+                "cenario": cenario,
+                "config": e["config"],
+                "semente": e["semente"],
+                "degrau": degrau,
+                "episodios": alvo - e["episodios"],
+                "q_table": e["q_table"],
+                "epsilon": e["epsilon"],
+                "codificador": codificador,
+            }
+            for e in vivos
+        ]
+        for r in mapeia(corre_ensaio, pedidos):
+            e = por_id[r["id"]]
+            e.update(q_table=r["q_table"], epsilon=r["epsilon"], episodios=alvo)
+            e["taxa_sucesso"] = r["taxa_sucesso"]
+            e["media_recompensa_por_passo"] = r["media_recompensa_por_passo"]
+            e["tempo_s"] += r["tempo_s"]
+            e["degraus"].append({"episodios": alvo, "taxa_sucesso": r["taxa_sucesso"],
+                                 "media_recompensa_por_passo": r["media_recompensa_por_passo"]})
+
+        if alvo >= max_episodios or len(vivos) == 1:
+            break
+        vivos = sorted(vivos, key=_chave, reverse=True)
+        ficam = max(1, len(vivos) // eta)
+        for e in vivos[ficam:]:
+            e["parou_no_degrau"] = degrau
+            e["q_table"] = None  # paragem antecipada: a Q-table deixa de ser precisa
+        vivos = vivos[:ficam]
+        alvo = min(max_episodios, alvo * eta)
+        degrau += 1
+
+    return ensaios
+
+
+def colchetes_hyperband(max_episodios: int, episodios_min: int, eta: int) -> List[Tuple[int, int]]:
+    """(nº de configurações, episódios iniciais) de cada colchete do Hyperband."""
+    s_max = int(math.floor(math.log(max(1, max_episodios // max(1, episodios_min))) / math.log(eta) + 1e-9))
+    return [
+        (int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), max(episodios_min, int(round(max_episodios / eta ** s))))
+        for s in range(s_max, -1, -1)
+    ]
+
+
+def leaderboard(ensaios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Mais episódios treinados primeiro (foram mais longe), depois taxa_sucesso e recompensa por passo."""
+    ordenados = sorted(ensaios, key=lambda e: (e["episodios"],) + _chave(e), reverse=True)
+    return [
+        {
+            "posicao": i + 1,
+            "id": e["id"],
+            "colchete": e["colchete"],
+            **e["config"],
+            "episodios": e["episodios"],
+            "taxa_sucesso": e["taxa_sucesso"],
+            "media_recompensa_por_passo": e["media_recompensa_por_passo"],
+            "parou_no_degrau": e["parou_no_degrau"],
+            "tempo_s": e["tempo_s"],
+        }
+        for i, e in enumerate(ordenados)
+    ]
+
+
+def afina(
+    cenario: Dict[str, Any],
+    metodo: str = "hyperband",
+    max_episodios: Optional[int] = None,
+    episodios_min: int = 3,
+    eta: int = 3,
+    configuracoes: int = 27,
+    espaco: Optional[Espaco] = None,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    saida: Optional[str] = None,
+    codificador: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    metodo "hyperband" ou "halving" (um só successive halving com `configuracoes` configurações).
+    max_episodios: episódios de um ensaio que chegue ao fim (por omissão os do treino do cenário).
+    Devolve {"leaderboard", "melhor", "ensaios", "tempo_s"}; com saida, escreve
+    <nome>_afinacao.json, <nome>_afinacao.csv e <nome>_melhor_qtable.pkl.
+    """
+    from aleatorio import sequencia
+
+    if metodo not in ("hyperband", "halving"):
+        raise ValueError(f"Método de afinação desconhecido: {metodo!r}")
+    espaco = espaco or ESPACO_OMISSAO
+    max_episodios = max_episodios or cenario["treino"]["episodios"]
+    if metodo == "hyperband":
+        colchetes = colchetes_hyperband(max_episodios, episodios_min, eta)
+    else:
+        colchetes = [(configuracoes, episodios_min)]
+
+    sementes = sequencia(seed).generate_state(sum(n for n, _ in colchetes) + 1)
+    gerador = np.random.default_rng(sementes[-1])
+
+    inicio = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        mapeia = pool.map if pool is not None else map
+        ensaios: List[Dict[str, Any]] = []
+        usadas = 0
+        for c, (n, episodios_iniciais) in enumerate(colchetes):
+            configs = [amostra_configuracao(espaco, gerador) for _ in range(n)]
+            ensaios += successive_halving(
+                cenario, configs, episodios_iniciais, max_episodios, eta, mapeia,
+                sementes=sementes[usadas: usadas + n], colchete=c, codificador=codificador,
+            )
+            usadas += n
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    tabela = leaderboard(ensaios)
+    melhor = next(e for e in ensaios if e["id"] == tabela[0]["id"])
+    resultado = {
+        "cenario": cenario["nome"],
+        "metodo": metodo,
+        "eta": eta,
+        "max_episodios": max_episodios,
+        "colchetes": colchetes,
+        "episodios_totais": sum(e["episodios"] for e in ensaios),
+        "tempo_s": time.perf_counter() - inicio,
+        "melhor": tabela[0],
+        "leaderboard": tabela,
+        "ensaios": ensaios,
+    }
+
+    if saida is not None:
+        os.makedirs(saida, exist_ok=True)
+        base = os.path.join(saida, f"{cenario['nome']}_afinacao")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in resultado.items() if k != "ensaios"}, f, indent=2, ensure_ascii=False)
+        with open(base + ".csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(tabela[0].keys()))
+            writer.writeheader()
+            writer.writerows(tabela)
+        ficheiro_q = os.path.join(saida, f"{cenario['nome']}_melhor_qtable.pkl")
+        with open(ficheiro_q, "wb") as f:
+            pickle.dump(dict(melhor["q_table"]), f)
+        resultado["q_table"] = ficheiro_q
+
+    return resultado
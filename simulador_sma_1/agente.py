@@ -1,11 +1,19 @@
 from abc import ABC, abstractmethod
 import pickle
 import math
-import random
+import time
+from collections import deque
 from typing import Dict, Tuple, Any, Optional, List
 
+from aleatorio import fluxo
+from politica_fixa import tabela_fixa
+from tabela_q import TabelaQ
+
 
 class AgenteBase(ABC):
+    # sem __dict__ nas subclasses que também declarem __slots__ (ver Agente e populacao.AgenteVista)
+    __slots__ = ()
+
     @abstractmethod
     def age(self, obs):
         """Escolhe a ação a partir da observação."""
@@ -31,6 +39,15 @@ class Agente(AgenteBase):
     # ações possíveis numa grelha 2D
     ACOES = ["cima", "baixo", "esquerda", "direita", "parado"]
 
+    # atributos fixos: sem __dict__ por instância (para populações grandes ver populacao.py)
+    __slots__ = (
+        "nome", "rng", "posicao", "modo", "tipo_politica", "alpha", "gamma", "epsilon", "decaimento_epsilon",
+        "q_inicial", "codificador", "aproximador", "q_table", "last_state", "last_action", "sensor",
+        "barramento", "caixa_entrada", "recompensa_total", "historico_passos",
+        "historico_distancias", "historico_colisoes", "historico_decisoes_erradas",
+        "tempo_inicio_ep", "tempo_fim_ep",
+    )
+
     def __init__(
         self,
         nome: str,
@@ -38,25 +55,47 @@ class Agente(AgenteBase):
         tipo_politica: str = "qlearning",
         alpha: float = 0.5,
         gamma: float = 0.9,
-        epsilon: float = 0.1
+        epsilon: float = 0.1,
+        codificador=None,
+        aproximador=None,
+        rng=None,
+        decaimento_epsilon: float = 0.995,
+        q_inicial: float = 0.0,
     ):
         self.nome = nome
+        # fluxo aleatório próprio (ver aleatorio.py): semente, Generator ou FluxoAleatorio
+        self.rng = fluxo(rng)
         self.posicao: Tuple[int, int] = (0, 0)
         self.modo = modo        #  learn "teste"
-        self.tipo_politica = tipo_politica  # "qlearning" ou "fixa"
+        self.tipo_politica = tipo_politica  # "qlearning", "fixa" ou "linear"
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
-        self.tipo_politica = tipo_politica
-
-        # Q-learning
-        self.q_table: Dict[Any, Dict[str, float]] = {}
+        # epsilon *= decaimento_epsilon a cada update (mínimo 0.01)
+        self.decaimento_epsilon = decaimento_epsilon
+        # codificador de estado (ver codificadores.py); None usa o estado absoluto original
+        self.codificador = codificador
+
+        # aproximação linear (tipo_politica="linear"), ver aproximador_linear.py
+        self.aproximador = aproximador
+        if self.tipo_politica == "linear" and self.aproximador is None:
+            from aproximador_linear import AproximadorLinear
+            self.aproximador = AproximadorLinear(len(self.ACOES), alpha=alpha, gamma=gamma, rng=self.rng)
+
+        # Q-learning: Q das linhas novas (> 0 é inicialização otimista) e tabela com a ação gulosa em cache
+        self.q_inicial = q_inicial
+        self.q_table: Dict[Any, Dict[str, float]] = TabelaQ(valor_inicial=q_inicial)
         self.last_state = None
         self.last_action = None
 
         # sensores
         self.sensor = None
 
+        # comunicação (ver comunicacao.py): barramento é preenchido por BarramentoMensagens.inscreve
+        self.barramento = None
+        # criada só na primeira mensagem (uma deque vazia são ~760 bytes por agente)
+        self.caixa_entrada: Optional[deque] = None
+
         # desempenho / métricas
         self.recompensa_total = 0.0
         self.historico_passos: List[Tuple[int, int]] = []
@@ -69,16 +108,62 @@ class Agente(AgenteBase):
     # ---------- fabrica simples ----------
 
     @classmethod
-    def cria(cls, nome, modo: str = "test", tipo_politica="qlearning"):
-        return cls(nome=f"Agente_{nome}", modo=modo, tipo_politica=tipo_politica)
+    def cria(
+        cls,
+        nome,
+        modo: str = "test",
+        tipo_politica="qlearning",
+        codificador=None,
+        rng=None,
+        alpha: float = 0.5,
+        gamma: float = 0.9,
+        epsilon: float = 0.1,
+        decaimento_epsilon: float = 0.995,
+        q_inicial: float = 0.0,
+    ):
+        return cls(
+            nome=f"Agente_{nome}",
+            modo=modo,
+            tipo_politica=tipo_politica,
+            alpha=alpha,
+            gamma=gamma,
+            epsilon=epsilon,
+            codificador=codificador,
+            rng=rng,
+            decaimento_epsilon=decaimento_epsilon,
+            q_inicial=q_inicial,
+        )
 
     # ---------- interface de base ----------
 
     def instala(self, sensor):
         self.sensor = sensor
 
+    def _caixa(self) -> deque:
+        if self.caixa_entrada is None:
+            self.caixa_entrada = deque(maxlen=64)
+        return self.caixa_entrada
+
     def comunica(self, mensagem: str, de_agente: "AgenteBase"):
-        print(f"{de_agente.nome} -> {self.nome}: {mensagem}")
+        self._caixa().append((getattr(de_agente, "nome", None), mensagem))
+
+    def recebe_mensagens(self, lote):
+        """Entrega em lote do barramento (lista de comunicacao.Mensagem)."""
+        self._caixa().extend((getattr(m.de, "nome", None), m.conteudo) for m in lote)
+
+    def le_mensagens(self) -> List[Tuple[Any, Any]]:
+        """Esvazia a caixa de entrada e devolve [(nome_remetente, mensagem), ...]."""
+        if not self.caixa_entrada:
+            return []
+        mensagens = list(self.caixa_entrada)
+        self.caixa_entrada.clear()
+        return mensagens
+
+    def envia(self, mensagem: Any, topico=None, raio: Optional[int] = None, para: Optional["AgenteBase"] = None) -> bool:
+        """Envia pelo barramento; devolve False se não houver barramento ou se este recusar (capacidade)."""
+        if self.barramento is None:
+            return False
+        return self.barramento.envia(self, mensagem, topico=topico, raio=raio, para=para)
 
     # ---------- Q-learning ----------
 
@@ -91,6 +176,8 @@ class Agente(AgenteBase):
         """
         if isinstance(obs, tuple):
             return obs
+        if self.codificador is not None:
+            return self.codificador.codifica(obs)
 
         pos = obs.get("posicao_agente", obs.get("posicao", self.posicao))
         objetivos = obs.get("objetivos", [])
@@ -108,24 +195,31 @@ class Agente(AgenteBase):
         return (pos, obj, vizinhanca)
 
     def _init_state(self, estado):
-        if estado not in self.q_table:
-            self.q_table[estado] = {a: 0.0 for a in self.ACOES}
+        if isinstance(self.q_table, TabelaQ):
+            self.q_table.linha(estado)
+        elif estado not in self.q_table:
+            self.q_table[estado] = {a: self.q_inicial for a in self.ACOES}
 
     def _escolhe_acao(self, estado):
-        self._init_state(estado)
+        # TabelaQ: ações empatadas no máximo já calculadas (só mudam quando a linha é escrita)
+        tabela = self.q_table
+        melhores = tabela.melhores(estado) if isinstance(tabela, TabelaQ) else None
+        if melhores is None:
+            self._init_state(estado)
 
         # em modo teste não há exploração zero epsilon zero exploraçao
         eps = 0.0 if self.modo == "test" else self.epsilon
 
-        if random.random() < eps:
-            return random.choice(self.ACOES)
+        if self.rng.random() < eps:
+            return self.rng.choice(self.ACOES)
 
 
         # desempate aleatório para nao ficar parado se os valores forem iguais feito para evitar ficar parado
-        acoes_estado = self.q_table[estado]
-        melhor_q = max(acoes_estado.values())
-        melhores = [a for a, q in acoes_estado.items() if q == melhor_q]
-        return random.choice(melhores)
+        if melhores is None:
+            acoes_estado = tabela[estado]
+            melhor_q = max(acoes_estado.values())
+            melhores = [a for a, q in acoes_estado.items() if q == melhor_q]
+        return self.rng.choice(melhores)
 
         # mudei isto, acho que fica melhor assim ,return max(acoes_estado, key=acoes_estado.get)
 
@@ -133,6 +227,13 @@ class Agente(AgenteBase):
         """Escolha da ação de acordo com a politica, guarda o estado e devolve a ação."""
         if self.tipo_politica == "fixa":
             return self._acao_fixa(obs)
+        elif self.tipo_politica == "linear":
+            ativos = self.aproximador.ativos(obs)
+            eps = 0.0 if self.modo == "test" else self.epsilon
+            acao = self.ACOES[self.aproximador.escolhe(ativos, eps)]
+            self.last_state = ativos
+            self.last_action = acao
+            return acao
         else:
             #qlearning
             estado = self._estado_from_obs(obs)
@@ -145,11 +246,18 @@ class Agente(AgenteBase):
         "mover sempre na direção do objetivo mais proximo, pode ficar preso sem conseguir voltar para tras e tentar outro caminho"
         pos = obs.get("posicao_agente", self.posicao)
         objetivos = obs.get("objetivos", [])
-        obstaculos = set(obs.get("obstaculos", []))
         if not objetivos:
             return "parado"
         obj = objetivos[0]
 
+        grelha = obs.get("grelha")
+        if grelha is not None:
+            # candidatas já tabeladas por célula (politica_fixa.py), mesma escolha que o cálculo abaixo
+            candidatas = tabela_fixa(grelha, obj).candidatas[pos[1]][pos[0]]
+            return "parado" if candidatas[0] == "parado" else self.rng.choice(candidatas)
+
+        obstaculos = set(obs.get("obstaculos", []))
+
         movimentos = {
             "cima": (pos[0], pos[1] - 1),
             "baixo": (pos[0], pos[1] + 1),
@@ -178,7 +286,7 @@ class Agente(AgenteBase):
         if not acoes_possiveis:
             acoes_possiveis = list(movimentos_validos.keys())
 
-        return random.choice(acoes_possiveis)
+        return self.rng.choice(acoes_possiveis)
 
 
     def update_transition(self, next_obs, recompensa: float, terminou: bool):
@@ -192,10 +300,34 @@ class Agente(AgenteBase):
         if self.last_state is None or self.last_action is None:
             return
 
+        if self.tipo_politica == "linear":
+            self.aproximador.regista(
+                self.last_state,
+                self.ACOES.index(self.last_action),
+                recompensa,
+                self.aproximador.ativos(next_obs),
+                terminou,
+            )
+            self.epsilon = max(0.01, self.epsilon * self.decaimento_epsilon)
+            if terminou:
+                self.last_state = None
+                self.last_action = None
+            return
+
         estado = self.last_state
         acao = self.last_action
         prox_estado = self._estado_from_obs(next_obs)
 
+        if hasattr(self.q_table, "atualiza_td"):
+            # TabelaQ (cache da ação gulosa atualizada com a escrita) ou Q-table partilhada
+            # entre processos (q_partilhada.py, ler-modificar-escrever atómico)
+            self.q_table.atualiza_td(estado, acao, recompensa, prox_estado, self.alpha, self.gamma)
+            self.epsilon = max(0.01, self.epsilon * self.decaimento_epsilon)
+            if terminou:
+                self.last_state = None
+                self.last_action = None
+            return
+
         self._init_state(estado)
         self._init_state(prox_estado)
 
@@ -206,7 +338,7 @@ class Agente(AgenteBase):
         self.q_table[estado][acao] = novo_q
 
         # annealing do epsilon vai aumentando e assim vai explorar cada vez menos e usar mais do conhecimento que já tem
-        self.epsilon = max(0.01, self.epsilon * 0.995)
+        self.epsilon = max(0.01, self.epsilon * self.decaimento_epsilon)
 
         if terminou:
             self.last_state = None
@@ -289,13 +421,37 @@ class Agente(AgenteBase):
     def reset_recompensa(self):
         self.recompensa_total = 0.0
 
+    def reset_episodio(self, instante: Optional[float] = None):
+        """Zera recompensa, históricos e a última transição no início de um episódio."""
+        self.reset_recompensa()
+        self.historico_passos = []
+        self.historico_distancias = []
+        self.historico_colisoes = 0
+        self.historico_decisoes_erradas = 0
+        self.tempo_inicio_ep = time.time() if instante is None else instante
+        self.tempo_fim_ep = None
+        self.last_state = None
+        self.last_action = None
+
+    def fim_episodio(self):
+        """Aplica o que ficou pendente do episódio (o lote do aproximador linear)."""
+        if self.aproximador is not None and self.modo == "learn":
+            self.aproximador.aplica_lote()
+
     def guardar_q_table(self, ficheiro="q_table.pkl"):
+        if self.tipo_politica == "linear":
+            self.aproximador.guardar(ficheiro)
+            return
+        tabela = self.q_table.copia_dict() if hasattr(self.q_table, "copia_dict") else self.q_table
         with open(ficheiro, "wb") as f:
-            pickle.dump(self.q_table, f)
+            pickle.dump(tabela, f)
 
     def carregar_q_table(self, ficheiro="q_table.pkl"):
+        if self.tipo_politica == "linear":
+            self.aproximador.carregar(ficheiro)
+            return
         try:
             with open(ficheiro, "rb") as f:
-                self.q_table = pickle.load(f)
+                self.q_table = TabelaQ(pickle.load(f), valor_inicial=self.q_inicial)
         except FileNotFoundError:
-            self.q_table = {}
+            self.q_table = TabelaQ(valor_inicial=self.q_inicial)
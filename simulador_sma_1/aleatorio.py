@@ -0,0 +1,85 @@
+"""
+Números aleatórios reprodutíveis.
+
+Cada componente (agente, ambiente, gerador de mapas) recebe o seu próprio fluxo,
+derivado de uma numpy.random.SeedSequence: com a mesma semente a execução repete-se
+bit a bit, mesmo com vários processos, porque nenhum fluxo é partilhado.
+
+FluxoAleatorio tem a interface do módulo random que o código usa (random, randint,
+randrange, choice, uniform) mas tira os números de blocos gerados de uma vez pelo
+numpy.random.Generator, em vez de uma chamada por decisão.
+"""
+import random
+from typing import List, Sequence, Union
+
+import numpy as np
+
+Semente = Union[None, int, np.random.SeedSequence, np.random.Generator, "FluxoAleatorio"]
+
+
+def sequencia(semente: Semente = None) -> np.random.SeedSequence:
+    """
+    SeedSequence para a semente. Sem semente usa bits do módulo random, por isso
+    random.seed(...) continua a fixar as execuções de quem ainda só faz isso.
+    """
+    if isinstance(semente, np.random.SeedSequence):
+        return semente
+    if semente is None:
+        semente = random.getrandbits(128)
+    return np.random.SeedSequence(semente)
+
+
+def gerador(semente: Semente = None) -> np.random.Generator:
+    if isinstance(semente, FluxoAleatorio):
+        return semente.gerador
+    if isinstance(semente, np.random.Generator):
+        return semente
+    return np.random.default_rng(sequencia(semente))
+
+
+class FluxoAleatorio:
+    __slots__ = ("gerador", "bloco", "_numeros")
+
+    def __init__(self, semente: Semente = None, bloco: int = 4096):
+        self.gerador = gerador(semente)
+        self.bloco = bloco
+        self._numeros = iter(())
+
+    def random(self) -> float:
+        # o "for" sobre o iterador do bloco é o caminho mais barato em Python puro
+        for u in self._numeros:
+            return u
+        self._numeros = iter(self.gerador.random(self.bloco).tolist())
+        return next(self._numeros)
+
+    def randrange(self, n: int) -> int:
+        return int(self.random() * n)
+
+    def randint(self, a: int, b: int) -> int:
+        """Inteiro em [a, b], como random.randint."""
+        return a + self.randrange(b - a + 1)
+
+    def choice(self, seq: Sequence):
+        n = len(seq)
+        if not n:
+            raise IndexError("choice de uma sequência vazia")
+        return seq[int(self.random() * n)]
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def spawn(self, n: int) -> List["FluxoAleatorio"]:
+        """n fluxos independentes derivados deste (ex.: um por agente)."""
+        return [FluxoAleatorio(g, self.bloco) for g in self.gerador.spawn(n)]
+
+
+def fluxo(semente: Semente = None) -> FluxoAleatorio:
+    """O próprio fluxo, se já for um; senão um novo a partir da semente."""
+    return semente if isinstance(semente, FluxoAleatorio) else FluxoAleatorio(semente)
+
+
+def fluxos(semente: Semente, n: int) -> List[FluxoAleatorio]:
+    """n fluxos independentes de uma semente (SeedSequence.spawn)."""
+    if isinstance(semente, (FluxoAleatorio, np.random.Generator)):
+        return fluxo(semente).spawn(n)
+    return [FluxoAleatorio(s) for s in sequencia(semente).spawn(n)]
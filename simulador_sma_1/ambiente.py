@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Tuple, List, Dict, Optional
-import random
+
+from aleatorio import fluxo
 
 
 class AmbienteBase(ABC):
@@ -36,7 +37,7 @@ class Ambiente(AmbienteBase):
      recompensa foi melhorada para incentivar movimento e aproximação ao objetivo sem ter de ficar parado para nao perder pontos como fazia antes
     """
 
-    def __init__(self, largura: int, altura: int, max_passos: int = 50):
+    def __init__(self, largura: int, altura: int, max_passos: int = 50, rng=None):
         self.largura = largura
         self.altura = altura
         self.max_passos = max_passos
@@ -44,27 +45,125 @@ class Ambiente(AmbienteBase):
         self.agentes: List = []
         self.objetivos: List[Tuple[int, int]] = []
         self.obstaculos: List[Tuple[int, int]] = []
+        # conjunto paralelo a self.obstaculos para o "in" ser O(1)
+        self._conjunto_obstaculos = set()
+        # Grelha compilada partilhada; enquanto não for None, objetivos/obstaculos
+        # são os tuplos da grelha e só são copiados quando se alteram (copy-on-write)
+        self._grelha = None
+        # mapa por blocos (mapa_blocos.MapaBlocos) para grelhas grandes; faz de conjunto de obstáculos
+        self._mapa = None
+        # raio da vizinhança de obstáculos na observação quando há _mapa (a lista toda seria enorme)
+        self.raio_observacao = 1
+
+        # fluxo aleatório do ambiente (escolha de mapas, dinâmica futura), ver aleatorio.py
+        self.rng = fluxo(rng)
+
+        # termos de modelação de recompensa somados em agir (ver modelagem.py)
+        self.modelagem: List = []
 
         self.passos = 0
+        # posição inicial de cada agente (um agente adicionado outra vez só muda de início)
         self._posicoes_iniciais: Dict[object, Tuple[int, int]] = {}
 
+    @classmethod
+    def a_partir_de_grelha(cls, grelha, max_passos: int = 50, rng=None):
+        """Ambiente barato que partilha os dados de uma Grelha compilada (ver grelha.py)."""
+        ambiente = cls(grelha.largura, grelha.altura, max_passos=max_passos, rng=rng)
+        ambiente._grelha = grelha
+        ambiente.objetivos = grelha.objetivos
+        ambiente.obstaculos = grelha.obstaculos
+        ambiente._conjunto_obstaculos = grelha.conjunto_obstaculos
+        return ambiente
+
+    @classmethod
+    def a_partir_de_mapa(cls, mapa, max_passos: int = 50, rng=None):
+        """Ambiente sobre um MapaBlocos (mapas grandes): obstáculos consultados por bloco, sem listas."""
+        ambiente = cls(mapa.largura, mapa.altura, max_passos=max_passos, rng=rng)
+        ambiente._mapa = mapa
+        ambiente.objetivos = list(mapa.objetivos)
+        ambiente.obstaculos = mapa
+        ambiente._conjunto_obstaculos = mapa
+        return ambiente
+
+    @property
+    def grelha(self):
+        """Grelha compilada partilhada, ou None se o ambiente foi alterado desde a última compilação."""
+        return self._grelha
+
+    def compila(self):
+        """Devolve a Grelha (imutável) deste ambiente, compilando-a se foi alterado."""
+        if self._mapa is not None:
+            raise RuntimeError("Um ambiente sobre MapaBlocos não é compilado numa Grelha")
+        if self._grelha is None:
+            from grelha import Grelha
+
+            grelha = Grelha(self.largura, self.altura, self.objetivos, self.obstaculos)
+            self._grelha = grelha
+            self.objetivos = grelha.objetivos
+            self.obstaculos = grelha.obstaculos
+            self._conjunto_obstaculos = grelha.conjunto_obstaculos
+        return self._grelha
+
+    def clona(self, max_passos: Optional[int] = None):
+        """Novo ambiente com o mesmo mapa (partilhado), sem agentes e com um fluxo aleatório derivado deste."""
+        max_passos = self.max_passos if max_passos is None else max_passos
+        if self._mapa is not None:
+            return Ambiente.a_partir_de_mapa(self._mapa, max_passos, rng=self.rng.spawn(1)[0])
+        return Ambiente.a_partir_de_grelha(
+            self.compila(), max_passos, rng=self.rng.spawn(1)[0]
+        )
+
+    def _copia_se_partilhado(self):
+        if self._grelha is not None:
+            self.objetivos = list(self.objetivos)
+            self.obstaculos = list(self.obstaculos)
+            self._conjunto_obstaculos = set(self._conjunto_obstaculos)
+            self._grelha = None
+
     # ---------- configuração ----------
 
     def adicionaAgente(self, agente, posicao: Tuple[int, int]):
         agente.posicao = posicao
-        self.agentes.append(agente)
+        if agente not in self._posicoes_iniciais:
+            self.agentes.append(agente)
         self._posicoes_iniciais[agente] = posicao
 
+    def removeAgente(self, agente):
+        """Tira o agente e a sua posição inicial do ambiente (ValueError se não estiver)."""
+        self.agentes.remove(agente)
+        del self._posicoes_iniciais[agente]
+
     def adicionaObjetivo(self, posicao: Tuple[int, int]):
         if posicao not in self.objetivos:
+            self._copia_se_partilhado()
             self.objetivos.append(posicao)
 
     def adicionaObstaculo(self, posicao: Tuple[int, int]):
-        if posicao not in self.obstaculos:
+        if posicao not in self._conjunto_obstaculos:
+            self._copia_se_partilhado()
             self.obstaculos.append(posicao)
+            self._conjunto_obstaculos.add(posicao)
+
+    def adicionaModelagem(self, termo):
+        termo.prepara(max(1, len(self.agentes)), self.largura, self.altura)
+        self.modelagem.append(termo)
+
+    def removeModelagem(self, termo):
+        self.modelagem.remove(termo)
+
+    def limpaObstaculos(self):
+        self._copia_se_partilhado()
+        self.obstaculos.clear()
+        self._conjunto_obstaculos.clear()
 
     # ---------- ciclo ----------
 
+    def obstaculos_visiveis(self, agente) -> List[Tuple[int, int]]:
+        """Todos os obstáculos ou, num mapa por blocos, só os à volta do agente (raio_observacao)."""
+        if self._mapa is not None:
+            return self._mapa.obstaculos_em(agente.posicao, self.raio_observacao)
+        return list(self.obstaculos)
+
     def observacaoPara(self, agente):
         """
         Observação simples:
@@ -72,13 +171,15 @@ class Ambiente(AmbienteBase):
           - lista de objetivos
           - lista de obstáculos
           - dimensões da grelha
+          - grelha compilada (ou None), usada pelos codificadores de estado
         """
         return {
             "posicao_agente": agente.posicao,
             "objetivos": list(self.objetivos),
-            "obstaculos": list(self.obstaculos),
+            "obstaculos": self.obstaculos_visiveis(agente),
             "largura": self.largura,
             "altura": self.altura,
+            "grelha": self._grelha,
         }
 
     def _proxima_posicao(self, pos: Tuple[int, int], acao: str) -> Tuple[int, int]:
@@ -134,7 +235,7 @@ class Ambiente(AmbienteBase):
         terminou = False
 
         # colisão com obstáculo: fica no sítio e penaliza
-        if nova_pos in self.obstaculos:
+        if nova_pos in self._conjunto_obstaculos:
             nova_pos = pos_atual
             recompensa -= 1.0  # penalização mais forte por bater em obstáculo
 
@@ -164,6 +265,10 @@ class Ambiente(AmbienteBase):
         if self.passos >= self.max_passos:
             terminou = True
 
+        # modelação de recompensa (penalização de revisitas, bónus de novidade, ...)
+        for termo in self.modelagem:
+            recompensa += termo.termo(agente, nova_pos)
+
         return recompensa, terminou
 
     def atualizacao(self):
@@ -179,5 +284,7 @@ class Ambiente(AmbienteBase):
     def reset(self):
         """Volta a colocar os agentes nas posições iniciais e zera o contador de passos."""
         self.passos = 0
-        for ag, pos_ini in self._posicoes_iniciais.items():
-            ag.posicao = pos_ini
+        for ag in self.agentes:
+            ag.posicao = self._posicoes_iniciais[ag]
+        for termo in self.modelagem:
+            termo.reset()
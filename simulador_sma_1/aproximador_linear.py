@@ -0,0 +1,152 @@
+"""
+Q-learning com aproximação linear (tipo_politica="linear" no Agente).
+
+Q(s, a) = sum(W[i, a] for i in ativos(s)), em que ativos(s) são os índices dos
+atributos binários ligados: janela local de obstáculos, direção do objetivo com
+a distância em intervalos e um termo constante. A matriz W tem tamanho fixo
+(n_atributos x 5), por isso a memória não depende do tamanho da grelha.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from aleatorio import fluxo
+from codificadores import CodificadorDistancia, CodificadorEstado, CodificadorJanela
+from grelha import CacheGrelhas
+
+# grelhas até este nº de células guardam os atributos de todas as células (uma grelha de cada vez);
+# acima disto os atributos calculam-se por posição e a memória não cresce com a grelha
+MAX_CELULAS_CACHE = 1 << 16
+
+
+class AproximadorLinear:
+    def __init__(
+        self,
+        n_acoes: int = 5,
+        alpha: float = 0.1,
+        gamma: float = 0.9,
+        codificadores: Optional[Sequence[CodificadorEstado]] = None,
+        tamanho_lote: int = 32,
+        rng=None,
+    ):
+        self.n_acoes = n_acoes
+        self.alpha = alpha
+        self.gamma = gamma
+        self.tamanho_lote = tamanho_lote
+        self.rng = fluxo(rng)
+
+        self.codificadores: List[CodificadorEstado] = list(
+            codificadores if codificadores is not None else (CodificadorJanela(raio=1), CodificadorDistancia())
+        )
+        self.offsets = []
+        n = 0
+        for c in self.codificadores:
+            self.offsets.append(n)
+            n += c.n_estados
+        self.indice_bias = n
+        self.n_atributos = n + 1
+        self.n_ativos = len(self.codificadores) + 1
+
+        self.pesos = np.zeros((self.n_atributos, n_acoes))
+        self._lote: List[tuple] = []
+        # (grelha, objetivo) -> array (altura, largura, n_ativos), só a da grelha em uso
+        self._cache = CacheGrelhas(maximo=1)
+
+    # ---------- atributos ----------
+
+    def _ativos_grelha(self, grelha, objetivo) -> np.ndarray:
+        partes = [c.ids_grelha(grelha, objetivo) + off for c, off in zip(self.codificadores, self.offsets)]
+        partes.append(np.full((grelha.altura, grelha.largura), self.indice_bias, dtype=np.int64))
+        return np.stack(partes, axis=-1)
+
+    def ativos(self, obs: Dict[str, Any]) -> np.ndarray:
+        """Índices dos atributos ligados para uma observação (array de n_ativos inteiros)."""
+        pos = obs.get("posicao_agente", obs.get("posicao"))
+        objetivos = obs.get("objetivos", [])
+        obj = objetivos[0] if objetivos else None
+
+        grelha = obs.get("grelha")
+        if grelha is not None:
+            if grelha.largura * grelha.altura <= MAX_CELULAS_CACHE:
+                return self._cache.obtem(grelha, obj, self._ativos_grelha)[pos[1], pos[0]]
+            obstaculos, largura, altura = grelha.conjunto_obstaculos, grelha.largura, grelha.altura
+        else:
+            obstaculos = set(obs.get("obstaculos", []))
+            largura, altura = obs.get("largura", 0), obs.get("altura", 0)
+        idx = [
+            c.codifica_posicao(pos, obj, obstaculos, largura, altura) + off
+            for c, off in zip(self.codificadores, self.offsets)
+        ]
+        idx.append(self.indice_bias)
+        return np.asarray(idx, dtype=np.int64)
+
+    # ---------- política ----------
+
+    def valores(self, ativos: np.ndarray) -> np.ndarray:
+        """Q(s, ·): soma esparsa das linhas de W dos atributos ativos."""
+        return self.pesos[ativos].sum(axis=0)
+
+    def escolhe(self, ativos: np.ndarray, epsilon: float) -> int:
+        if self.rng.random() < epsilon:
+            return self.rng.randrange(self.n_acoes)
+        q = self.valores(ativos)
+        melhores = np.flatnonzero(q == q.max())
+        return int(melhores[0]) if len(melhores) == 1 else int(self.rng.choice(melhores))
+
+    # ---------- aprendizagem ----------
+
+    def regista(self, ativos: np.ndarray, acao: int, recompensa: float, prox_ativos: np.ndarray, terminou: bool):
+        """Guarda a transição; o lote é aplicado quando enche ou no fim do episódio."""
+        self._lote.append((ativos, acao, recompensa, prox_ativos, terminou))
+        if terminou or len(self._lote) >= self.tamanho_lote:
+            self.aplica_lote()
+
+    def aplica_lote(self):
+        """Atualização TD semi-gradiente de todas as transições do lote com os pesos atuais."""
+        if not self._lote:
+            return
+        ativos, acoes, recompensas, prox, terminou = zip(*self._lote)
+        self._lote = []
+
+        ativos = np.stack(ativos)                     # (lote, n_ativos)
+        prox = np.stack(prox)
+        acoes = np.asarray(acoes)
+        recompensas = np.asarray(recompensas, dtype=float)
+        continua = ~np.asarray(terminou)
+
+        q_atual = self.pesos[ativos, acoes[:, None]].sum(axis=1)
+        q_prox = self.pesos[prox].sum(axis=1).max(axis=1)
+        erro = recompensas + self.gamma * q_prox * continua - q_atual
+
+        # passo dividido pelo nº de atributos ativos para o alpha ter a escala da versão tabular
+        passo = (self.alpha / self.n_ativos) * erro
+        indices = (ativos, np.broadcast_to(acoes[:, None], ativos.shape))
+        if len(acoes) == 1:
+            self.pesos[indices] += passo[0]
+            return
+
+        # com pesos "velhos" as correções do mesmo peso somam-se e divergem (o termo constante
+        # está em todas); por isso cada peso anda a média das correções que recebeu no lote
+        soma = np.zeros_like(self.pesos)
+        contagem = np.zeros_like(self.pesos)
+        np.add.at(soma, indices, np.broadcast_to(passo[:, None], ativos.shape))
+        np.add.at(contagem, indices, 1.0)
+        self.pesos += soma / np.maximum(contagem, 1.0)
+
+    # ---------- persistência ----------
+
+    def guardar(self, ficheiro: str):
+        # transições ainda no lote (episódio cortado pelo limite de passos) entram nos pesos gravados
+        self.aplica_lote()
+        with open(ficheiro, "wb") as f:
+            np.save(f, self.pesos)
+
+    def carregar(self, ficheiro: str):
+        try:
+            with open(ficheiro, "rb") as f:
+                pesos = np.load(f)
+        except FileNotFoundError:
+            return
+        if pesos.shape != self.pesos.shape:
+            raise ValueError(f"{ficheiro}: pesos {pesos.shape} não combinam com {self.pesos.shape}")
+        self.pesos = pesos
@@ -0,0 +1,449 @@
+"""
+Treino ator / aprendiz: vários processos a gerar episódios para um só Q-learning.
+
+Com o GIL um processo só corre um Ambiente de cada vez, e o treino partilhado de
+q_partilhada.py põe cada worker a escrever na tabela. Aqui os papéis separam-se:
+
+  atores    cada um no seu processo, com o seu Ambiente e um Agente em modo "learn"
+            (exploração epsilon) que decide com uma cópia local da Q-table. Cada
+            transição (s, a, r, s', terminou) vai para um lote e os lotes (arrays
+            NumPy) seguem por uma multiprocessing.Queue; a cópia local também é
+            atualizada (aprende_local) até ser substituída pela próxima publicação.
+  aprendiz  o processo principal: aplica as transições por ordem de chegada na sua
+            TabelaQ (a mesma conta de Agente.update_transition) e, a cada
+            publica_cada transições, copia as linhas alteradas para uma matriz em
+            memória partilhada (q_partilhada.TabelaQPartilhada, sem locks).
+
+A matriz tem um contador de versão (ímpar enquanto o aprendiz escreve). Antes de
+cada passo o ator lê a versão; se mudou copia a matriz, descarta a cópia se entretanto
+mudou outra vez, e atualiza só as linhas diferentes da sua TabelaQ.
+
+Os estados têm de ser inteiros: usa-se um codificador de codificadores.py. A ordem das
+transições depende do escalonamento, por isso o resultado não se repete bit a bit com
+a mesma seed; treino_atores(sincrono=True) corre os atores neste processo e, com um
+ator, lote=1 e publica_cada=1, dá o mesmo que o treino sequencial (verifica_equivalencia).
+"""
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agente import Agente
+from q_partilhada import TabelaQPartilhada
+from tabela_q import ACOES, TabelaQ
+
+_INDICE_ACAO = {a: i for i, a in enumerate(ACOES)}
+
+# --------------------------------------------------------------
+#   Ator (corre num processo)
+# --------------------------------------------------------------
+
+
+class _Lote:
+    """Transições de um ator à espera de seguir para o aprendiz."""
+
+    __slots__ = ("estados", "acoes", "recompensas", "proximos", "terminou", "metricas")
+
+    def __init__(self):
+        self.estados: List[int] = []
+        self.acoes: List[int] = []
+        self.recompensas: List[float] = []
+        self.proximos: List[int] = []
+        self.terminou: List[bool] = []
+        self.metricas: List[Dict[str, Dict[str, float]]] = []
+
+    def __len__(self) -> int:
+        return len(self.estados)
+
+    def limpa(self):
+        self.__init__()
+
+    def arrays(self) -> Tuple[np.ndarray, ...]:
+        return (
+            np.asarray(self.estados, dtype=np.int64),
+            np.asarray(self.acoes, dtype=np.int8),
+            np.asarray(self.recompensas, dtype=np.float64),
+            np.asarray(self.proximos, dtype=np.int64),
+            np.asarray(self.terminou, dtype=bool),
+        )
+
+
+class _PoliticaLocal:
+    """Cópia da Q-table publicada na TabelaQ de um ator."""
+
+    __slots__ = ("agente", "partilhada", "versao", "vista", "atual")
+
+    def __init__(self, agente, partilhada: TabelaQPartilhada, versao):
+        self.agente = agente
+        self.partilhada = partilhada
+        self.versao = versao
+        self.vista = np.array(partilhada.valores)
+        self.atual = versao.value
+
+    def atualiza(self, motor=None):
+        """Se a versão mudou copia a matriz e passa à TabelaQ do agente só as linhas diferentes."""
+        v = self.versao.value
+        if v == self.atual or v % 2:
+            return
+        nova = np.array(self.partilhada.valores)
+        if self.versao.value != v:
+            return  # o aprendiz publicou a meio da cópia: fica para o próximo passo
+        tabela = self.agente.q_table
+        for s in np.flatnonzero((nova != self.vista).any(axis=1)).tolist():
+            tabela[s] = dict(zip(ACOES, nova[s].tolist()))
+        self.vista, self.atual = nova, v
+
+
+def _ator(indice, cenario, codificador, episodios, semente, descritor, versao, fila, hiperparametros, lote_max,
+          aprende_local=True):
+    from aleatorio import fluxos
+    from cenarios import constroi_ambiente
+    from codificadores import cria_codificador
+    from modelagem import PenalizacaoRevisitas
+    from motor import motor_experiencia
+    from sensor import SensorPosicao
+
+    tabela = None
+    try:
+        rng_ambiente, rng_agente = fluxos(semente, 2)
+        ambiente = constroi_ambiente(cenario, "treino", rng=rng_ambiente)
+        agente = Agente.cria(
+            f"{cenario['nome']}_{indice}",
+            modo="learn",
+            codificador=cria_codificador(codificador),
+            rng=rng_agente,
+            **hiperparametros,
+        )
+        agente.instala(SensorPosicao())
+        ambiente.adicionaAgente(agente, cenario["inicio"])
+        fase = cenario["treino"]
+        if fase["penalizar_revisitas"]:
+            ambiente.adicionaModelagem(PenalizacaoRevisitas(coeficiente=0.06))
+
+        tabela = TabelaQPartilhada.liga(descritor)
+        politica = _PoliticaLocal(agente, tabela, versao)
+        lote = _Lote()
+
+        def envia():
+            if len(lote) or lote.metricas:
+                fila.put(("lote", indice, lote.arrays(), lote.metricas))
+                lote.limpa()
+
+        # em vez de atualiza_q: a transição vai para o lote e o epsilon decai como em update_transition;
+        # com aprende_local a cópia do ator também é atualizada até chegar a próxima publicação
+        def regista_transicao(m, ag, obs, acao, recompensa, terminou):
+            if ag.last_state is None or ag.last_action is None:
+                return
+            proximo = ag._estado_from_obs(m.ambiente.observacaoPara(ag))
+            if aprende_local:
+                ag.q_table.atualiza_td(ag.last_state, ag.last_action, recompensa, proximo, ag.alpha, ag.gamma)
+            lote.estados.append(ag.last_state)
+            lote.acoes.append(_INDICE_ACAO[ag.last_action])
+            lote.recompensas.append(recompensa)
+            lote.proximos.append(proximo)
+            lote.terminou.append(terminou)
+            ag.epsilon = max(0.01, ag.epsilon * ag.decaimento_epsilon)
+            if terminou:
+                ag.last_state = None
+                ag.last_action = None
+            if len(lote) >= lote_max:
+                envia()
+
+        def fim_episodio(m):
+            agente.tempo_fim_ep = time.time()
+            lote.metricas.append({agente.nome: agente.calculo_metricas(m.objetivo)})
+            envia()
+
+        motor = motor_experiencia(ambiente, [agente], treino=False)
+        # ler a versão é barato; a cópia só acontece quando o aprendiz publicou
+        motor.adiciona("pre_passo", politica.atualiza)
+        motor.adiciona("aprende", regista_transicao)
+        motor.adiciona("fim_episodio", fim_episodio)
+
+        inicio = time.perf_counter()
+        motor.corre(episodios, fase["passos_por_episodio"])
+        fila.put(("fim", indice, time.perf_counter() - inicio))
+    except Exception:
+        fila.put(("erro", indice, traceback.format_exc()))
+    finally:
+        if tabela is not None:
+            tabela.fecha()
+
+
+# --------------------------------------------------------------
+#   Aprendiz (processo principal)
+# --------------------------------------------------------------
+
+class Aprendiz:
+    """Aplica os lotes dos atores na TabelaQ e publica as linhas alteradas na matriz partilhada."""
+
+    def __init__(self, partilhada: TabelaQPartilhada, versao, alpha: float = 0.5, gamma: float = 0.9,
+                 q_inicial: float = 0.0, publica_cada: int = 500):
+        self.partilhada = partilhada
+        self.versao = versao
+        self.alpha = alpha
+        self.gamma = gamma
+        self.publica_cada = publica_cada
+        self.tabela = TabelaQ(valor_inicial=q_inicial)
+        self.historico: List[Dict[str, Dict[str, float]]] = []
+        self.tempos_atores: List[float] = []
+        self.transicoes = 0
+        self.publicacoes = 0
+        self._tocados: set = set()
+        self._desde_publicacao = 0
+
+    def aplica(self, estados, acoes, recompensas, proximos):
+        """Q(s,a) += alpha * (r + gamma * max Q(s') - Q(s,a)) por ordem, como Agente.update_transition."""
+        atualiza, alpha, gamma = self.tabela.atualiza_td, self.alpha, self.gamma
+        estados = estados.tolist()
+        for s, a, r, p in zip(estados, acoes.tolist(), recompensas.tolist(), proximos.tolist()):
+            atualiza(s, ACOES[a], r, p, alpha, gamma)
+        self._tocados.update(estados)
+        self.transicoes += len(estados)
+        self._desde_publicacao += len(estados)
+        if self._desde_publicacao >= self.publica_cada:
+            self.publica()
+
+    def publica(self):
+        if not self._tocados:
+            return
+        estados = sorted(self._tocados)
+        linhas = [[self.tabela[s][a] for a in ACOES] for s in estados]
+        self.versao.value += 1  # ímpar: a escrever
+        self.partilhada.valores[estados] = linhas
+        self.versao.value += 1
+        self._tocados.clear()
+        self._desde_publicacao = 0
+        self.publicacoes += 1
+
+    def recebe(self, mensagem) -> bool:
+        """Trata uma mensagem de um ator; devolve True quando esse ator acabou."""
+        tipo = mensagem[0]
+        if tipo == "lote":
+            _, _, (estados, acoes, recompensas, proximos, _), metricas = mensagem
+            self.aplica(estados, acoes, recompensas, proximos)
+            self.historico.extend(metricas)
+            return False
+        if tipo == "fim":
+            self.tempos_atores.append(mensagem[2])
+            return True
+        raise RuntimeError(f"O ator {mensagem[1]} falhou:\n{mensagem[2]}")
+
+    def estatisticas(self, tempo: float, atores: int) -> Dict[str, Any]:
+        return {
+            "atores": atores,
+            "episodios": len(self.historico),
+            "transicoes": self.transicoes,
+            "publicacoes": self.publicacoes,
+            "estados": len(self.tabela),
+            "tempo_s": tempo,
+            "transicoes_por_segundo": self.transicoes / tempo if tempo > 0 else 0.0,
+            "tempo_max_ator_s": max(self.tempos_atores, default=0.0),
+        }
+
+
+class _FilaDireta:
+    """Fila de um ator no mesmo processo que entrega cada mensagem logo ao aprendiz (treino síncrono)."""
+
+    def __init__(self, aprendiz: Aprendiz):
+        self.aprendiz = aprendiz
+
+    def put(self, mensagem):
+        self.aprendiz.recebe(mensagem)
+
+
+def treino_atores(
+    cenario: Dict[str, Any],
+    n_atores: int = 2,
+    episodios: Optional[int] = None,
+    codificador: str = "relativo+janela",
+    hiperparametros: Optional[Dict[str, float]] = None,
+    publica_cada: int = 32,
+    lote: int = 32,
+    seed: int = 0,
+    sincrono: bool = False,
+    aprende_local: bool = True,
+    espera_s: float = 600.0,
+):
+    """
+    Treina uma Q-table com n_atores processos a gerar episódios (episodios no total,
+    repartidos pelos atores) e o aprendiz neste processo.
+    hiperparametros: como em main.treinar_cenario (alpha e gamma são do aprendiz, o resto dos atores).
+    sincrono: os atores correm um de cada vez neste processo e cada lote é aplicado e publicado
+    logo; com lote=1 e publica_cada=1 dá o mesmo que o treino sequencial (ver verifica_equivalencia).
+    aprende_local: cada ator atualiza também a sua cópia entre publicações. Sem isto a política
+    do ator fica lote + publica_cada passos atrasada e, no labirinto, a partir de ~8 passos de
+    atraso o agente fica preso nos ciclos que a penalização de revisitas só desfaz aprendendo
+    dentro do episódio.
+    Devolve (TabelaQ, historico, estatisticas); historico tem um {nome_do_ator: métricas} por
+    episódio, pela ordem de chegada.
+    """
+    from aleatorio import sequencia
+    from codificadores import cria_codificador
+
+    cod = cria_codificador(codificador)
+    if cod is None:
+        raise ValueError("O treino com atores precisa de um codificador com estados inteiros")
+    hiperparametros = dict(hiperparametros or {})
+    q_inicial = hiperparametros.get("q_inicial", 0.0)
+
+    episodios = episodios or cenario["treino"]["episodios"]
+    por_ator = [episodios // n_atores + (i < episodios % n_atores) for i in range(n_atores)]
+    sementes = sequencia(seed).spawn(n_atores)
+
+    ctx = mp.get_context()
+    partilhada = TabelaQPartilhada.cria(cod.n_estados, n_riscas=0, valor_inicial=q_inicial, contexto=ctx)
+    versao = ctx.Value("q", 0, lock=False)
+    aprendiz = Aprendiz(
+        partilhada,
+        versao,
+        alpha=hiperparametros.get("alpha", 0.5),
+        gamma=hiperparametros.get("gamma", 0.9),
+        q_inicial=q_inicial,
+        publica_cada=publica_cada,
+    )
+    argumentos = [
+        (i, cenario, codificador, por_ator[i], sementes[i], partilhada.descritor(), versao, hiperparametros, lote,
+         aprende_local)
+        for i in range(n_atores)
+        if por_ator[i] > 0
+    ]
+    processos = []
+    try:
+        inicio = time.perf_counter()
+        if sincrono:
+            fila = _FilaDireta(aprendiz)
+            for a in argumentos:
+                _ator(*a[:7], fila, *a[7:])
+        else:
+            fila = ctx.Queue()
+            processos = [ctx.Process(target=_ator, args=(*a[:7], fila, *a[7:]), daemon=True) for a in argumentos]
+            for p in processos:
+                p.start()
+            ativos = len(processos)
+            while ativos:
+                try:
+                    mensagem = fila.get(timeout=espera_s)
+                except queue.Empty:
+                    raise RuntimeError(f"Nenhum ator respondeu em {espera_s} s") from None
+                ativos -= aprendiz.recebe(mensagem)
+            for p in processos:
+                p.join()
+        tempo = time.perf_counter() - inicio
+    finally:
+        for p in processos:
+            if p.is_alive():
+                p.terminate()
+        partilhada.fecha()
+
+    return aprendiz.tabela, aprendiz.historico, aprendiz.estatisticas(tempo, len(argumentos))
+
+
+def verifica_equivalencia(cenario: Dict[str, Any], episodios: int = 20, seed: int = 0,
+                          codificador: str = "relativo+janela") -> Dict[str, Any]:
+    """
+    Um ator síncrono com lote=1 e publica_cada=1 decide sempre com a Q-table já atualizada,
+    por isso tem de dar a mesma Q-table e as mesmas métricas que o treino sequencial.
+    """
+    tabela, historico, _ = treino_atores(
+        cenario, n_atores=1, episodios=episodios, codificador=codificador, publica_cada=1, lote=1, seed=seed,
+        sincrono=True,
+    )
+    from aleatorio import sequencia
+
+    # o ator 0 usa o primeiro filho da seed
+    sequencial = treino_sequencial(cenario, episodios, codificador=codificador, seed=sequencia(seed).spawn(1)[0],
+                                   devolve_agente=True)
+    q_seq = sequencial["agente"].q_table
+    iguais_q = dict(tabela) == dict(q_seq)
+    chaves = ("recompensa_total", "passos_total", "taxa_sucesso", "colisoes")
+    metricas = [[m[k] for m in ep.values() for k in chaves] for ep in historico]
+    metricas_seq = [[m[k] for m in ep.values() for k in chaves] for ep in sequencial["historico"]]
+    return {"q_table_igual": iguais_q, "metricas_iguais": metricas == metricas_seq, "estados": len(tabela)}
+
+
+# --------------------------------------------------------------
+#   Escalabilidade
+# --------------------------------------------------------------
+
+def treino_sequencial(cenario: Dict[str, Any], episodios: int, codificador: str = "relativo+janela", seed=0,
+                      hiperparametros: Optional[Dict[str, float]] = None, devolve_agente: bool = False) -> Dict[str, Any]:
+    """O mesmo treino num só processo (main.executar_experiencia), para comparar."""
+    from aleatorio import fluxos
+    from cenarios import constroi_ambiente
+    from codificadores import cria_codificador
+    from main import executar_experiencia
+    from sensor import SensorPosicao
+
+    rng_ambiente, rng_agente = fluxos(seed, 2)
+    ambiente = constroi_ambiente(cenario, "treino", rng=rng_ambiente)
+    agente = Agente.cria(cenario["nome"], modo="learn", codificador=cria_codificador(codificador), rng=rng_agente,
+                         **(hiperparametros or {}))
+    agente.instala(SensorPosicao())
+    ambiente.adicionaAgente(agente, cenario["inicio"])
+    fase = cenario["treino"]
+    inicio = time.perf_counter()
+    historico = executar_experiencia(
+        ambiente, [agente], episodios=episodios, passos_por_episodio=fase["passos_por_episodio"],
+        penalizar_revisitas=fase["penalizar_revisitas"], verboso=False,
+    )
+    tempo = time.perf_counter() - inicio
+    transicoes = sum(m["passos_total"] for ep in historico for m in ep.values())
+    resultado = {"tempo_s": tempo, "transicoes": transicoes, "transicoes_por_segundo": transicoes / tempo,
+                 "sucesso_final": _sucesso_final(historico)}
+    if devolve_agente:
+        resultado.update(agente=agente, historico=historico)
+    return resultado
+
+
+def _sucesso_final(historico, fracao: float = 0.1) -> float:
+    ultimos = historico[-max(1, int(len(historico) * fracao)):]
+    return float(np.mean([m["taxa_sucesso"] for ep in ultimos for m in ep.values()]))
+
+
+def mede_escalabilidade(cenario: Dict[str, Any], atores=(1, 2, 4, 8, 16), episodios: int = 320, seed: int = 0,
+                        **kwargs) -> List[Dict[str, Any]]:
+    """
+    Tempo e débito (transições/s) do treino com cada nº de atores para os mesmos episodios,
+    aceleração face a 1 ator e ao treino sequencial, eficiência = aceleração / atores.
+    """
+    sequencial = treino_sequencial(cenario, episodios, seed=seed,
+                                   codificador=kwargs.get("codificador", "relativo+janela"),
+                                   hiperparametros=kwargs.get("hiperparametros"))
+    linhas = [dict(sequencial, atores=0, aceleracao=1.0, aceleracao_sequencial=1.0, eficiencia=1.0)]
+    base = None
+    for n in atores:
+        _, historico, est = treino_atores(cenario, n_atores=n, episodios=episodios, seed=seed, **kwargs)
+        base = base or est["tempo_s"]
+        est["aceleracao"] = base / est["tempo_s"]
+        est["aceleracao_sequencial"] = sequencial["tempo_s"] / est["tempo_s"]
+        est["eficiencia"] = est["aceleracao"] / n
+        est["sucesso_final"] = _sucesso_final(historico)
+        linhas.append(est)
+    return linhas
+
+
+def benchmark(cenario=None, atores=(1, 2, 4, 8, 16), episodios: int = 320, seed: int = 0):
+    import os
+
+    from cenarios import CENARIO_LABIRINTO, normaliza_cenario
+
+    cenario = cenario or normaliza_cenario(CENARIO_LABIRINTO)
+    linhas = mede_escalabilidade(cenario, atores=atores, episodios=episodios, seed=seed)
+    return {"cpus": os.cpu_count(), "episodios": episodios, "linhas": linhas}
+
+
+if __name__ == "__main__":
+    import sys
+
+    episodios = int(sys.argv[1]) if len(sys.argv) > 1 else 320
+    resultado = benchmark(episodios=episodios)
+    print(f"cpus: {resultado['cpus']}  episódios: {resultado['episodios']}")
+    print(f"{'atores':>6} {'tempo_s':>8} {'trans/s':>10} {'acel':>6} {'acel_seq':>8} {'efic':>6} {'sucesso':>8}")
+    for l in resultado["linhas"]:
+        print(f"{l['atores'] or 'seq':>6} {l['tempo_s']:>8.2f} {l['transicoes_por_segundo']:>10,.0f} "
+              f"{l['aceleracao']:>6.2f} {l['aceleracao_sequencial']:>8.2f} {l['eficiencia']:>6.2f} "
+              f"{l['sucesso_final']:>8.2f}")
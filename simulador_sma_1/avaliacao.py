@@ -0,0 +1,217 @@
+"""
+Avaliação em lote de uma Q-table: a política gulosa é calculada uma vez para todas
+as células e depois milhares de episódios (posições iniciais x repetições) são
+simulados ao mesmo tempo com arrays NumPy, sem Agente, Ambiente nem visualização.
+
+As regras de movimento e recompensa são as de Ambiente.agir; termos de modelagem.py
+(ex.: penalização de revisitas) podem ser somados com modelagem=[...].
+"""
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agente import Agente
+
+ACOES = Agente.ACOES
+_DESLOCAMENTOS = {"cima": (0, -1), "baixo": (0, 1), "esquerda": (-1, 0), "direita": (1, 0), "parado": (0, 0)}
+_MOVIMENTOS = np.array([a != "parado" for a in ACOES])
+
+
+def _estado_celula(x: int, y: int, objetivo, obstaculos) -> Tuple:
+    """Mesmo estado que Agente._estado_from_obs produz para o agente na célula (x, y)."""
+    vizinhanca = (
+        (x, y - 1) in obstaculos,
+        (x, y + 1) in obstaculos,
+        (x - 1, y) in obstaculos,
+        (x + 1, y) in obstaculos,
+    )
+    return ((x, y), objetivo, vizinhanca)
+
+
+def politica_gulosa(q_table: Dict[Any, Dict[str, float]], grelha, codificador=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Devolve (acao, empates):
+      acao    (altura, largura) int8 com o índice em Agente.ACOES da primeira melhor ação (-1 em obstáculos)
+      empates (altura, largura, 5) bool com todas as ações empatadas no máximo (o agente escolhe ao acaso entre elas)
+    Estados que não estão na Q-table contam como tudo a zero, como em Agente._init_state.
+    Com um codificador (ver codificadores.py) cada id distinto só é consultado uma vez.
+    """
+    objetivo = grelha.objetivos[0] if grelha.objetivos else None
+    obstaculos = grelha.conjunto_obstaculos
+    empates = np.ones((grelha.altura, grelha.largura, len(ACOES)), dtype=bool)
+
+    def linha(valores):
+        q = np.array([valores.get(a, 0.0) for a in ACOES])
+        return q == q.max()
+
+    if codificador is not None:
+        ids = codificador.ids_grelha(grelha, objetivo)
+        unicos, inverso = np.unique(ids, return_inverse=True)
+        por_id = np.ones((len(unicos), len(ACOES)), dtype=bool)
+        for i, ident in enumerate(unicos.tolist()):
+            valores = q_table.get(ident)
+            if valores:
+                por_id[i] = linha(valores)
+        empates = por_id[inverso.reshape(ids.shape)]
+    else:
+        for y in range(grelha.altura):
+            for x in range(grelha.largura):
+                valores = q_table.get(_estado_celula(x, y, objetivo, obstaculos))
+                if valores:
+                    empates[y, x] = linha(valores)
+
+    acao = np.argmax(empates, axis=2).astype(np.int8)
+    acao[grelha.ocupacao] = -1
+    return acao, empates
+
+
+def tabela_transicoes(grelha) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Dinâmica de Ambiente.agir para cada (célula, ação), em índices planos i = y * largura + x:
+      destino (n, 5) int, recompensa (n, 5) float, colisao (n, 5) bool (tentou mover e ficou no sítio).
+    """
+    w, h = grelha.largura, grelha.altura
+    ys, xs = np.divmod(np.arange(w * h), w)
+    destino = np.empty((w * h, len(ACOES)), dtype=np.int64)
+    recompensa = np.full((w * h, len(ACOES)), -0.01)
+
+    objetivos = np.array(grelha.objetivos, dtype=np.int64).reshape(-1, 2)
+    ocupacao = grelha.ocupacao.ravel()
+
+    def dist(px, py):
+        if len(objetivos) == 0:
+            return None
+        return np.min(np.abs(px[:, None] - objetivos[:, 0]) + np.abs(py[:, None] - objetivos[:, 1]), axis=1)
+
+    dist_antes = dist(xs, ys)
+    for a, nome in enumerate(ACOES):
+        dx, dy = _DESLOCAMENTOS[nome]
+        nx = np.clip(xs + dx, 0, w - 1)
+        ny = np.clip(ys + dy, 0, h - 1)
+        bateu = ocupacao[ny * w + nx]
+        recompensa[bateu, a] -= 1.0
+        nx = np.where(bateu, xs, nx)
+        ny = np.where(bateu, ys, ny)
+        destino[:, a] = ny * w + nx
+
+        recompensa[destino[:, a] == np.arange(w * h), a] -= 0.2
+        if dist_antes is not None:
+            dist_depois = dist(nx, ny)
+            recompensa[dist_depois < dist_antes, a] += 0.1
+            recompensa[dist_depois > dist_antes, a] -= 0.1
+
+    chegada = np.zeros(w * h, dtype=bool)
+    for (ox, oy) in grelha.objetivos:
+        chegada[oy * w + ox] = True
+    recompensa[chegada[destino]] += 1.0
+
+    colisao = (destino == np.arange(w * h)[:, None]) & _MOVIMENTOS[None, :]
+    return destino, recompensa, colisao
+
+
+def avaliar_politica(
+    q_table: Dict[Any, Dict[str, float]],
+    grelha,
+    inicios: Optional[Iterable[Tuple[int, int]]] = None,
+    repeticoes: int = 10,
+    max_passos: int = 100,
+    seed: Optional[int] = None,
+    codificador=None,
+    modelagem: Sequence = (),
+) -> Dict[str, Any]:
+    """
+    Corre len(inicios) x repeticoes episódios gulosos em paralelo.
+    Por omissão começa em todas as células livres que não são objetivo.
+    modelagem: termos de modelagem.py, com uma linha de contagens por episódio.
+    """
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    w, h = grelha.largura, grelha.altura
+
+    _, empates = politica_gulosa(q_table, grelha, codificador)
+    destino, recompensa, colisao = tabela_transicoes(grelha)
+    empates = empates.reshape(w * h, len(ACOES))
+    deterministico = empates.sum(axis=1) == 1
+    acao_unica = np.argmax(empates, axis=1)
+
+    chegada = np.zeros(w * h, dtype=bool)
+    for (ox, oy) in grelha.objetivos:
+        chegada[oy * w + ox] = True
+
+    if inicios is None:
+        livres = np.flatnonzero(~grelha.ocupacao.ravel() & ~chegada)
+    else:
+        livres = np.array([y * w + x for (x, y) in inicios], dtype=np.int64)
+    posicao = np.repeat(livres, repeticoes)
+    inicio = posicao.copy()
+    n = len(posicao)
+
+    ativo = np.ones(n, dtype=bool)
+    sucesso = np.zeros(n, dtype=bool)
+    passos = np.zeros(n, dtype=np.int64)
+    colisoes = np.zeros(n, dtype=np.int64)
+    retorno = np.zeros(n)
+    for termo in modelagem:
+        termo.prepara(n, w, h)
+
+    for _ in range(max_passos):
+        idx = np.flatnonzero(ativo)
+        if idx.size == 0:
+            break
+        p = posicao[idx]
+
+        # política gulosa: gather + desempate aleatório vetorizado só onde há empates
+        a = acao_unica[p]
+        empatados = ~deterministico[p]
+        if empatados.any():
+            sorteio = rng.random((int(empatados.sum()), len(ACOES))) * empates[p[empatados]]
+            a[empatados] = np.argmax(sorteio, axis=1)
+
+        retorno[idx] += recompensa[p, a]
+        colisoes[idx] += colisao[p, a]
+        novo = destino[p, a]
+        posicao[idx] = novo
+        if modelagem:
+            ny, nx = np.divmod(novo, w)
+            for termo in modelagem:
+                retorno[idx] += termo.termos(idx, nx, ny)
+        passos[idx] += 1
+
+        chegou = chegada[novo]
+        sucesso[idx[chegou]] = True
+        ativo[idx[chegou]] = False
+
+    falhas = np.bincount(inicio[~sucesso], minlength=w * h).astype(float)
+    totais = np.bincount(inicio, minlength=w * h).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mapa_falhas = (falhas / totais).reshape(h, w)
+
+    comprimentos = passos[sucesso]
+    otimos = grelha.distancias.ravel()[inicio[sucesso]]
+    return {
+        "episodios": int(n),
+        "taxa_sucesso": float(sucesso.mean()) if n else 0.0,
+        "comprimento_medio": float(comprimentos.mean()) if comprimentos.size else 0.0,
+        "comprimento_percentis": (
+            dict(zip(("p5", "p50", "p95"), np.percentile(comprimentos, [5, 50, 95]).tolist()))
+            if comprimentos.size else {}
+        ),
+        "excesso_sobre_otimo": float((comprimentos - otimos).mean()) if comprimentos.size else 0.0,
+        "colisoes_medias": float(colisoes.mean()) if n else 0.0,
+        "recompensa_media": float(retorno.mean()) if n else 0.0,
+        "tempo_s": time.perf_counter() - t0,
+        # arrays para análise / gráficos (não serializáveis em JSON)
+        "comprimentos": comprimentos,
+        "mapa_falhas": mapa_falhas,
+    }
+
+
+def avaliar_cenario(q_table, cenario, repeticoes: int = 10, seed: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+    """avaliar_politica para um cenário de cenarios.py (usa o primeiro mapa, se houver vários)."""
+    from cenarios import grelha_do_cenario
+
+    mapa = cenario["mapas"][0] if cenario.get("mapas") else None
+    fase = cenario["teste"]
+    kwargs.setdefault("max_passos", min(fase["passos_por_episodio"], fase.get("max_passos", cenario["max_passos"])))
+    return avaliar_politica(q_table, grelha_do_cenario(cenario, mapa), repeticoes=repeticoes, seed=seed, **kwargs)
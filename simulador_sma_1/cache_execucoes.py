@@ -0,0 +1,210 @@
+"""
+Cache de execuções de treino endereçada pelo conteúdo.
+
+A chave é o sha256 de (cenário, política, codificador, hiperparâmetros, seed, versão
+do código), por isso repetir uma experiência ou alargar um sweep (mais seeds, mais
+cenários) só treina o que ainda não foi treinado com este código. Só execuções com
+seed entram na cache: sem seed o resultado não se repete.
+
+Cada entrada é uma pasta <cache>/<ab>/<chave>/ com:
+  meta.json        o que gerou a execução, resumo e data
+  historico.json   histórico de executar_experiencia, tal e qual (o CSV sai igual)
+  metricas.npz     o mesmo em colunas (metricas.RegistoMetricas)
+  curvas.npz       média móvel da recompensa por passo e da taxa de sucesso
+  qtable.pkl       Q-table (pesos.npy na aproximação linear)
+
+As entradas são escritas numa pasta temporária e renomeadas (dois workers com a mesma
+chave não se estragam). O acesso toca em meta.json e, quando a cache passa de max_bytes,
+saem as entradas com acesso mais antigo (LRU).
+"""
+import functools
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+JANELA_CURVAS = 10
+
+
+@functools.lru_cache(maxsize=1)
+def versao_codigo() -> str:
+    """sha256 (curto) dos módulos .py do simulador: qualquer alteração invalida a cache."""
+    h = hashlib.sha256()
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    for ficheiro in sorted(glob.glob(os.path.join(pasta, "*.py"))):
+        h.update(os.path.basename(ficheiro).encode())
+        with open(ficheiro, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def chave_execucao(
+    cenario: Dict[str, Any],
+    politica: str,
+    seed: int,
+    codificador: Optional[str] = None,
+    hiperparametros: Optional[Dict[str, Any]] = None,
+    versao: Optional[str] = None,
+) -> str:
+    descricao = {
+        "cenario": cenario,
+        "politica": politica,
+        "codificador": codificador,
+        "hiperparametros": hiperparametros or {},
+        "seed": seed,
+        "versao": versao or versao_codigo(),
+    }
+    # JSON canónico: chaves ordenadas, tuplos como listas
+    texto = json.dumps(descricao, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def _tamanho(pasta: str) -> int:
+    total = 0
+    for raiz, _, ficheiros in os.walk(pasta):
+        for nome in ficheiros:
+            try:
+                total += os.path.getsize(os.path.join(raiz, nome))
+            except OSError:
+                pass  # removido por outro processo
+    return total
+
+
+class EntradaCache:
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        with open(os.path.join(pasta, "meta.json"), encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+
+    def ficheiro(self, nome: str) -> str:
+        return os.path.join(self.pasta, nome)
+
+    def historico(self) -> List[Dict[str, Dict[str, float]]]:
+        with open(self.ficheiro("historico.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def metricas(self):
+        from metricas import RegistoMetricas
+
+        return RegistoMetricas.carregar(self.ficheiro("metricas.npz"))
+
+    def curvas(self) -> Dict[str, np.ndarray]:
+        with np.load(self.ficheiro("curvas.npz")) as f:
+            return {k: f[k] for k in f.files}
+
+    def ficheiro_q_table(self) -> str:
+        for nome in ("qtable.pkl", "pesos.npy"):
+            if os.path.exists(self.ficheiro(nome)):
+                return self.ficheiro(nome)
+        raise FileNotFoundError(f"{self.pasta}: entrada sem Q-table")
+
+
+class CacheExecucoes:
+    def __init__(self, pasta: str, max_bytes: int = 1 << 30):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self.acertos = 0
+        self.falhas = 0
+        self.removidas = 0
+        os.makedirs(pasta, exist_ok=True)
+
+    def _pasta(self, chave: str) -> str:
+        return os.path.join(self.pasta, chave[:2], chave)
+
+    def __contains__(self, chave: str) -> bool:
+        return os.path.exists(os.path.join(self._pasta(chave), "meta.json"))
+
+    def obtem(self, chave: str) -> Optional[EntradaCache]:
+        """A entrada (e conta um acerto) ou None (e conta uma falha)."""
+        pasta = self._pasta(chave)
+        try:
+            entrada = EntradaCache(pasta)
+            os.utime(entrada.ficheiro("meta.json"))  # acesso para o LRU
+        except (OSError, ValueError):
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return entrada
+
+    def guarda(self, chave: str, agente, historico, descricao: Dict[str, Any]) -> EntradaCache:
+        """Guarda a Q-table do agente e o histórico; descricao vai para meta.json."""
+        from metricas import RegistoMetricas, media_movel
+
+        temporaria = os.path.join(self.pasta, f"tmp-{uuid.uuid4().hex}")
+        os.makedirs(temporaria)
+        try:
+            with open(os.path.join(temporaria, "historico.json"), "w", encoding="utf-8") as f:
+                json.dump(historico, f)
+            registo = RegistoMetricas.a_partir_de_historico(historico)
+            registo.guardar(os.path.join(temporaria, "metricas.npz"))
+            janela = max(1, min(JANELA_CURVAS, registo.n_episodios))
+            np.savez_compressed(
+                os.path.join(temporaria, "curvas.npz"),
+                media_recompensa_por_passo=media_movel(registo.serie("media_recompensa_por_passo"), janela, eixo=0),
+                taxa_sucesso=media_movel(registo.serie("taxa_sucesso"), janela, eixo=0),
+            )
+            nome_q = "pesos.npy" if getattr(agente, "tipo_politica", None) == "linear" else "qtable.pkl"
+            agente.guardar_q_table(os.path.join(temporaria, nome_q))
+            with open(os.path.join(temporaria, "meta.json"), "w", encoding="utf-8") as f:
+                # o epsilon final faz parte do estado treinado (um acerto devolve o agente como ficou)
+                meta = dict(descricao, chave=chave, criado=time.time(), epsilon=getattr(agente, "epsilon", None))
+                json.dump(meta, f, default=list)
+
+            destino = self._pasta(chave)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            try:
+                os.rename(temporaria, destino)
+            except OSError:
+                pass  # outro processo guardou a mesma chave primeiro
+        finally:
+            shutil.rmtree(temporaria, ignore_errors=True)
+        entrada = EntradaCache(self._pasta(chave))
+        self.limita(manter=entrada.pasta)
+        return entrada
+
+    # ---------- tamanho / LRU ----------
+
+    def entradas(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.pasta, "??", "*", "meta.json")))
+
+    def limita(self, max_bytes: Optional[int] = None, manter: Optional[str] = None):
+        """
+        Remove as entradas com acesso mais antigo até a cache caber em max_bytes.
+        manter: pasta de uma entrada que nunca sai (a que se acabou de guardar), mesmo
+        que sozinha passe de max_bytes.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entradas = []
+        for meta in self.entradas():
+            try:
+                entradas.append((os.path.getmtime(meta), os.path.dirname(meta)))
+            except OSError:
+                pass
+        tamanhos = {pasta: _tamanho(pasta) for _, pasta in entradas}
+        total = sum(tamanhos.values())
+        for _, pasta in sorted(entradas):
+            if total <= max_bytes:
+                break
+            if pasta == manter:
+                continue
+            shutil.rmtree(pasta, ignore_errors=True)
+            total -= tamanhos[pasta]
+            self.removidas += 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        pedidos = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acertos": self.acertos / pedidos if pedidos else 0.0,
+            "removidas": self.removidas,
+            "entradas": len(self.entradas()),
+            "bytes": _tamanho(self.pasta),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,243 @@
+import copy
+import functools
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from aleatorio import FluxoAleatorio, fluxo
+from ambiente import Ambiente
+from grelha import Grelha
+
+# --------------------------------------------------------------
+#   Mapas
+# --------------------------------------------------------------
+
+MAPA_LAB_10x10 = [
+    (2, 0), (4, 0), (7, 0), (8, 0), (9, 0),
+    (6, 1),
+    (0, 2), (1, 2), (2, 2), (5, 2), (8, 2),
+    (4, 3), (7, 3),
+    (1, 4), (2, 4), (4, 4), (5, 4), (8, 4),
+    (4, 5), (8, 5),
+    (2, 6), (3, 6), (6, 6), (7, 6), (8, 6),
+    (5, 7),
+    (1, 8), (2, 8), (3, 8), (4, 8), (7, 8), (8, 8), (9, 8),
+    (3, 9),
+]
+
+OBSTACULOS_FAROL = [
+    (2, 2), (2, 3), (3, 2), (3, 4),
+    (7, 6), (8, 6), (7, 7),
+    (8, 3), (4, 8),
+]
+
+# mapas com nome que um cenário pode referir em "mapas";
+# "gerado:<seed>" gera um labirinto aleatório válido (ver gera_obstaculos_labirinto)
+MAPAS: Dict[str, List] = {
+    "MAPA_LAB_10x10": MAPA_LAB_10x10,
+    "FAROL_10x10": OBSTACULOS_FAROL,
+}
+PREFIXO_GERADO = "gerado:"
+
+
+def registar_mapa(nome: str, obstaculos: List[Tuple[int, int]]):
+    if nome.startswith(PREFIXO_GERADO):
+        raise ValueError(f"O prefixo {PREFIXO_GERADO!r} está reservado para mapas gerados")
+    MAPAS[nome] = [tuple(p) for p in obstaculos]
+
+
+def gera_obstaculos_labirinto(
+    largura: int,
+    altura: int,
+    objetivo: Tuple[int, int],
+    inicio: Tuple[int, int] = (0, 0),
+    rng=None,
+    n_min: int = 3,
+    n_max: int = 6,
+) -> List[Tuple[int, int]]:
+    """
+    Obstáculos aleatórios que deixam sempre caminho entre o início e o objetivo.
+    rng: semente ou aleatorio.FluxoAleatorio (também serve o módulo random / random.Random).
+    """
+    if rng is None or not hasattr(rng, "randint"):
+        rng = fluxo(rng)
+    vizinhos_inicio = {
+        inicio,
+        (inicio[0] + 1, inicio[1]),
+        (inicio[0] - 1, inicio[1]),
+        (inicio[0], inicio[1] + 1),
+        (inicio[0], inicio[1] - 1),
+    }
+
+    while True:
+        obstaculos = set()
+        n_obs = rng.randint(n_min, n_max)
+
+        while len(obstaculos) < n_obs:
+            pos = (rng.randint(0, largura - 1), rng.randint(0, altura - 1))
+            if pos not in vizinhos_inicio and pos != objetivo:
+                obstaculos.add(pos)
+
+        obstaculos = sorted(obstaculos)
+        if Grelha(largura, altura, (objetivo,), obstaculos).existe_caminho(inicio):
+            return obstaculos
+
+
+def obstaculos_do_mapa(nome: str, cenario: Dict[str, Any]) -> List[Tuple[int, int]]:
+    if nome.startswith(PREFIXO_GERADO):
+        seed = int(nome[len(PREFIXO_GERADO):])
+        return gera_obstaculos_labirinto(
+            cenario["largura"], cenario["altura"], cenario["objetivos"][0], cenario["inicio"], FluxoAleatorio(seed)
+        )
+    return MAPAS[nome]
+
+
+# --------------------------------------------------------------
+#   Cenários
+# --------------------------------------------------------------
+# Um cenário é um dicionário simples (serializável em JSON/YAML):
+#   largura, altura, max_passos, objetivos, obstaculos ou mapas, inicio,
+#   treino / teste: {episodios, passos_por_episodio, penalizar_revisitas, max_passos}
+
+CENARIO_FAROL: Dict[str, Any] = {
+    "nome": "farol",
+    "largura": 10,
+    "altura": 10,
+    "max_passos": 30,
+    "objetivos": [(9, 9)],
+    "obstaculos": OBSTACULOS_FAROL,
+    "inicio": (0, 0),
+    "treino": {"episodios": 45, "passos_por_episodio": 24, "penalizar_revisitas": False},
+    "teste": {"episodios": 13, "passos_por_episodio": 30, "penalizar_revisitas": False},
+}
+
+CENARIO_LABIRINTO: Dict[str, Any] = {
+    "nome": "labirinto",
+    "largura": 10,
+    "altura": 10,
+    "max_passos": 1000,
+    "objetivos": [(9, 9)],
+    "mapas": ["MAPA_LAB_10x10"],
+    "inicio": (0, 0),
+    "treino": {"episodios": 35, "passos_por_episodio": 400, "penalizar_revisitas": True},
+    "teste": {"episodios": 5, "passos_por_episodio": 40, "penalizar_revisitas": True, "max_passos": 100},
+}
+
+CENARIOS: Dict[str, Dict[str, Any]] = {
+    "farol": CENARIO_FAROL,
+    "labirinto": CENARIO_LABIRINTO,
+}
+
+
+def registar_cenario(nome: str, cenario: Dict[str, Any]):
+    CENARIOS[nome] = normaliza_cenario(dict(cenario, nome=cenario.get("nome", nome)))
+
+
+_FASE_OMISSAO = {"episodios": 5, "passos_por_episodio": 10, "penalizar_revisitas": False}
+
+
+def _posicao(valor) -> tuple:
+    if not isinstance(valor, (list, tuple)) or len(valor) != 2:
+        raise ValueError(f"Posição inválida: {valor!r}")
+    return int(valor[0]), int(valor[1])
+
+
+def normaliza_cenario(dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida um cenário lido de ficheiro e converte listas JSON em tuplos."""
+    if "largura" not in dados or "altura" not in dados:
+        raise ValueError(f"Cenário {dados.get('nome', '?')!r} sem largura/altura")
+
+    cenario = copy.deepcopy(dados)
+    cenario.setdefault("nome", "cenario")
+    cenario["largura"] = int(cenario["largura"])
+    cenario["altura"] = int(cenario["altura"])
+    cenario["max_passos"] = int(cenario.get("max_passos", 50))
+    cenario["objetivos"] = [_posicao(p) for p in cenario.get("objetivos", [])]
+    cenario["obstaculos"] = [_posicao(p) for p in cenario.get("obstaculos", [])]
+    cenario["inicio"] = _posicao(cenario.get("inicio", (0, 0)))
+
+    for nome_mapa in cenario.get("mapas", []):
+        if nome_mapa.startswith(PREFIXO_GERADO):
+            if not cenario["objetivos"]:
+                raise ValueError(f"Mapa gerado {nome_mapa!r} precisa de um objetivo")
+            int(nome_mapa[len(PREFIXO_GERADO):])
+        elif nome_mapa not in MAPAS:
+            raise ValueError(f"Mapa desconhecido {nome_mapa!r} (disponíveis: {sorted(MAPAS)})")
+
+    for fase in ("treino", "teste"):
+        valores = dict(_FASE_OMISSAO)
+        valores.update(cenario.get(fase) or {})
+        cenario[fase] = valores
+
+    return cenario
+
+
+def obter_cenario(nome_ou_ficheiro: str) -> List[Dict[str, Any]]:
+    """
+    Devolve a lista de cenários para um nome registado ("farol", "labirinto")
+    ou para um ficheiro JSON/YAML com um cenário ou {"cenarios": [...]}.
+    """
+    if nome_ou_ficheiro in CENARIOS:
+        return [normaliza_cenario(CENARIOS[nome_ou_ficheiro])]
+    if not os.path.exists(nome_ou_ficheiro):
+        raise ValueError(f"Cenário {nome_ou_ficheiro!r} não existe (nem registado nem ficheiro)")
+    return carregar_cenarios(nome_ou_ficheiro)
+
+
+def carregar_config(ficheiro: str) -> Any:
+    """Lê um ficheiro JSON ou YAML (o YAML precisa do PyYAML instalado)."""
+    with open(ficheiro, "r", encoding="utf-8") as f:
+        texto = f.read()
+
+    if ficheiro.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Para ler YAML é preciso instalar o PyYAML (pip install pyyaml)")
+        return yaml.safe_load(texto)
+    return json.loads(texto)
+
+
+def carregar_cenarios(ficheiro: str) -> List[Dict[str, Any]]:
+    dados = carregar_config(ficheiro)
+    if isinstance(dados, dict) and "cenarios" in dados:
+        dados = dados["cenarios"]
+    if isinstance(dados, dict):
+        dados = [dados]
+    if not isinstance(dados, list) or not dados:
+        raise ValueError(f"{ficheiro}: esperava um cenário ou uma lista de cenários")
+    return [normaliza_cenario(c) for c in dados]
+
+
+# --------------------------------------------------------------
+#   Grelhas compiladas (partilhadas entre ambientes)
+# --------------------------------------------------------------
+
+@functools.lru_cache(maxsize=256)
+def compila_grelha(largura: int, altura: int, objetivos: tuple, obstaculos: tuple) -> Grelha:
+    """Compila um mapa uma única vez; pedidos iguais devolvem a mesma Grelha."""
+    return Grelha(largura, altura, objetivos, obstaculos)
+
+
+def grelha_do_cenario(cenario: Dict[str, Any], mapa: Optional[str] = None) -> Grelha:
+    """Grelha do cenário com os obstáculos fixos mais (opcionalmente) um dos mapas com nome."""
+    obstaculos = list(cenario["obstaculos"])
+    if mapa is not None:
+        obstaculos += obstaculos_do_mapa(mapa, cenario)
+    return compila_grelha(
+        cenario["largura"],
+        cenario["altura"],
+        tuple(cenario["objetivos"]),
+        tuple(tuple(p) for p in obstaculos),
+    )
+
+
+def constroi_ambiente(cenario: Dict[str, Any], fase: str = "treino", rng=None) -> Ambiente:
+    """
+    Cria o Ambiente descrito pelo cenário (sem agentes), partilhando a grelha compilada.
+    O mapa (quando há vários) é sorteado com rng, que fica como fluxo do ambiente.
+    """
+    rng = fluxo(rng)
+    max_passos = cenario[fase].get("max_passos", cenario["max_passos"])
+    mapa = rng.choice(cenario["mapas"]) if cenario.get("mapas") else None
+    return Ambiente.a_partir_de_grelha(grelha_do_cenario(cenario, mapa), max_passos=max_passos, rng=rng)
@@ -0,0 +1,485 @@
+"""
+Linha de comandos não interativa para correr experiências em lote.
+
+Exemplos:
+    python cli.py treino --cenario farol --politica qlearning --saida resultados/lote1
+    python cli.py teste --cenario farol --q-table resultados/lote1/farol_qlearning_s0_qtable.pkl
+    python cli.py benchmark --cenario labirinto --repeticoes 5 --workers 4
+    python cli.py avaliar --cenario farol --q-table qtable_farol.pkl --repeticoes 1000
+    python cli.py sweep --config sweep.yaml --workers 8 --resumo resumo.json
+    python cli.py afinar --cenario labirinto --metodo hyperband --max-episodios 81 --workers 4 --seed 0
+    python cli.py relatorio --saida resultados/lote1 --workers 4
+
+O resumo sai em JSON no stdout (ou no ficheiro --resumo). Códigos de saída:
+    0 tudo correu bem, 1 pelo menos uma execução falhou, 2 erro de configuração.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from cenarios import carregar_config, normaliza_cenario, obter_cenario, CENARIOS
+
+SAIDA_OK = 0
+SAIDA_FALHOU = 1
+SAIDA_CONFIG = 2
+
+
+# --------------------------------------------------------------
+#   Execução de um trabalho (corre num worker)
+# --------------------------------------------------------------
+
+def resumo_historico(historico: List[Dict[str, Dict[str, float]]]) -> Dict[str, float]:
+    """Médias das métricas de todos os episódios / agentes de um histórico."""
+    linhas = [mets for ep in historico for mets in ep.values()]
+    if not linhas:
+        return {"episodios": 0}
+    n = len(linhas)
+    return {
+        "episodios": len(historico),
+        "taxa_sucesso": sum(m["taxa_sucesso"] for m in linhas) / n,
+        "recompensa_media": sum(m["recompensa_total"] for m in linhas) / n,
+        "media_recompensa_por_passo": sum(m["media_recompensa_por_passo"] for m in linhas) / n,
+        "passos_medios": sum(m["passos_total"] for m in linhas) / n,
+        "passos_total": sum(m["passos_total"] for m in linhas),
+        "colisoes_medias": sum(m["colisoes"] for m in linhas) / n,
+        "sucesso_ultimo_episodio": sum(m["taxa_sucesso"] for m in historico[-1].values()) / len(historico[-1]),
+    }
+
+
+def _prefixo(cenario: Dict[str, Any], politica: str, seed: Optional[int]) -> str:
+    return f"{cenario['nome']}_{politica}_s{seed if seed is not None else 'x'}"
+
+
+def corre_trabalho(trabalho: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Corre um treino / teste / benchmark descrito por um dicionário e devolve o resumo.
+    Nunca levanta excepções: os erros ficam em "erro" para o processo principal decidir o código de saída.
+    """
+    # importado aqui para o processo principal da CLI não carregar o simulador sem precisar
+    from main import treinar_cenario, testar_cenario
+
+    cenario = trabalho["cenario"]
+    politica = trabalho.get("politica", "qlearning")
+    seed = trabalho.get("seed")
+    saida = trabalho.get("saida", "resultados")
+    modo = trabalho.get("modo", "treino")
+
+    resultado: Dict[str, Any] = {
+        "cenario": cenario["nome"],
+        "politica": politica,
+        "seed": seed,
+        "modo": modo,
+        "ok": False,
+    }
+
+    inicio = time.perf_counter()
+    try:
+        os.makedirs(saida, exist_ok=True)
+        prefixo = _prefixo(cenario, politica, seed)
+
+        if modo == "avaliar":
+            import pickle
+            import numpy as np
+            from avaliacao import avaliar_cenario
+
+            with open(trabalho["q_table"], "rb") as f:
+                q_table = pickle.load(f)
+            from codificadores import cria_codificador
+
+            avaliacao = avaliar_cenario(
+                q_table,
+                cenario,
+                repeticoes=trabalho.get("repeticoes", 10),
+                seed=seed,
+                codificador=cria_codificador(trabalho.get("codificador")),
+            )
+            np.save(os.path.join(saida, f"{prefixo}_mapa_falhas.npy"), avaliacao.pop("mapa_falhas"))
+            avaliacao.pop("comprimentos")
+            resultado.update(avaliacao)
+        elif modo == "teste":
+            ficheiro_q = trabalho.get("q_table") or os.path.join(saida, f"{prefixo}_qtable.pkl")
+            historico = testar_cenario(
+                cenario,
+                politica,
+                ficheiro_q_table=ficheiro_q,
+                visualizar=False,
+                verboso=False,
+                codificador=trabalho.get("codificador"),
+                seed=seed,
+                trajetorias=os.path.join(saida, f"{prefixo}_trajetorias") if trabalho.get("trajetorias") else None,
+            )
+            resultado.update(resumo_historico(historico))
+        else:
+            guardar = modo == "treino"
+            ficheiro_q = os.path.join(saida, f"{prefixo}_qtable.pkl") if guardar and politica != "fixa" else None
+            cache = None
+            if guardar and trabalho.get("cache"):
+                from cache_execucoes import CacheExecucoes
+
+                cache = CacheExecucoes(trabalho["cache"], max_bytes=int(trabalho.get("cache_max_mb", 1024) * 2 ** 20))
+            _, historico = treinar_cenario(
+                cenario,
+                politica,
+                ficheiro_q_table=ficheiro_q,
+                prefixo=prefixo if guardar else None,
+                pasta=saida,
+                visualizar=trabalho.get("visualizar", False),
+                verboso=False,
+                graficos=trabalho.get("graficos", False),
+                codificador=trabalho.get("codificador"),
+                seed=seed,
+                trajetorias=os.path.join(saida, f"{prefixo}_trajetorias") if trabalho.get("trajetorias") else None,
+                hiperparametros=trabalho.get("hiperparametros"),
+                cache=cache,
+                perfil_memoria=os.path.join(saida, prefixo) if trabalho.get("perfil_memoria") else None,
+            )
+            if trabalho.get("perfil_memoria"):
+                resultado["memoria_csv"] = os.path.join(saida, f"{prefixo}_memoria.csv")
+            if ficheiro_q is not None:
+                resultado["q_table"] = ficheiro_q
+            if cache is not None:
+                resultado["cache"] = "acerto" if cache.acertos else "falha"
+                resultado["cache_removidas"] = cache.removidas
+            resultado.update(resumo_historico(historico))
+
+        resultado["ok"] = True
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+        resultado["traceback"] = traceback.format_exc()
+
+    resultado["tempo_s"] = time.perf_counter() - inicio
+    if resultado["ok"] and resultado["tempo_s"] > 0 and "passos_total" in resultado:
+        resultado["passos_por_segundo"] = resultado.get("passos_total", 0) / resultado["tempo_s"]
+    return resultado
+
+
+def corre_trabalhos(trabalhos: List[Dict[str, Any]], workers: int = 1) -> List[Dict[str, Any]]:
+    """Corre os trabalhos em série (workers=1) ou num ProcessPoolExecutor, mantendo a ordem."""
+    if workers <= 1 or len(trabalhos) <= 1:
+        return [corre_trabalho(t) for t in trabalhos]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(corre_trabalho, trabalhos))
+
+
+# --------------------------------------------------------------
+#   Construção dos trabalhos a partir dos argumentos
+# --------------------------------------------------------------
+
+def _aplica_overrides(cenario: Dict[str, Any], args, fase: str) -> Dict[str, Any]:
+    if getattr(args, "episodios", None) is not None:
+        cenario[fase]["episodios"] = args.episodios
+    if getattr(args, "passos", None) is not None:
+        cenario[fase]["passos_por_episodio"] = args.passos
+    if getattr(args, "max_passos", None) is not None:
+        cenario[fase]["max_passos"] = args.max_passos
+    return cenario
+
+
+def _seeds(args) -> List[Optional[int]]:
+    if getattr(args, "seeds", None):
+        return list(args.seeds)
+    return [getattr(args, "seed", None)]
+
+
+def _cenarios_de_args(args, fase: str) -> List[Dict[str, Any]]:
+    cenarios = []
+    for nome in args.cenario:
+        for c in obter_cenario(nome):
+            cenarios.append(_aplica_overrides(c, args, fase))
+    return cenarios
+
+
+def trabalhos_treino(args) -> List[Dict[str, Any]]:
+    return [
+        {
+            "modo": "treino",
+            "cenario": c,
+            "politica": args.politica,
+            "codificador": args.codificador,
+            "seed": seed,
+            "saida": args.saida,
+            "graficos": args.graficos,
+            "visualizar": args.visualizar,
+            "trajetorias": args.trajetorias,
+            "perfil_memoria": args.perfil_memoria,
+            "cache": args.cache,
+            "cache_max_mb": args.cache_max_mb,
+        }
+        for c in _cenarios_de_args(args, "treino")
+        for seed in _seeds(args)
+    ]
+
+
+def trabalhos_teste(args) -> List[Dict[str, Any]]:
+    return [
+        {
+            "modo": "teste",
+            "cenario": c,
+            "politica": args.politica,
+            "codificador": args.codificador,
+            "seed": seed,
+            "saida": args.saida,
+            "q_table": args.q_table,
+            "trajetorias": args.trajetorias,
+        }
+        for c in _cenarios_de_args(args, "teste")
+        for seed in _seeds(args)
+    ]
+
+
+def trabalhos_avaliar(args) -> List[Dict[str, Any]]:
+    if not args.q_table:
+        raise ValueError("avaliar precisa de --q-table")
+    return [
+        {
+            "modo": "avaliar",
+            "cenario": c,
+            "politica": args.politica,
+            "codificador": args.codificador,
+            "seed": seed,
+            "saida": args.saida,
+            "q_table": args.q_table,
+            "repeticoes": args.repeticoes,
+        }
+        for c in _cenarios_de_args(args, "teste")
+        for seed in _seeds(args)
+    ]
+
+
+def trabalhos_benchmark(args) -> List[Dict[str, Any]]:
+    base = args.seed if args.seed is not None else 0
+    return [
+        {
+            "modo": "benchmark",
+            "cenario": c,
+            "politica": args.politica,
+            "codificador": args.codificador,
+            "seed": base + r,
+            "saida": args.saida,
+        }
+        for c in _cenarios_de_args(args, "treino")
+        for r in range(args.repeticoes)
+    ]
+
+
+def trabalhos_sweep(args) -> List[Dict[str, Any]]:
+    """
+    Ficheiro de sweep (JSON/YAML):
+        cenarios: [farol, {largura: 12, altura: 12, ...}, mapas.json]
+        politicas: [qlearning, fixa]
+        seeds: [0, 1, 2]
+        treino: {episodios: 100}      # opcional, aplicado a todos os cenários
+        hiperparametros: {alpha: 0.3} # opcional, para Agente.cria
+        cache: resultados/cache       # opcional (ou --cache): ao alargar o sweep só corre o que falta
+    """
+    config = carregar_config(args.config) if args.config else {}
+    if not isinstance(config, dict):
+        raise ValueError(f"{args.config}: o sweep tem de ser um dicionário")
+
+    cenarios = []
+    for entrada in config.get("cenarios") or args.cenario or []:
+        if isinstance(entrada, dict):
+            cenarios.append(normaliza_cenario(entrada))
+        else:
+            cenarios.extend(obter_cenario(str(entrada)))
+    if not cenarios:
+        raise ValueError("Sweep sem cenários")
+
+    for c in cenarios:
+        c["treino"].update(config.get("treino") or {})
+        _aplica_overrides(c, args, "treino")
+
+    politicas = config.get("politicas") or [args.politica]
+    seeds = config.get("seeds") or args.seeds or [0]
+
+    return [
+        {
+            "modo": "treino",
+            "cenario": c,
+            "politica": p,
+            "codificador": config.get("codificador", args.codificador),
+            "seed": s,
+            "saida": args.saida,
+            "graficos": args.graficos,
+            "hiperparametros": config.get("hiperparametros"),
+            "cache": config.get("cache", args.cache),
+            "cache_max_mb": config.get("cache_max_mb", args.cache_max_mb),
+        }
+        for c in cenarios
+        for p in politicas
+        for s in seeds
+    ]
+
+
+# --------------------------------------------------------------
+#   argparse
+# --------------------------------------------------------------
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="simulador_sma", description="Simulador multi-agente em lote (sem interface)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument("--cenario", action="append", default=None,
+                       help=f"nome registado ({', '.join(CENARIOS)}) ou ficheiro JSON/YAML; pode repetir")
+    comum.add_argument("--politica", default="qlearning", choices=["qlearning", "fixa", "linear"])
+    comum.add_argument("--codificador", default=None,
+                       help="codificador de estado (ver codificadores.py), por omissão o estado absoluto")
+    comum.add_argument("--saida", default="resultados", help="pasta para Q-tables, CSV e gráficos")
+    comum.add_argument("--workers", type=int, default=1, help="processos em paralelo")
+    comum.add_argument("--seed", type=int, default=None)
+    comum.add_argument("--seeds", type=int, nargs="+", default=None)
+    comum.add_argument("--episodios", type=int, default=None)
+    comum.add_argument("--passos", type=int, default=None, help="passos por episódio")
+    comum.add_argument("--max-passos", dest="max_passos", type=int, default=None)
+    comum.add_argument("--resumo", default=None, help="escreve o resumo JSON neste ficheiro além do stdout")
+    comum.add_argument("--cache", default=None,
+                       help="pasta da cache de execuções (ver cache_execucoes.py); só treinos com seed")
+    comum.add_argument("--cache-max-mb", dest="cache_max_mb", type=float, default=1024,
+                       help="tamanho máximo da cache; saem as entradas usadas há mais tempo")
+
+    p = sub.add_parser("treino", parents=[comum], help="treina e guarda Q-table / histórico")
+    p.add_argument("--graficos", action="store_true", help="gera também o PNG da curva (precisa de matplotlib)")
+    p.add_argument("--visualizar", action="store_true", help="abre a janela pygame durante o treino")
+    p.add_argument("--trajetorias", action="store_true", help="grava as trajetórias (ver trajetorias.py)")
+    p.add_argument("--perfil-memoria", dest="perfil_memoria", action="store_true",
+                   help="tracemalloc por episódio em <prefixo>_memoria.csv (ver perfil_memoria.py; mais lento, sem cache)")
+
+    p = sub.add_parser("teste", parents=[comum], help="avalia uma Q-table guardada sem exploração")
+    p.add_argument("--q-table", dest="q_table", default=None)
+    p.add_argument("--trajetorias", action="store_true", help="grava as trajetórias (ver trajetorias.py)")
+
+    p = sub.add_parser("avaliar", parents=[comum], help="avaliação gulosa em lote (vetorizada) de uma Q-table")
+    p.add_argument("--q-table", dest="q_table", default=None)
+    p.add_argument("--repeticoes", type=int, default=10, help="episódios por posição inicial")
+
+    p = sub.add_parser("benchmark", parents=[comum], help="mede o tempo de treino sem guardar nada")
+    p.add_argument("--repeticoes", type=int, default=3)
+
+    p = sub.add_parser("sweep", parents=[comum], help="cenários x políticas x seeds a partir de um ficheiro")
+    p.add_argument("--config", default=None)
+    p.add_argument("--graficos", action="store_true")
+
+    p = sub.add_parser("afinar", parents=[comum], help="procura alpha/gamma/epsilon/decaimento/revisitas (ver afinacao.py)")
+    p.add_argument("--metodo", default="hyperband", choices=["hyperband", "halving"])
+    p.add_argument("--max-episodios", dest="max_episodios_ensaio", type=int, default=None,
+                   help="episódios de um ensaio que chegue ao fim (por omissão os do treino do cenário)")
+    p.add_argument("--episodios-min", dest="episodios_min", type=int, default=3)
+    p.add_argument("--eta", type=int, default=3, help="fica 1/eta dos ensaios em cada degrau")
+    p.add_argument("--configuracoes", type=int, default=27, help="nº de configurações (só --metodo halving)")
+
+    p = sub.add_parser("relatorio", parents=[comum], help="figuras, resumos e index.html dos históricos em --saida")
+    p.add_argument("--destino", default=None, help="pasta do relatório (por omissão <saida>/relatorio)")
+    p.add_argument("--forcar", action="store_true", help="redesenha também as figuras cujos dados não mudaram")
+
+    return parser
+
+
+def relatorio(args) -> List[Dict[str, Any]]:
+    from relatorio import gera_relatorio
+
+    resultado = {"cenario": args.saida, "politica": None, "seed": None, "modo": "relatorio"}
+    resultado.update(gera_relatorio(args.saida, args.destino, workers=args.workers, forcar=args.forcar), ok=True)
+    return [resultado]
+
+
+def afinar(args) -> Dict[str, Any]:
+    """Afina cada cenário pedido; o resumo tem o leaderboard de cada um (sem as Q-tables)."""
+    from afinacao import afina
+
+    resultados = []
+    for c in _cenarios_de_args(args, "treino"):
+        inicio = time.perf_counter()
+        resultado = {"cenario": c["nome"], "politica": "qlearning", "seed": args.seed, "modo": "afinar", "ok": False}
+        try:
+            afinado = afina(
+                c,
+                metodo=args.metodo,
+                max_episodios=args.max_episodios_ensaio,
+                episodios_min=args.episodios_min,
+                eta=args.eta,
+                configuracoes=args.configuracoes,
+                workers=args.workers,
+                seed=args.seed,
+                saida=args.saida,
+                codificador=args.codificador,
+            )
+            afinado.pop("ensaios")
+            resultado.update(afinado, ok=True)
+        except Exception as e:
+            resultado["erro"] = f"{type(e).__name__}: {e}"
+            resultado["traceback"] = traceback.format_exc()
+        resultado["tempo_s"] = time.perf_counter() - inicio
+        resultados.append(resultado)
+    return resultados
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+
+    if args.cenario is None and args.comando != "sweep":
+        args.cenario = ["farol"]
+
+    construtores = {
+        "treino": trabalhos_treino,
+        "teste": trabalhos_teste,
+        "avaliar": trabalhos_avaliar,
+        "benchmark": trabalhos_benchmark,
+        "sweep": trabalhos_sweep,
+    }
+    inicio = time.perf_counter()
+    if args.comando in ("afinar", "relatorio"):
+        # gerem o seu próprio pool (os degraus da afinação dependem uns dos outros)
+        try:
+            resultados = {"afinar": afinar, "relatorio": relatorio}[args.comando](args)
+        except (ValueError, OSError) as e:
+            print(f"Erro de configuração: {e}", file=sys.stderr)
+            return SAIDA_CONFIG
+    else:
+        try:
+            trabalhos = construtores[args.comando](args)
+        except (ValueError, OSError) as e:
+            print(f"Erro de configuração: {e}", file=sys.stderr)
+            return SAIDA_CONFIG
+        resultados = corre_trabalhos(trabalhos, workers=args.workers)
+    falhados = [r for r in resultados if not r["ok"]]
+
+    resumo = {
+        "comando": args.comando,
+        "trabalhos": len(resultados),
+        "falhados": len(falhados),
+        "workers": args.workers,
+        "tempo_total_s": time.perf_counter() - inicio,
+        "resultados": resultados,
+    }
+    com_cache = [r for r in resultados if "cache" in r]
+    if com_cache:
+        acertos = sum(r["cache"] == "acerto" for r in com_cache)
+        resumo["cache"] = {
+            "acertos": acertos,
+            "falhas": len(com_cache) - acertos,
+            "taxa_acertos": acertos / len(com_cache),
+            "removidas": sum(r.get("cache_removidas", 0) for r in com_cache),
+        }
+
+    texto = json.dumps(resumo, indent=2, ensure_ascii=False, default=str)
+    print(texto)
+    if args.resumo:
+        os.makedirs(os.path.dirname(os.path.abspath(args.resumo)), exist_ok=True)
+        with open(args.resumo, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+    for r in falhados:
+        print(f"[{r['cenario']}/{r['politica']}/seed={r['seed']}] {r['erro']}", file=sys.stderr)
+
+    return SAIDA_FALHOU if falhados else SAIDA_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
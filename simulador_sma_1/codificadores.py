@@ -0,0 +1,325 @@
+"""
+Codificadores de estado para a Q-table.
+
+O estado por omissão do Agente é (posicao, objetivo, vizinhanca) em coordenadas
+absolutas, por isso a Q-table cresce com a área do mapa e não serve noutro mapa.
+Os codificadores daqui transformam a observação num inteiro em [0, n_estados)
+que só depende da posição *relativa* ao objetivo e dos obstáculos à volta:
+
+    agente = Agente.cria("lab", modo="learn", codificador=CodificadorComposto(
+        CodificadorRelativo(limite=4), CodificadorJanela(raio=1)))
+
+Quando a observação traz a Grelha compilada (ambientes de cenarios.py), os ids
+de todas as células são calculados de uma vez com NumPy e ficam em cache;
+cada passo passa a ser só uma consulta tabela[y][x].
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from grelha import CacheGrelhas
+
+Posicao = Tuple[int, int]
+
+
+class CodificadorEstado(ABC):
+    """Base: subclasses implementam ids_grelha (vetorizado) e codifica_posicao (um estado)."""
+
+    nome = "base"
+    n_estados: int = 0
+
+    # nº de grelhas com a tabela guardada por codificador (LRU)
+    max_grelhas = 8
+
+    def __init__(self):
+        # (grelha, objetivo) -> tabela em listas [y][x]
+        self._cache = CacheGrelhas(maximo=self.max_grelhas)
+
+    @abstractmethod
+    def ids_grelha(self, grelha, objetivo: Optional[Posicao]) -> np.ndarray:
+        """Id do estado de cada célula, array (altura, largura) de inteiros."""
+        pass
+
+    @abstractmethod
+    def codifica_posicao(self, pos: Posicao, objetivo: Optional[Posicao], obstaculos, largura: int, altura: int) -> int:
+        """Id do estado de uma posição, sem grelha compilada."""
+        pass
+
+    def tabela(self, grelha, objetivo: Optional[Posicao]) -> List[List[int]]:
+        return self._cache.obtem(grelha, objetivo, self._tabela_listas)
+
+    def _tabela_listas(self, grelha, objetivo: Optional[Posicao]) -> List[List[int]]:
+        return self.ids_grelha(grelha, objetivo).tolist()
+
+    def codifica(self, obs: Dict[str, Any]) -> int:
+        pos = obs.get("posicao_agente", obs.get("posicao"))
+        objetivos = obs.get("objetivos", [])
+        obj = objetivos[0] if objetivos else None
+
+        grelha = obs.get("grelha")
+        if grelha is not None:
+            return self.tabela(grelha, obj)[pos[1]][pos[0]]
+
+        return self.codifica_posicao(
+            pos, obj, set(obs.get("obstaculos", [])), obs.get("largura", 0), obs.get("altura", 0)
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.nome}, n_estados={self.n_estados})"
+
+
+def _coordenadas(grelha) -> Tuple[np.ndarray, np.ndarray]:
+    ys, xs = np.mgrid[0:grelha.altura, 0:grelha.largura]
+    return xs, ys
+
+
+class CodificadorRelativo(CodificadorEstado):
+    """Deslocamento até ao objetivo (dx, dy), cortado a [-limite, limite] em cada eixo."""
+
+    def __init__(self, limite: int = 4):
+        super().__init__()
+        self.limite = limite
+        self.lado = 2 * limite + 1
+        self.n_estados = self.lado * self.lado
+        self.nome = f"relativo{limite}"
+
+    def _id(self, dx, dy):
+        k = self.limite
+        return (np.clip(dx, -k, k) + k) * self.lado + (np.clip(dy, -k, k) + k)
+
+    def ids_grelha(self, grelha, objetivo):
+        xs, ys = _coordenadas(grelha)
+        if objetivo is None:
+            return np.full(xs.shape, self._id(0, 0), dtype=np.int64)
+        return self._id(objetivo[0] - xs, objetivo[1] - ys).astype(np.int64)
+
+    def codifica_posicao(self, pos, objetivo, obstaculos, largura, altura):
+        if objetivo is None:
+            return int(self._id(0, 0))
+        k = self.limite
+        dx = max(-k, min(k, objetivo[0] - pos[0]))
+        dy = max(-k, min(k, objetivo[1] - pos[1]))
+        return (dx + k) * self.lado + (dy + k)
+
+
+class CodificadorDistancia(CodificadorEstado):
+    """Direção do objetivo (sinal de dx, dy: 9 casos) x distância de Manhattan em intervalos."""
+
+    def __init__(self, limites: Sequence[int] = (1, 2, 4, 8, 16, 32, 64)):
+        super().__init__()
+        self.limites = np.asarray(limites)
+        self._limites_lista = list(limites)
+        self.n_intervalos = len(limites) + 1
+        self.n_estados = 9 * self.n_intervalos
+        self.nome = f"distancia{len(limites)}"
+
+    def ids_grelha(self, grelha, objetivo):
+        xs, ys = _coordenadas(grelha)
+        if objetivo is None:
+            return np.full(xs.shape, 4 * self.n_intervalos, dtype=np.int64)
+        dx, dy = objetivo[0] - xs, objetivo[1] - ys
+        intervalo = np.searchsorted(self.limites, np.abs(dx) + np.abs(dy), side="right")
+        direcao = (np.sign(dx) + 1) * 3 + (np.sign(dy) + 1)
+        return (direcao * self.n_intervalos + intervalo).astype(np.int64)
+
+    def codifica_posicao(self, pos, objetivo, obstaculos, largura, altura):
+        if objetivo is None:
+            return 4 * self.n_intervalos
+        dx, dy = objetivo[0] - pos[0], objetivo[1] - pos[1]
+        dist = abs(dx) + abs(dy)
+        intervalo = sum(1 for lim in self._limites_lista if dist >= lim)
+        direcao = ((dx > 0) - (dx < 0) + 1) * 3 + ((dy > 0) - (dy < 0) + 1)
+        return direcao * self.n_intervalos + intervalo
+
+
+class CodificadorJanela(CodificadorEstado):
+    """
+    Obstáculos numa janela (2*raio+1)^2 à volta do agente como máscara de bits
+    (a célula central não conta). Fora da grelha conta como obstáculo se paredes=True.
+    """
+
+    def __init__(self, raio: int = 1, paredes: bool = True):
+        super().__init__()
+        self.raio = raio
+        self.paredes = paredes
+        self.deslocamentos = [
+            (dx, dy)
+            for dy in range(-raio, raio + 1)
+            for dx in range(-raio, raio + 1)
+            if (dx, dy) != (0, 0)
+        ]
+        self.n_estados = 1 << len(self.deslocamentos)
+        self.nome = f"janela{raio}"
+
+    def ids_grelha(self, grelha, objetivo):
+        r = self.raio
+        ocupado = np.pad(grelha.ocupacao, r, constant_values=self.paredes).astype(np.int64)
+        ids = np.zeros((grelha.altura, grelha.largura), dtype=np.int64)
+        for bit, (dx, dy) in enumerate(self.deslocamentos):
+            ids |= ocupado[r + dy: r + dy + grelha.altura, r + dx: r + dx + grelha.largura] << bit
+        return ids
+
+    def codifica_posicao(self, pos, objetivo, obstaculos, largura, altura):
+        x, y = pos
+        ident = 0
+        for bit, (dx, dy) in enumerate(self.deslocamentos):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < largura and 0 <= ny < altura:
+                ocupado = (nx, ny) in obstaculos
+            else:
+                ocupado = self.paredes
+            if ocupado:
+                ident |= 1 << bit
+        return ident
+
+
+class CodificacaoTiles(CodificadorEstado):
+    """
+    Tile coding do deslocamento relativo (dx, dy): n_tilings grelhas de tiles de lado
+    `tamanho`, cada uma desfasada de tamanho/n_tilings. Para a Q-table usa-se só a
+    primeira tiling (codifica); ativos_grelha devolve os n_tilings índices ativos para
+    aproximadores lineares.
+    """
+
+    def __init__(self, n_tilings: int = 4, tamanho: int = 4, limite: int = 16):
+        super().__init__()
+        self.n_tilings = n_tilings
+        self.tamanho = tamanho
+        self.limite = limite
+        self.tiles_por_eixo = int(math.ceil((2 * limite + 1) / tamanho)) + 1
+        self.n_estados = self.tiles_por_eixo ** 2
+        self.n_atributos = n_tilings * self.n_estados
+        self.nome = f"tiles{n_tilings}x{tamanho}"
+
+    def _tiles(self, dx, dy, tiling):
+        k = self.limite
+        desvio = tiling * self.tamanho // self.n_tilings
+        ix = (np.clip(dx, -k, k) + k + desvio) // self.tamanho
+        iy = (np.clip(dy, -k, k) + k + desvio) // self.tamanho
+        return ix * self.tiles_por_eixo + iy
+
+    def ativos_grelha(self, grelha, objetivo) -> np.ndarray:
+        """Índices ativos (altura, largura, n_tilings), já somados ao offset de cada tiling."""
+        xs, ys = _coordenadas(grelha)
+        dx = objetivo[0] - xs if objetivo is not None else np.zeros_like(xs)
+        dy = objetivo[1] - ys if objetivo is not None else np.zeros_like(ys)
+        return np.stack(
+            [t * self.n_estados + self._tiles(dx, dy, t) for t in range(self.n_tilings)], axis=-1
+        ).astype(np.int64)
+
+    def ids_grelha(self, grelha, objetivo):
+        return self.ativos_grelha(grelha, objetivo)[:, :, 0]
+
+    def codifica_posicao(self, pos, objetivo, obstaculos, largura, altura):
+        if objetivo is None:
+            return int(self._tiles(0, 0, 0))
+        return int(self._tiles(objetivo[0] - pos[0], objetivo[1] - pos[1], 0))
+
+
+class CodificadorComposto(CodificadorEstado):
+    """Produto de vários codificadores (base mista): id = sum(id_i * mult_i)."""
+
+    def __init__(self, *partes: CodificadorEstado):
+        super().__init__()
+        if not partes:
+            raise ValueError("CodificadorComposto precisa de pelo menos um codificador")
+        self.partes = partes
+        self.multiplicadores = []
+        m = 1
+        for p in reversed(partes):
+            self.multiplicadores.insert(0, m)
+            m *= p.n_estados
+        self.n_estados = m
+        self.nome = "+".join(p.nome for p in partes)
+
+    def ids_grelha(self, grelha, objetivo):
+        ids = np.zeros((grelha.altura, grelha.largura), dtype=np.int64)
+        for p, m in zip(self.partes, self.multiplicadores):
+            ids += p.ids_grelha(grelha, objetivo) * m
+        return ids
+
+    def codifica_posicao(self, pos, objetivo, obstaculos, largura, altura):
+        return sum(
+            p.codifica_posicao(pos, objetivo, obstaculos, largura, altura) * m
+            for p, m in zip(self.partes, self.multiplicadores)
+        )
+
+
+CODIFICADORES = {
+    "relativo": lambda: CodificadorRelativo(limite=4),
+    "distancia": lambda: CodificadorDistancia(),
+    "janela": lambda: CodificadorJanela(raio=1),
+    "tiles": lambda: CodificacaoTiles(),
+    "relativo+janela": lambda: CodificadorComposto(CodificadorRelativo(limite=4), CodificadorJanela(raio=1)),
+    "distancia+janela": lambda: CodificadorComposto(CodificadorDistancia(), CodificadorJanela(raio=1)),
+}
+
+
+def cria_codificador(nome: Optional[str]) -> Optional[CodificadorEstado]:
+    """Codificador pelo nome (None ou "absoluto" = estado original do Agente)."""
+    if nome is None or nome == "absoluto":
+        return None
+    if nome not in CODIFICADORES:
+        raise ValueError(f"Codificador desconhecido {nome!r} (disponíveis: absoluto, {', '.join(CODIFICADORES)})")
+    return CODIFICADORES[nome]()
+
+
+# --------------------------------------------------------------
+#   Relatório de tamanho / custo
+# --------------------------------------------------------------
+
+def relatorio_codificadores(grelha, codificadores: Optional[Dict[str, Any]] = None, repeticoes: int = 20000):
+    """
+    Para cada codificador: nº de estados possíveis, estados usados nesta grelha,
+    memória estimada da Q-table (dict de dicts do Agente e array float64) e custo
+    de uma consulta (com e sem Grelha na observação). Inclui o estado absoluto original.
+    """
+    from agente import Agente
+
+    codificadores = codificadores or {nome: f() for nome, f in CODIFICADORES.items()}
+    objetivo = grelha.objetivos[0] if grelha.objetivos else None
+    livres = [(x, y) for y in range(grelha.altura) for x in range(grelha.largura) if (x, y) not in grelha.conjunto_obstaculos]
+    obs_base = {
+        "objetivos": list(grelha.objetivos),
+        "obstaculos": list(grelha.obstaculos),
+        "largura": grelha.largura,
+        "altura": grelha.altura,
+    }
+    # bytes por linha de um dict {acao: float} com 5 entradas + entrada no dict exterior (aprox.)
+    bytes_linha_dict = 360
+
+    def custo(funcao, obs_lista):
+        n = len(obs_lista)
+        t0 = time.perf_counter()
+        for i in range(repeticoes):
+            funcao(obs_lista[i % n])
+        return (time.perf_counter() - t0) / repeticoes * 1e9
+
+    relatorio = {}
+    agente = Agente("medidor")
+    obs_sem = [dict(obs_base, posicao=p) for p in livres[:64]]
+    obs_com = [dict(o, grelha=grelha) for o in obs_sem]
+    relatorio["absoluto"] = {
+        "n_estados": len(livres),
+        "estados_usados": len(livres),
+        "bytes_q_table_dict": len(livres) * bytes_linha_dict,
+        "bytes_q_table_array": len(livres) * len(Agente.ACOES) * 8,
+        "ns_por_consulta": custo(agente._estado_from_obs, obs_sem),
+        "ns_por_consulta_grelha": None,
+    }
+
+    for nome, cod in codificadores.items():
+        ids = cod.ids_grelha(grelha, objetivo)
+        usados = len(np.unique(ids[~grelha.ocupacao]))
+        relatorio[nome] = {
+            "n_estados": int(cod.n_estados),
+            "estados_usados": int(usados),
+            "bytes_q_table_dict": int(usados * bytes_linha_dict),
+            "bytes_q_table_array": int(cod.n_estados * len(Agente.ACOES) * 8),
+            "ns_por_consulta": custo(cod.codifica, obs_sem),
+            "ns_por_consulta_grelha": custo(cod.codifica, obs_com),
+        }
+    return relatorio
@@ -0,0 +1,177 @@
+"""
+Barramento de mensagens entre agentes.
+
+As mensagens enviadas durante um passo ficam pendentes e só são entregues todas de
+uma vez em entrega() (o Simulador chama-a no fim de cada passo), por isso nenhum
+agente vê no mesmo passo o que outro acabou de enviar. Destinos possíveis:
+  - um agente (para=...)
+  - os inscritos num tópico (topico=...)
+  - os agentes a distância de Manhattan <= raio da posição de quem enviou (raio=...)
+  - sem nada disto, todos os inscritos
+
+Limites:
+  - capacidade_envio: mensagens por agente e por passo; acima disso envia() devolve False
+    (o agente deve tentar no passo seguinte) e a mensagem conta como rejeitada;
+  - capacidade_caixa: mensagens entregues por agente e por passo; quando há mais,
+    ficam as mais recentes e as restantes contam como descartadas;
+  - uma mensagem direta a um agente que não está inscrito na altura da entrega também
+    conta como descartada (e em sem_destino).
+"""
+import time
+from collections import defaultdict
+from operator import attrgetter
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Mensagem(NamedTuple):
+    de: Any                 # agente que enviou
+    conteudo: Any
+    topico: Optional[Hashable]
+    passo: int              # passo em que foi enviada
+    instante: float         # time.perf_counter() no envio
+
+
+class BarramentoMensagens:
+    def __init__(self, capacidade_envio: Optional[int] = 16, capacidade_caixa: Optional[int] = 64):
+        self.capacidade_envio = capacidade_envio
+        self.capacidade_caixa = capacidade_caixa
+        self.passo = 0
+
+        self._agentes: Dict[int, Any] = {}                      # id(agente) -> agente, por ordem de inscrição
+        self._topicos: Dict[Hashable, Dict[int, Any]] = defaultdict(dict)
+        self._enviadas_passo: Dict[int, int] = defaultdict(int)
+
+        # pendentes do passo atual
+        self._diretas: List[Tuple[int, Mensagem]] = []                 # (id destino, msg)
+        self._difusoes: List[Tuple[int, Mensagem]] = []                # (id remetente, msg) por tópico ou a todos
+        self._vizinhanca: List[Tuple[int, Tuple[int, int], int, Mensagem]] = []  # (id remetente, origem, raio, msg)
+
+        # estatísticas
+        self.enviadas = 0
+        self.rejeitadas = 0
+        self.entregues = 0
+        self.descartadas = 0
+        self.sem_destino = 0        # diretas a agentes não inscritos (incluídas em descartadas)
+        self.volume_por_passo: List[int] = []
+        self._soma_latencia_s = 0.0
+
+    # ---------- inscrição ----------
+
+    def inscreve(self, agente, topicos: Iterable[Hashable] = ()):
+        """Regista o agente no barramento (e nos tópicos indicados); o agente passa a poder enviar."""
+        self._agentes[id(agente)] = agente
+        for t in topicos:
+            self._topicos[t][id(agente)] = agente
+        agente.barramento = self
+
+    def cancela(self, agente, topico: Optional[Hashable] = None):
+        """Sai de um tópico ou, sem tópico, do barramento."""
+        if topico is not None:
+            self._topicos.get(topico, {}).pop(id(agente), None)
+            return
+        self._agentes.pop(id(agente), None)
+        for inscritos in self._topicos.values():
+            inscritos.pop(id(agente), None)
+        if getattr(agente, "barramento", None) is self:
+            agente.barramento = None
+
+    # ---------- envio ----------
+
+    def envia(self, de_agente, conteudo: Any, topico: Optional[Hashable] = None,
+              raio: Optional[int] = None, para=None) -> bool:
+        """Põe a mensagem na fila do passo; devolve False se o remetente já esgotou a capacidade_envio."""
+        ident = id(de_agente)
+        if self.capacidade_envio is not None and self._enviadas_passo[ident] >= self.capacidade_envio:
+            self.rejeitadas += 1
+            return False
+        self._enviadas_passo[ident] += 1
+        self.enviadas += 1
+
+        msg = Mensagem(de_agente, conteudo, topico, self.passo, time.perf_counter())
+        if para is not None:
+            self._diretas.append((id(para), msg))
+        elif raio is not None:
+            self._vizinhanca.append((ident, tuple(de_agente.posicao), int(raio), msg))
+        else:
+            self._difusoes.append((ident, msg))
+        return True
+
+    # ---------- entrega ----------
+
+    def _destinos_vizinhanca(self, caixas: Dict[int, List[Mensagem]]):
+        """Distribui as mensagens por raio com uma grelha de baldes (lado = raio) por cada raio usado."""
+        por_raio: Dict[int, list] = defaultdict(list)
+        for pendente in self._vizinhanca:
+            por_raio[pendente[2]].append(pendente)
+
+        posicoes = [(ident, tuple(ag.posicao)) for ident, ag in self._agentes.items() if hasattr(ag, "posicao")]
+        for raio, pendentes in por_raio.items():
+            lado = max(raio, 1)
+            baldes: Dict[Tuple[int, int], list] = defaultdict(list)
+            for ident, (x, y) in posicoes:
+                baldes[(x // lado, y // lado)].append((ident, x, y))
+
+            for remetente, (ox, oy), _, msg in pendentes:
+                bx, by = ox // lado, oy // lado
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for ident, x, y in baldes.get((bx + dx, by + dy), ()):
+                            if ident != remetente and abs(x - ox) + abs(y - oy) <= raio:
+                                caixas[ident].append(msg)
+
+    def entrega(self) -> int:
+        """Entrega tudo o que foi enviado neste passo e avança o passo. Devolve o nº de mensagens entregues."""
+        caixas: Dict[int, List[Mensagem]] = defaultdict(list)
+        for destino, msg in self._diretas:
+            if destino in self._agentes:
+                caixas[destino].append(msg)
+            else:
+                self.sem_destino += 1
+                self.descartadas += 1
+        for remetente, msg in self._difusoes:
+            inscritos = self._agentes if msg.topico is None else self._topicos.get(msg.topico, {})
+            for ident in inscritos:
+                if ident != remetente:
+                    caixas[ident].append(msg)
+        if self._vizinhanca:
+            self._destinos_vizinhanca(caixas)
+
+        agora = time.perf_counter()
+        entregues = 0
+        for ident, lote in caixas.items():
+            lote.sort(key=attrgetter("instante"))
+            if self.capacidade_caixa is not None and len(lote) > self.capacidade_caixa:
+                self.descartadas += len(lote) - self.capacidade_caixa
+                lote = lote[-self.capacidade_caixa:]
+
+            agente = self._agentes[ident]
+            recebe = getattr(agente, "recebe_mensagens", None)
+            if recebe is not None:
+                recebe(lote)
+            else:
+                for m in lote:
+                    agente.comunica(m.conteudo, m.de)
+
+            entregues += len(lote)
+            self._soma_latencia_s += sum(agora - m.instante for m in lote)
+
+        self.entregues += entregues
+        self.volume_por_passo.append(entregues)
+        self._diretas, self._difusoes, self._vizinhanca = [], [], []
+        self._enviadas_passo.clear()
+        self.passo += 1
+        return entregues
+
+    # ---------- estatísticas ----------
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "enviadas": self.enviadas,
+            "rejeitadas": self.rejeitadas,
+            "entregues": self.entregues,
+            "descartadas": self.descartadas,
+            "sem_destino": self.sem_destino,
+            "pico_por_passo": max(self.volume_por_passo, default=0),
+            "media_por_passo": self.entregues / max(1, len(self.volume_por_passo)),
+            "latencia_media_s": self._soma_latencia_s / max(1, self.entregues),
+        }
@@ -0,0 +1,130 @@
+from collections import OrderedDict, deque
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+Posicao = Tuple[int, int]
+
+
+def campo_distancias(ocupacao: np.ndarray, fontes: Iterable[Posicao]) -> np.ndarray:
+    """
+    BFS a partir das fontes numa matriz de ocupação [y, x]: nº mínimo de passos até à
+    fonte mais próxima, -1 se for inalcançável ou obstáculo. Fontes fora da matriz são ignoradas.
+    """
+    h, w = ocupacao.shape
+    dist = [-1] * (w * h)
+    livre = (~ocupacao).ravel().tolist()
+    fila = deque()
+    for (x, y) in fontes:
+        if 0 <= x < w and 0 <= y < h and livre[y * w + x]:
+            dist[y * w + x] = 0
+            fila.append(y * w + x)
+
+    # BFS em índices planos (i = y * largura + x)
+    while fila:
+        i = fila.popleft()
+        d = dist[i] + 1
+        x = i % w
+        for j, valido in ((i - w, i >= w), (i + w, i < w * (h - 1)), (i - 1, x > 0), (i + 1, x < w - 1)):
+            if valido and livre[j] and dist[j] < 0:
+                dist[j] = d
+                fila.append(j)
+
+    return np.asarray(dist, dtype=np.int32).reshape(h, w)
+
+
+class Grelha:
+    """
+    Mapa compilado e imutável: dimensões, objetivos, obstáculos, matriz de ocupação
+    e campo de distâncias (BFS a partir dos objetivos). É partilhado entre todos os
+    Ambiente criados com Ambiente.a_partir_de_grelha, por isso nada aqui pode ser alterado.
+
+    As matrizes são indexadas [y, x] (linha = y), como a grelha é desenhada.
+    """
+
+    __slots__ = ("largura", "altura", "objetivos", "obstaculos", "conjunto_obstaculos", "ocupacao", "distancias")
+
+    def __init__(self, largura: int, altura: int, objetivos: Iterable[Posicao], obstaculos: Iterable[Posicao]):
+        self.largura = largura
+        self.altura = altura
+        # dict.fromkeys tira repetidos mantendo a ordem de inserção
+        self.objetivos: Tuple[Posicao, ...] = tuple(dict.fromkeys(tuple(p) for p in objetivos))
+        self.obstaculos: Tuple[Posicao, ...] = tuple(dict.fromkeys(tuple(p) for p in obstaculos))
+        self.conjunto_obstaculos = frozenset(self.obstaculos)
+
+        ocupacao = np.zeros((altura, largura), dtype=bool)
+        if self.obstaculos:
+            xs, ys = zip(*self.obstaculos)
+            ocupacao[np.asarray(ys), np.asarray(xs)] = True
+        ocupacao.flags.writeable = False
+        self.ocupacao = ocupacao
+
+        self.distancias = self._campo_distancias()
+
+    def __setattr__(self, nome, valor):
+        if hasattr(self, nome):
+            raise AttributeError(f"Grelha é imutável ({nome})")
+        object.__setattr__(self, nome, valor)
+
+    def __repr__(self):
+        return f"Grelha({self.largura}x{self.altura}, {len(self.objetivos)} objetivos, {len(self.obstaculos)} obstáculos)"
+
+    def _campo_distancias(self) -> np.ndarray:
+        """Nº mínimo de passos até ao objetivo mais próximo; -1 se for inalcançável ou obstáculo."""
+        campo = campo_distancias(self.ocupacao, self.objetivos)
+        campo.flags.writeable = False
+        return campo
+
+    # ---------- consultas ----------
+
+    def dentro(self, pos: Posicao) -> bool:
+        return 0 <= pos[0] < self.largura and 0 <= pos[1] < self.altura
+
+    def livre(self, pos: Posicao) -> bool:
+        return self.dentro(pos) and pos not in self.conjunto_obstaculos
+
+    def distancia(self, pos: Posicao) -> Optional[int]:
+        """Distância (em passos, contornando obstáculos) ao objetivo mais próximo."""
+        d = int(self.distancias[pos[1], pos[0]])
+        return d if d >= 0 else None
+
+    def existe_caminho(self, inicio: Posicao) -> bool:
+        return self.dentro(inicio) and self.distancias[inicio[1], inicio[0]] >= 0
+
+
+class CacheGrelhas:
+    """
+    LRU pequena de valores calculados por (grelha, objetivo). A chave guarda a própria
+    grelha e não id(grelha): um id reaproveitado depois de a grelha ser recolhida daria o
+    valor de outra grelha. Com maximo entradas a memória fica limitada.
+    """
+
+    __slots__ = ("maximo", "_entradas", "_ultima")
+
+    def __init__(self, maximo: int = 8):
+        self.maximo = maximo
+        self._entradas: "OrderedDict[Tuple[Any, Optional[Posicao]], Any]" = OrderedDict()
+        # (grelha, objetivo, valor) do último pedido: o caso comum (passos seguidos na mesma grelha)
+        self._ultima: Tuple[Any, Any, Any] = (None, None, None)
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obtem(self, grelha, objetivo: Optional[Posicao], calcula: Callable[[Any, Optional[Posicao]], Any]):
+        ultima = self._ultima
+        if ultima[0] is grelha and ultima[1] == objetivo:
+            return ultima[2]
+        chave = (grelha, objetivo)
+        valor = self._entradas.get(chave)
+        if valor is None:
+            valor = self._entradas[chave] = calcula(grelha, objetivo)
+            if len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        else:
+            self._entradas.move_to_end(chave)
+        self._ultima = (grelha, objetivo, valor)
+        return valor
+
+    def limpa(self):
+        self._entradas.clear()
+        self._ultima = (None, None, None)
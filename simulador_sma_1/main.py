@@ -1,17 +1,30 @@
 import os
 import csv
+import contextlib
 import time
-import random
-
-import matplotlib.pyplot as plt
+from typing import Dict, Optional
 
+from aleatorio import fluxos
 from ambiente import Ambiente
 from agente import Agente
+from cenarios import (
+    CENARIO_FAROL,
+    CENARIO_LABIRINTO,
+    MAPA_LAB_10x10,
+    constroi_ambiente,
+    gera_obstaculos_labirinto,
+    normaliza_cenario,
+)
 from sensor import SensorPosicao
-from simulador import Simulador
-from visualizador import VisualizadorPygame
+from codificadores import cria_codificador
+from modelagem import PenalizacaoRevisitas
+from motor import motor_experiencia
 from collections import deque
 
+# matplotlib e pygame só são importados quando são mesmo precisos
+# (visualizar=True ou mostrar_curva_aprendizagem), assim os processos
+# de treino sem interface arrancam mais depressa
+
 
 # --------------------------------------------------------------
 #   Ciclo principal de episódios + métricas
@@ -24,104 +37,65 @@ def executar_experiencia(
     passos_por_episodio: int = 10,
     visualizar: bool = False,
     penalizar_revisitas: bool = False,
+    verboso: bool = True,
+    gravador=None,
+    perfil=None,
 ):
-
+    """
+    penalizar_revisitas: liga uma modelagem.PenalizacaoRevisitas no ambiente durante a experiência
+    (se ainda não tiver uma); outros termos podem ser ligados com ambiente.adicionaModelagem.
+    gravador: trajetorias.GravadorTrajetorias opcional onde fica cada transição (para reproduzir depois).
+    perfil: perfil_memoria.PerfilMemoria opcional, medido no fim de cada episódio.
+    """
+    termo_revisitas = None
+    if penalizar_revisitas and not any(isinstance(t, PenalizacaoRevisitas) for t in ambiente.modelagem):
+        termo_revisitas = PenalizacaoRevisitas(coeficiente=0.06)
+        ambiente.adicionaModelagem(termo_revisitas)
+    try:
+        return _ciclo_episodios(
+            ambiente, agentes, episodios, passos_por_episodio, visualizar, verboso, gravador, perfil
+        )
+    finally:
+        if termo_revisitas is not None:
+            ambiente.removeModelagem(termo_revisitas)
+
+
+def _ciclo_episodios(ambiente, agentes, episodios, passos_por_episodio, visualizar, verboso, gravador, perfil=None):
+    # o ciclo está em motor.py (o mesmo do Simulador); aqui só se juntam os ganchos da experiência
+    motor = motor_experiencia(ambiente, agentes, treino=True, gravador=gravador)
     historico = []
-    sim = Simulador.cria(ambiente, agentes)
 
-    visualizador = None
+    if verboso:
+        motor.ganchos["inicio_episodio"].insert(0, lambda m: print(f"\nEpisódio {m.episodio + 1}/{episodios}"))
+
     if visualizar:
+        from visualizador import VisualizadorPygame
         visualizador = VisualizadorPygame(ambiente, agentes)
 
-    for ep in range(episodios):
-        print(f"\nEpisódio {ep + 1}/{episodios}")
+        def desenha(m):
+            visualizador.atualizar(fps=120)
+            time.sleep(0.002)
 
-        # reset ao ambiente e posições iniciais
-        ambiente.reset()
-        # objetivo principal (usamos o primeiro)
-        objetivo_principal = ambiente.objetivos[0] if ambiente.objetivos else None
+        motor.adiciona("desenha", desenha)
 
-        # reset aos agentes
-        for ag in agentes:
-            ag.reset_recompensa()
-            ag.historico_passos = []
-            ag.historico_distancias = []
-            ag.historico_colisoes = 0
-            ag.historico_decisoes_erradas = 0
-            ag.tempo_inicio_ep = time.time()
-            ag.tempo_fim_ep = None
-            ag.last_state = None
-            ag.last_action = None
-            if penalizar_revisitas:
-                ag._visit_count = {}
-
-        terminou_global = False
-
-        for passo in range(passos_por_episodio):
-            for ag in agentes:
-                # 1) Observação
-                if ag.sensor is not None:
-                    obs = ag.sensor.ler(ambiente, ag)
-                else:
-                    obs = ambiente.observacaoPara(ag)
-
-                pos_antiga = getattr(ag, "posicao", None)
-
-                # 2) Escolha da ação
-                acao = ag.age(obs)
-
-                # 3) Ação no ambiente
-                recompensa, terminou = ambiente.agir(acao, ag)
-                # --- penalização por revisitar posições (só labirinto)
-                if penalizar_revisitas:
-                    pos_atual = getattr(ag, "posicao", None)
-                    if pos_atual is not None:
-                        vc = ag._visit_count
-                        vc[pos_atual] = vc.get(pos_atual, 0) + 1
-
-                        repeticoes = vc[pos_atual] - 1
-                        if repeticoes > 0:
-                            pen = 0.06 * (repeticoes ** 2)
-                           # if pen > 0.5:
-                            #    pen = 0.5
-                            recompensa -= pen
-                # -----------
-
-                # 4) Atualizar recompensa
-                ag.avaliacaoEstadoAtual(recompensa)
-
-                # 5) Nova observação para update da Q-table
-                next_obs = ambiente.observacaoPara(ag)
-                ag.update_transition(next_obs, recompensa, terminou)
-
-                # 6) Registo de passos / distâncias / colisões
-                pos_nova = getattr(ag, "posicao", None)
-                ag.regista_passos(acao, pos_antiga, pos_nova, objetivo_principal)
-
-                if terminou:
-                    terminou_global = True
-
-            # atualização de ambiente (se tiver dinâmica, ainda não)
-            ambiente.atualizacao()
-
-            if visualizar and visualizador is not None:
-                visualizador.atualizar(fps=120)
-                time.sleep(0.002)
-
-            if terminou_global:
-                print(f"  Episódio terminou no passo {passo + 1}")
-                break
-
-        # fim do episódio > métricas por agente
+    # fim do episódio > métricas por agente
+    def metricas_episodio(m):
+        if verboso and m.terminou:
+            print(f"  Episódio terminou no passo {m.passos_executados}")
         metricas_ep = {}
         for ag in agentes:
             ag.tempo_fim_ep = time.time()
-            metricas = ag.calculo_metricas(objetivo_principal)
+            metricas = ag.calculo_metricas(m.objetivo)
             metricas_ep[ag.nome] = metricas
-            print(f"[Ep {ep + 1}] Métricas {ag.nome}: {metricas}")
-
+            if verboso:
+                print(f"[Ep {m.episodio + 1}] Métricas {ag.nome}: {metricas}")
         historico.append(metricas_ep)
 
+    motor.adiciona("fim_episodio", metricas_episodio)
+    if perfil is not None:
+        # depois das métricas, para o histórico do episódio já contar
+        perfil.liga(motor, historico)
+    motor.corre(episodios, passos_por_episodio)
     return historico
 
 
@@ -129,18 +103,44 @@ def executar_experiencia(
 #   Gráficos e CSV
 # --------------------------------------------------------------
 
+def guardar_historico_csv(historico, csv_path: str):
+    """CSV: linha por agente / episódio."""
+    with open(csv_path, "w", newline="") as f:
+        # assumimos que há pelo menos um episódio e um agente
+        primeiro_ep = historico[0]
+        primeiro_agente_nome = list(primeiro_ep.keys())[0]
+        fieldnames = ["episodio", "agente"] + list(primeiro_ep[primeiro_agente_nome].keys())
+
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for i, ep in enumerate(historico, start=1):
+            for nome_agente, mets in ep.items():
+                row = {"episodio": i, "agente": nome_agente}
+                row.update(mets)
+                writer.writerow(row)
+
+
 def mostrar_curva_aprendizagem(
     historico,
     titulo: str,
     ficheiro_prefix: str,
     agente_nome: str,
+    pasta: str = "resultados",
+    verboso: bool = True,
 ):
-    os.makedirs("resultados", exist_ok=True)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from metricas import RegistoMetricas
 
-    # assumimos um agente (ou escolhemos pelo nome)
-    medias = [ep[agente_nome]["media_recompensa_por_passo"] for ep in historico]
-    sucessos = [ep[agente_nome]["taxa_sucesso"] for ep in historico]
-    episodios = list(range(1, len(historico) + 1))
+    os.makedirs(pasta, exist_ok=True)
+
+    # séries em colunas NumPy (ver metricas.py), escolhidas pelo nome do agente
+    registo = RegistoMetricas.a_partir_de_historico(historico)
+    medias = registo.serie("media_recompensa_por_passo", agente_nome)
+    sucessos = registo.serie("taxa_sucesso", agente_nome)
+    episodios = range(1, registo.n_episodios + 1)
 
     plt.figure(figsize=(8, 4))
     plt.plot(episodios, medias, marker="o", label="Recompensa média por passo")
@@ -151,28 +151,15 @@ def mostrar_curva_aprendizagem(
     plt.legend()
     plt.grid(True)
 
-    png_path = os.path.join("resultados", f"{ficheiro_prefix}_curva.png")
+    png_path = os.path.join(pasta, f"{ficheiro_prefix}_curva.png")
     plt.savefig(png_path)
     plt.close()
 
-    # CSV: linha por agente / episódio
-    csv_path = os.path.join("resultados", f"{ficheiro_prefix}_historico.csv")
-    with open(csv_path, "w", newline="") as f:
-        # assumimos que há pelo menos um episódio e um agente
-        primeiro_ep = historico[0]
-        primeiro_agente_nome = list(primeiro_ep.keys())[0]
-        fieldnames = ["episodio", "agente"] + list(primeiro_ep[primeiro_agente_nome].keys())
+    csv_path = os.path.join(pasta, f"{ficheiro_prefix}_historico.csv")
+    guardar_historico_csv(historico, csv_path)
 
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for i, ep in enumerate(historico, start=1):
-            for nome_agente, mets in ep.items():
-                row = {"episodio": i, "agente": nome_agente}
-                row.update(mets)
-                writer.writerow(row)
-
-    print(f"Gráfico e CSV guardados em: {png_path}, {csv_path}")
+    if verboso:
+        print(f"Gráfico e CSV guardados em: {png_path}, {csv_path}")
 
 
 # --------------------------------------------------------------
@@ -204,185 +191,219 @@ def existe_caminho(largura, altura, inicio, objetivo, obstaculos):
                 fila.append(pos)
     return False
 
-def gerar_labirinto_valido(ambiente, inicio=(0,0)):
-    largura = ambiente.largura
-    altura = ambiente.altura
-    objetivo = ambiente.objetivos[0]
-
-    vizinhos_inicio = {
-        inicio,
-        (inicio[0] + 1, inicio[1]),
-        (inicio[0] - 1, inicio[1]),
-        (inicio[0], inicio[1] + 1),
-        (inicio[0], inicio[1] - 1),
-    }
-
-    while True:
-        obstaculos = set()
-        n_obs = random.randint(3, 6)
-
-        while len(obstaculos) < n_obs:
-            pos = (
-                random.randint(0, largura-1),
-                random.randint(0, altura-1),
-            )
-            if (pos not in vizinhos_inicio and pos != objetivo
-            ):
-                obstaculos.add(pos)
-
-        if existe_caminho(
-            largura, altura, inicio, objetivo, obstaculos
-        ):
-            ambiente.obstaculos.clear()
-            for o in obstaculos:
-                ambiente.adicionaObstaculo(o)
-            return
-
-
-def experiencia_farol(tipo_politica="qlearning"):
-    print("=== Experiência Farol ===")
-
-    W, H = 10, 10   # <<< define aqui o tamanho
-
-    ambiente = Ambiente(W, H, max_passos=30)
-    ambiente.adicionaObjetivo((W-1, H-1))
+def gerar_labirinto_valido(ambiente, inicio=(0,0), rng=None):
+    # por omissão usa o fluxo aleatório do próprio ambiente
+    obstaculos = gera_obstaculos_labirinto(
+        ambiente.largura, ambiente.altura, ambiente.objetivos[0], inicio, rng=rng if rng is not None else ambiente.rng
+    )
+    ambiente.limpaObstaculos()
+    for o in obstaculos:
+        ambiente.adicionaObstaculo(o)
 
-    # obstáculos
-    ambiente.adicionaObstaculo((2, 2))
-    ambiente.adicionaObstaculo((2, 3))
-    ambiente.adicionaObstaculo((3, 2))
-    ambiente.adicionaObstaculo((3, 4))
-    ambiente.adicionaObstaculo((7, 6))
-    ambiente.adicionaObstaculo((8, 6))
-    ambiente.adicionaObstaculo((7, 7))
-    ambiente.adicionaObstaculo((8, 3))
-    ambiente.adicionaObstaculo((4, 8))
 
+def _gravador(base: Optional[str]):
+    if base is None:
+        return contextlib.nullcontext()
+    from trajetorias import GravadorTrajetorias
+    return GravadorTrajetorias(base)
 
 
+def _perfil(base: Optional[str]):
+    if base is None:
+        return contextlib.nullcontext()
+    from perfil_memoria import PerfilMemoria
+    return PerfilMemoria(base)
 
 
-    # treino
-    agente = Agente.cria("farol", modo="learn", tipo_politica=tipo_politica)
-    agente.q_table = {}
+def treinar_cenario(
+    cenario,
+    tipo_politica: str = "qlearning",
+    ficheiro_q_table: Optional[str] = None,
+    prefixo: Optional[str] = None,
+    titulo: Optional[str] = None,
+    pasta: str = "resultados",
+    visualizar: bool = False,
+    verboso: bool = True,
+    graficos: bool = True,
+    codificador: Optional[str] = None,
+    seed=None,
+    trajetorias: Optional[str] = None,
+    hiperparametros: Optional[Dict[str, float]] = None,
+    cache=None,
+    perfil_memoria: Optional[str] = None,
+):
+    """
+    Fase de treino de um cenário (ver cenarios.py). Devolve (agente, historico).
+    Com seed, ambiente e agente recebem fluxos aleatórios independentes dela e o treino repete-se igual.
+    trajetorias: base dos ficheiros de trajetórias (ver trajetorias.py), se for para gravar.
+    hiperparametros: alpha, gamma, epsilon, decaimento_epsilon e/ou q_inicial para Agente.cria (ver afinacao.py).
+    cache: cache_execucoes.CacheExecucoes (ou pasta); com seed, um treino igual já feito não se repete
+    (a Q-table e o histórico vêm da cache). Ignorada com visualizar, trajetorias ou perfil_memoria.
+    perfil_memoria: base dos ficheiros do perfil de memória por episódio (ver perfil_memoria.py).
+    """
+    rng_ambiente, rng_agente = fluxos(seed, 2)
+    ambiente = constroi_ambiente(cenario, "treino", rng=rng_ambiente)
+
+    agente = Agente.cria(
+        cenario["nome"],
+        modo="learn",
+        tipo_politica=tipo_politica,
+        codificador=cria_codificador(codificador),
+        rng=rng_agente,
+        **(hiperparametros or {}),
+    )
     agente.instala(SensorPosicao())
-    ambiente.adicionaAgente(agente, (0, 0))
+    ambiente.adicionaAgente(agente, cenario["inicio"])
+
+    chave = entrada = None
+    if cache is not None and seed is not None and not visualizar and trajetorias is None and perfil_memoria is None:
+        from cache_execucoes import CacheExecucoes, chave_execucao
+
+        cache = CacheExecucoes(cache) if isinstance(cache, str) else cache
+        chave = chave_execucao(cenario, tipo_politica, seed, codificador, hiperparametros)
+        entrada = cache.obtem(chave)
+
+    fase = cenario["treino"]
+    if entrada is not None:
+        if verboso:
+            print(f"Treino de {cenario['nome']} (seed {seed}) lido da cache: {entrada.pasta}")
+        agente.carregar_q_table(entrada.ficheiro_q_table())
+        if entrada.meta.get("epsilon") is not None:
+            agente.epsilon = entrada.meta["epsilon"]
+        historico = entrada.historico()
+    else:
+        with _gravador(trajetorias) as gravador, _perfil(perfil_memoria) as perfil:
+            historico = executar_experiencia(
+                ambiente,
+                [agente],
+                episodios=fase["episodios"],
+                passos_por_episodio=fase["passos_por_episodio"],
+                visualizar=visualizar,
+                penalizar_revisitas=fase["penalizar_revisitas"],
+                verboso=verboso,
+                gravador=gravador,
+                perfil=perfil,
+            )
+        if chave is not None:
+            cache.guarda(
+                chave,
+                agente,
+                historico,
+                {"cenario": cenario["nome"], "politica": tipo_politica, "seed": seed,
+                 "codificador": codificador, "hiperparametros": hiperparametros or {}},
+            )
 
-    historico = executar_experiencia(
-        ambiente, [agente],
-        episodios=45,
-        passos_por_episodio=24,
-        visualizar=False
+    if ficheiro_q_table is not None:
+        agente.guardar_q_table(ficheiro_q_table)
+
+    if prefixo is not None:
+        if graficos:
+            titulo = titulo or f"{cenario['nome']} - Aprendizagem ({tipo_politica})"
+            mostrar_curva_aprendizagem(historico, titulo, prefixo, agente.nome, pasta=pasta, verboso=verboso)
+        else:
+            os.makedirs(pasta, exist_ok=True)
+            guardar_historico_csv(historico, os.path.join(pasta, f"{prefixo}_historico.csv"))
+
+    return agente, historico
+
+
+def testar_cenario(
+    cenario,
+    tipo_politica: str = "qlearning",
+    ficheiro_q_table: Optional[str] = None,
+    visualizar: bool = True,
+    verboso: bool = True,
+    codificador: Optional[str] = None,
+    seed=None,
+    trajetorias: Optional[str] = None,
+):
+    """Fase de teste (sem exploração) de um cenário com uma Q-table guardada. trajetorias como em treinar_cenario."""
+    rng_ambiente, rng_agente = fluxos(seed, 2)
+    agente_teste = Agente.cria(
+        cenario["nome"],
+        modo="test",
+        tipo_politica=tipo_politica,
+        codificador=cria_codificador(codificador),
+        rng=rng_agente,
     )
+    if ficheiro_q_table is not None:
+        agente_teste.carregar_q_table(ficheiro_q_table)
+    agente_teste.instala(SensorPosicao())
 
-    # só guarda Q-table se for Q-learning1
-    if tipo_politica == "qlearning":
-        agente.guardar_q_table("qtable_farol.pkl")
+    ambiente_teste = constroi_ambiente(cenario, "teste", rng=rng_ambiente)
+    ambiente_teste.adicionaAgente(agente_teste, cenario["inicio"])
 
-    # prefixo diferente para não sobrescrever ficheiros
-    prefix = "farol_qlearning" if tipo_politica == "qlearning" else "farol_fixa"
-    mostrar_curva_aprendizagem(historico, f"Farol - Aprendizagem ({tipo_politica})", prefix, agente.nome)
+    fase = cenario["teste"]
+    with _gravador(trajetorias) as gravador:
+        return executar_experiencia(
+            ambiente_teste,
+            [agente_teste],
+            episodios=fase["episodios"],
+            passos_por_episodio=fase["passos_por_episodio"],
+            visualizar=visualizar,
+            penalizar_revisitas=fase["penalizar_revisitas"],
+            verboso=verboso,
+            gravador=gravador,
+        )
 
-    # teste
-    agente_teste = Agente.cria("farol", modo="test", tipo_politica=tipo_politica)
-    if tipo_politica == "qlearning":
-        agente_teste.carregar_q_table("qtable_farol.pkl")
-    agente_teste.instala(SensorPosicao())
-    ambiente_teste = Ambiente(W, H, max_passos=30)
-    ambiente_teste.adicionaObjetivo((W-1, H-1))
-    ambiente_teste.adicionaObstaculo((2, 2))
-    ambiente_teste.adicionaObstaculo((2, 3))
-    ambiente_teste.adicionaObstaculo((3, 2))
-    ambiente_teste.adicionaObstaculo((3, 4))
-    ambiente_teste.adicionaObstaculo((7, 6))
-    ambiente_teste.adicionaObstaculo((8, 6))
-    ambiente_teste.adicionaObstaculo((7, 7))
-    ambiente_teste.adicionaObstaculo((8, 3))
-    ambiente_teste.adicionaObstaculo((4, 8))
 
+def experiencia_farol(tipo_politica="qlearning", cenario=None, seed=None, cache=None):
+    print("=== Experiência Farol ===")
 
-    ambiente_teste.adicionaAgente(agente_teste, (0, 0))
+    # tamanho, obstáculos e nº de episódios estão em cenarios.CENARIO_FAROL
+    cenario = cenario or normaliza_cenario(CENARIO_FAROL)
+
+    # só guarda Q-table se for Q-learning (pesos se for aproximação linear)
+    ficheiro_q = {"qlearning": "qtable_farol.pkl", "linear": "pesos_farol_linear.npy"}.get(tipo_politica)
+    # prefixo diferente para não sobrescrever ficheiros
+    prefix = f"farol_{tipo_politica}"
+
+    treinar_cenario(
+        cenario,
+        tipo_politica,
+        ficheiro_q_table=ficheiro_q,
+        prefixo=prefix,
+        titulo=f"Farol - Aprendizagem ({tipo_politica})",
+        visualizar=False,
+        seed=seed,
+        cache=cache,
+    )
 
     print("\n=== Fase de teste (Farol) ===")
-    executar_experiencia(ambiente_teste, [agente_teste], episodios=13, passos_por_episodio=30, visualizar=True)
-
-MAPA_LAB_10x10 = [
-    (2, 0), (4, 0), (7, 0), (8, 0), (9, 0),
-    (6, 1),
-    (0, 2), (1, 2), (2, 2), (5, 2), (8, 2),
-    (4, 3), (7, 3),
-    (1, 4), (2, 4), (4, 4), (5, 4), (8, 4),
-    (4, 5), (8, 5),
-    (2, 6), (3, 6), (6, 6), (7, 6), (8, 6),
-    (5, 7),
-    (1, 8), (2, 8), (3, 8), (4, 8), (7, 8), (8, 8), (9, 8),
-    (3, 9),
-]
+    testar_cenario(cenario, tipo_politica, ficheiro_q_table=ficheiro_q, visualizar=True)
+
 
 MAPAS_LABIRINTO = [MAPA_LAB_10x10]
 # MAPA2 (placeholder) — quando quiseres, adicionas aqui outro mapa na lista acima
 
 
-def aplicar_mapa_labirinto(ambiente: Ambiente):
-    ambiente.obstaculos.clear()
-    mapa = random.choice(MAPAS_LABIRINTO)
+def aplicar_mapa_labirinto(ambiente: Ambiente, rng=None):
+    ambiente.limpaObstaculos()
+    mapa = (rng if rng is not None else ambiente.rng).choice(MAPAS_LABIRINTO)
     for pos in mapa:
         ambiente.adicionaObstaculo(pos)
 
 
-
-def experiencia_labirinto(tipo_politica: str):
+def experiencia_labirinto(tipo_politica: str, cenario=None):
     print("=== Experiência Labirinto ===")
 
+    # tamanho, mapas e nº de episódios estão em cenarios.CENARIO_LABIRINTO
+    cenario = cenario or normaliza_cenario(CENARIO_LABIRINTO)
 
-    W, H = 10, 10  # <<< define aqui o tamanho
-
-    ambiente = Ambiente(W, H, max_passos=1000)
-    ambiente.adicionaObjetivo((W - 1, H - 1))
-
-    aplicar_mapa_labirinto(ambiente)
-
-    agente = Agente.cria("labirinto", modo="learn", tipo_politica=tipo_politica)
-    agente.q_table = {}
-    agente.last_state = None
-    agente.last_action = None
-    agente.instala(SensorPosicao())
-    ambiente.adicionaAgente(agente, (0, 0))
+    ficheiro_q = "pesos_labirinto_linear.npy" if tipo_politica == "linear" else "qtable_labirinto.pkl"
 
     #Treino
-    historico = executar_experiencia(
-        ambiente,
-        [agente],
-        episodios=35,
-        passos_por_episodio=400,
+    treinar_cenario(
+        cenario,
+        tipo_politica,
+        ficheiro_q_table=ficheiro_q,
+        prefixo="labirinto",
+        titulo="Labirinto - Aprendizagem",
         visualizar=True,
-        penalizar_revisitas=True,
     )
 
-    mostrar_curva_aprendizagem(
-        historico, "Labirinto - Aprendizagem", "labirinto", agente.nome
-    )
-
-    agente.guardar_q_table("qtable_labirinto.pkl")
-
-    agente_teste = Agente.cria("labirinto", modo="test", tipo_politica=tipo_politica)
-    agente_teste.carregar_q_table("qtable_labirinto.pkl")
-    agente_teste.instala(SensorPosicao())
-    ambiente_teste = Ambiente(W, H, max_passos=100)
-    ambiente_teste.adicionaObjetivo((W - 1, H - 1))
-    aplicar_mapa_labirinto(ambiente_teste)
-
-    ambiente_teste.adicionaAgente(agente_teste, (0, 0))
-
     print("\n=== Fase de teste (Labirinto) ===")
-    executar_experiencia(
-        ambiente_teste,
-        [agente_teste],
-        episodios=5,
-        passos_por_episodio=40,
-        visualizar=True,
-        penalizar_revisitas=True,
-    )
+    testar_cenario(cenario, tipo_politica, ficheiro_q_table=ficheiro_q, visualizar=True)
 
 
 # --------------------------------------------------------------
@@ -400,9 +421,10 @@ def main():
     print("Tipo de politica:")
     print("1 - Politica fixa")
     print("2 - Q-learning")
+    print("3 - Q-learning com aproximação linear")
     politica = input("Escolha a política")
 
-    tipo_politica = "fixa" if politica == "1" else "qlearning"
+    tipo_politica = {"1": "fixa", "3": "linear"}.get(politica, "qlearning")
 
     if escolha == "1":
         experiencia_farol(tipo_politica)
@@ -414,4 +436,10 @@ def main():
 
 
 if __name__ == "__main__":
+    import sys
+
+    # com argumentos corre a CLI não interativa (ver cli.py), sem argumentos o menu
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
     main()
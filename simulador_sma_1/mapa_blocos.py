@@ -0,0 +1,332 @@
+"""
+Mapas grandes (ex.: 10000 x 10000) guardados por blocos.
+
+A ocupação é um bit por célula, em blocos lado_bloco x lado_bloco num ficheiro
+mapeado em memória (np.memmap); blocos vazios nunca são lidos e, num ficheiro
+novo, nem ocupam disco (ficheiro esparso). Os blocos consultados são desempacotados
+para uma cache LRU, tal como os campos de distância calculados por região. A cache
+tem um orçamento de memória (orcamento_bytes) e descarta primeiro o que foi usado há mais tempo.
+
+MapaBlocos comporta-se como o conjunto de obstáculos do Ambiente ("in", add, clear,
+len, iter), por isso Ambiente.a_partir_de_mapa usa-o diretamente em agir.
+"""
+import json
+import math
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from grelha import campo_distancias
+
+Posicao = Tuple[int, int]
+
+# np.bitwise_count só existe a partir do NumPy 2.0; antes, tabela com os bits de cada byte
+_BITS_POR_BYTE = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+
+
+def _conta_bits(a: np.ndarray) -> np.ndarray:
+    """Nº de bits a 1 em cada byte de a (uint8), sem desempacotar."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a)
+    return _BITS_POR_BYTE[a]
+
+
+class MapaBlocos:
+    def __init__(
+        self,
+        largura: int,
+        altura: int,
+        ficheiro: Optional[str] = None,
+        lado_bloco: int = 256,
+        orcamento_bytes: int = 64 * 2**20,
+        objetivos: Iterable[Posicao] = (),
+    ):
+        """Mapa vazio; com ficheiro, os bits ficam nesse ficheiro (e em ficheiro.json as dimensões)."""
+        if lado_bloco % 8:
+            raise ValueError("lado_bloco tem de ser múltiplo de 8")
+        self.largura = largura
+        self.altura = altura
+        self.lado = lado_bloco
+        self.orcamento_bytes = orcamento_bytes
+        self.objetivos: List[Posicao] = [tuple(p) for p in objetivos]
+        self.nbx = math.ceil(largura / lado_bloco)
+        self.nby = math.ceil(altura / lado_bloco)
+        forma = (self.nby, self.nbx, lado_bloco, lado_bloco // 8)
+
+        self._temporario = None
+        if ficheiro is None:
+            self._temporario = tempfile.NamedTemporaryFile(prefix="mapa_", suffix=".bits")
+            ficheiro = self._temporario.name
+        self.ficheiro = ficheiro
+
+        if os.path.exists(ficheiro) and os.path.getsize(ficheiro) == int(np.prod(forma)):
+            self._bits = np.memmap(ficheiro, dtype=np.uint8, mode="r+", shape=forma)
+            # nº de obstáculos por bloco: uma passagem pelo ficheiro, sem desempacotar
+            self.contagem = _conta_bits(self._bits).sum(axis=(2, 3), dtype=np.int64)
+        else:
+            self._bits = np.memmap(ficheiro, dtype=np.uint8, mode="w+", shape=forma)
+            self.contagem = np.zeros((self.nby, self.nbx), dtype=np.int64)
+
+        self._vazio = np.zeros((lado_bloco, lado_bloco), dtype=bool)
+        self._vazio.flags.writeable = False
+
+        # cache LRU partilhada por blocos ("b", by, bx) e campos de distância ("d", ...)
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self.bytes_cache = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    @classmethod
+    def abre(cls, ficheiro: str, orcamento_bytes: int = 64 * 2**20) -> "MapaBlocos":
+        with open(ficheiro + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            meta["largura"], meta["altura"], ficheiro, meta["lado_bloco"], orcamento_bytes, meta.get("objetivos", ())
+        )
+
+    def guarda(self):
+        """Escreve os bits pendentes e as dimensões (ficheiro.json) para abre() os ler."""
+        self._bits.flush()
+        if self._temporario is None:
+            with open(self.ficheiro + ".json", "w", encoding="utf-8") as f:
+                json.dump(
+                    {"largura": self.largura, "altura": self.altura, "lado_bloco": self.lado,
+                     "objetivos": [list(p) for p in self.objetivos]},
+                    f,
+                )
+
+    def __repr__(self):
+        return (f"MapaBlocos({self.largura}x{self.altura}, blocos {self.lado}, {len(self)} obstáculos, "
+                f"cache {self.bytes_cache / 2**20:.1f}/{self.orcamento_bytes / 2**20:.1f} MiB)")
+
+    # ---------- cache ----------
+
+    def _guarda_cache(self, chave: tuple, valor: np.ndarray):
+        valor.flags.writeable = False
+        self._cache[chave] = valor
+        self.bytes_cache += valor.nbytes
+        while self.bytes_cache > self.orcamento_bytes and len(self._cache) > 1:
+            _, velho = self._cache.popitem(last=False)
+            self.bytes_cache -= velho.nbytes
+            self.descartes += 1
+
+    def _esquece(self, chave: tuple):
+        velho = self._cache.pop(chave, None)
+        if velho is not None:
+            self.bytes_cache -= velho.nbytes
+
+    def _esquece_distancias(self):
+        for chave in [c for c in self._cache if c[0] == "d"]:
+            self._esquece(chave)
+
+    def bloco(self, by: int, bx: int) -> np.ndarray:
+        """Ocupação (lado x lado, só leitura) do bloco (by, bx)."""
+        if not self.contagem[by, bx]:
+            return self._vazio
+        chave = ("b", by, bx)
+        bloco = self._cache.get(chave)
+        if bloco is not None:
+            self._cache.move_to_end(chave)
+            self.acertos += 1
+            return bloco
+        self.falhas += 1
+        bloco = np.unpackbits(self._bits[by, bx], axis=-1).view(bool)
+        self._guarda_cache(chave, bloco)
+        return bloco
+
+    def estatisticas(self) -> Dict[str, Any]:
+        consultas = self.acertos + self.falhas
+        return {
+            "blocos_em_cache": sum(1 for c in self._cache if c[0] == "b"),
+            "campos_em_cache": sum(1 for c in self._cache if c[0] == "d"),
+            "bytes_cache": self.bytes_cache,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "descartes": self.descartes,
+        }
+
+    # ---------- interface de conjunto de obstáculos ----------
+
+    def __contains__(self, pos) -> bool:
+        x, y = pos
+        if not (0 <= x < self.largura and 0 <= y < self.altura):
+            return False
+        lado = self.lado
+        by, bx = y // lado, x // lado
+        if not self.contagem[by, bx]:
+            return False
+        return bool(self.bloco(by, bx)[y - by * lado, x - bx * lado])
+
+    def __len__(self) -> int:
+        return int(self.contagem.sum())
+
+    def __iter__(self) -> Iterator[Posicao]:
+        for by, bx in zip(*np.nonzero(self.contagem)):
+            ys, xs = np.nonzero(self.bloco(by, bx))
+            yield from zip((xs + bx * self.lado).tolist(), (ys + by * self.lado).tolist())
+
+    def adiciona(self, xs: Sequence[int], ys: Sequence[int]):
+        """Marca vários obstáculos de uma vez (repetidos e já existentes são ignorados)."""
+        xs = np.asarray(xs, dtype=np.int64).ravel()
+        ys = np.asarray(ys, dtype=np.int64).ravel()
+        dentro = (xs >= 0) & (xs < self.largura) & (ys >= 0) & (ys < self.altura)
+        xs, ys = xs[dentro], ys[dentro]
+        _, unicos = np.unique(ys * self.largura + xs, return_index=True)
+        xs, ys = xs[unicos], ys[unicos]
+
+        lado = self.lado
+        by, bx = ys // lado, xs // lado
+        ly, lx = ys - by * lado, xs - bx * lado
+        byte, mascara = lx >> 3, (np.uint8(0x80) >> (lx & 7).astype(np.uint8))
+        novos = (self._bits[by, bx, ly, byte] & mascara) == 0
+        by, bx, ly, byte, mascara = by[novos], bx[novos], ly[novos], byte[novos], mascara[novos]
+
+        np.bitwise_or.at(self._bits, (by, bx, ly, byte), mascara)
+        np.add.at(self.contagem, (by, bx), 1)
+        for b in set(zip(by.tolist(), bx.tolist())):
+            self._esquece(("b",) + b)
+        if len(by):
+            self._esquece_distancias()
+
+    def add(self, pos: Posicao):
+        self.adiciona([pos[0]], [pos[1]])
+
+    # Ambiente.adicionaObstaculo faz obstaculos.append e _conjunto_obstaculos.add
+    append = add
+
+    def clear(self):
+        self._bits[:] = 0
+        self.contagem[:] = 0
+        self._cache.clear()
+        self.bytes_cache = 0
+
+    # ---------- consultas por janela / região ----------
+
+    def janela(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Ocupação [y0:y1, x0:x1] (limitada ao mapa), montada a partir dos blocos."""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.largura, x1), min(self.altura, y1)
+        saida = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=bool)
+        lado = self.lado
+        for by in range(y0 // lado, (y1 - 1) // lado + 1 if y1 > y0 else 0):
+            for bx in range(x0 // lado, (x1 - 1) // lado + 1 if x1 > x0 else 0):
+                if not self.contagem[by, bx]:
+                    continue
+                bloco = self.bloco(by, bx)
+                ya, yb = max(y0, by * lado), min(y1, (by + 1) * lado)
+                xa, xb = max(x0, bx * lado), min(x1, (bx + 1) * lado)
+                saida[ya - y0: yb - y0, xa - x0: xb - x0] = bloco[ya - by * lado: yb - by * lado,
+                                                                  xa - bx * lado: xb - bx * lado]
+        return saida
+
+    def obstaculos_em(self, pos: Posicao, raio: int = 1) -> List[Posicao]:
+        """Obstáculos no quadrado de lado 2*raio+1 à volta de pos (observação local do agente)."""
+        x, y = pos
+        ocup = self.janela(x - raio, y - raio, x + raio + 1, y + raio + 1)
+        ys, xs = np.nonzero(ocup)
+        x0, y0 = max(0, x - raio), max(0, y - raio)
+        return list(zip((xs + x0).tolist(), (ys + y0).tolist()))
+
+    def campo_regiao(self, objetivo: Posicao, raio: int = 256) -> Tuple[int, int, np.ndarray]:
+        """
+        (x0, y0, campo) com as distâncias ao objetivo dentro do quadrado de lado 2*raio+1
+        à volta dele; caminhos que saiam da região não contam. Fica na cache LRU.
+        """
+        chave = ("d", tuple(objetivo), raio)
+        x0, y0 = max(0, objetivo[0] - raio), max(0, objetivo[1] - raio)
+        campo = self._cache.get(chave)
+        if campo is not None:
+            self._cache.move_to_end(chave)
+            return x0, y0, campo
+        ocup = self.janela(x0, y0, objetivo[0] + raio + 1, objetivo[1] + raio + 1)
+        campo = campo_distancias(ocup, [(objetivo[0] - x0, objetivo[1] - y0)])
+        self._guarda_cache(chave, campo)
+        return x0, y0, campo
+
+    def distancia(self, pos: Posicao, objetivo: Optional[Posicao] = None, raio: int = 256) -> Optional[int]:
+        """Passos até ao objetivo (o primeiro, por omissão) contornando obstáculos, se pos estiver na região."""
+        objetivo = objetivo if objetivo is not None else self.objetivos[0]
+        x0, y0, campo = self.campo_regiao(objetivo, raio)
+        lx, ly = pos[0] - x0, pos[1] - y0
+        if not (0 <= ly < campo.shape[0] and 0 <= lx < campo.shape[1]):
+            return None
+        d = int(campo[ly, lx])
+        return d if d >= 0 else None
+
+
+# --------------------------------------------------------------
+#   Benchmark
+# --------------------------------------------------------------
+
+def _bytes_em_disco(ficheiro: str) -> int:
+    try:
+        return os.stat(ficheiro).st_blocks * 512
+    except AttributeError:
+        return os.path.getsize(ficheiro)
+
+
+def benchmark(
+    lados: Sequence[int] = (1000, 10000),
+    densidade: float = 0.001,
+    consultas: int = 200_000,
+    orcamento_bytes: int = 16 * 2**20,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Para cada lado (1000 -> 1M células, 10000 -> 100M): constrói um mapa com obstáculos
+    aleatórios, mede consultas "in" num passeio aleatório (localidade, como um agente) e
+    uniformes (pior caso da cache), e o cálculo de um campo de distâncias por região.
+    """
+    rng = np.random.default_rng(seed)
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for lado in lados:
+            ficheiro = os.path.join(pasta, f"mapa_{lado}.bits")
+            t0 = time.perf_counter()
+            mapa = MapaBlocos(lado, lado, ficheiro, orcamento_bytes=orcamento_bytes, objetivos=[(lado // 2, lado // 2)])
+            n_obs = int(lado * lado * densidade)
+            mapa.adiciona(rng.integers(0, lado, n_obs), rng.integers(0, lado, n_obs))
+            mapa.guarda()
+            t_cria = time.perf_counter() - t0
+
+            passos = rng.integers(-1, 2, size=(consultas, 2)).cumsum(axis=0) + lado // 2
+            passeio = list(map(tuple, np.clip(passos, 0, lado - 1).tolist()))
+            t0 = time.perf_counter()
+            for p in passeio:
+                p in mapa
+            t_passeio = time.perf_counter() - t0
+
+            uniformes = list(map(tuple, rng.integers(0, lado, size=(consultas // 10, 2)).tolist()))
+            t0 = time.perf_counter()
+            for p in uniformes:
+                p in mapa
+            t_uniforme = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            mapa.distancia((lado // 2 + 100, lado // 2 + 100), raio=256)
+            t_campo = time.perf_counter() - t0
+
+            linhas.append({
+                "celulas": lado * lado,
+                "obstaculos": len(mapa),
+                "criacao_s": t_cria,
+                "consultas_passeio_por_s": consultas / t_passeio,
+                "consultas_uniformes_por_s": (consultas // 10) / t_uniforme,
+                "campo_regiao_513x513_s": t_campo,
+                "disco_mib": _bytes_em_disco(ficheiro) / 2**20,
+                "cache_mib": mapa.bytes_cache / 2**20,
+                **{k: v for k, v in mapa.estatisticas().items() if k in ("taxa_acerto", "descartes")},
+            })
+            del mapa
+    return linhas
+
+
+if __name__ == "__main__":
+    for linha in benchmark():
+        print({k: round(v, 3) if isinstance(v, float) else v for k, v in linha.items()})
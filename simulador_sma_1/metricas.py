@@ -0,0 +1,221 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ordem das colunas (igual às chaves de Agente.calculo_metricas)
+METRICAS: Tuple[str, ...] = (
+    "recompensa_total",
+    "passos_total",
+    "media_recompensa_por_passo",
+    "taxa_sucesso",
+    "tempo_medio_por_episodio",
+    "colisoes",
+    "distancia_media_ao_objetivo",
+    "decisoes_erradas",
+)
+
+
+class RegistoMetricas:
+    """
+    Métricas por episódio em colunas NumPy: array (episodio x agente x metrica).
+    Substitui a lista de dicionários devolvida por executar_experiencia quando
+    é preciso agregar muitos episódios / execuções.
+    """
+
+    def __init__(self, agentes: Sequence[str], metricas: Sequence[str] = METRICAS, capacidade: int = 64):
+        self.agentes: List[str] = list(agentes)
+        self.metricas: List[str] = list(metricas)
+        self._idx_agente = {nome: i for i, nome in enumerate(self.agentes)}
+        self._idx_metrica = {nome: i for i, nome in enumerate(self.metricas)}
+        self._dados = np.full((max(1, capacidade), len(self.agentes), len(self.metricas)), np.nan)
+        self.n_episodios = 0
+
+    @classmethod
+    def a_partir_de_historico(cls, historico: List[Dict[str, Dict[str, float]]]) -> "RegistoMetricas":
+        """Converte o histórico de executar_experiencia ([{agente: {metrica: valor}}])."""
+        if not historico:
+            return cls([], capacidade=1)
+        agentes = list(historico[0].keys())
+        metricas = list(historico[0][agentes[0]].keys())
+        registo = cls(agentes, metricas, capacidade=len(historico))
+        for ep in historico:
+            registo.adiciona_episodio(ep)
+        return registo
+
+    @property
+    def dados(self) -> np.ndarray:
+        return self._dados[: self.n_episodios]
+
+    def adiciona_episodio(self, metricas_ep: Dict[str, Dict[str, float]]):
+        if self.n_episodios == self._dados.shape[0]:
+            # cresce para o dobro, amortizado O(1) por episódio
+            extra = np.full_like(self._dados, np.nan)
+            self._dados = np.concatenate([self._dados, extra], axis=0)
+
+        linha = self._dados[self.n_episodios]
+        for nome_agente, mets in metricas_ep.items():
+            a = self._idx_agente[nome_agente]
+            for nome_metrica, valor in mets.items():
+                m = self._idx_metrica.get(nome_metrica)
+                if m is not None:
+                    linha[a, m] = valor
+        self.n_episodios += 1
+
+    def serie(self, metrica: str, agente: Optional[str] = None) -> np.ndarray:
+        """Série (episodios,) de um agente ou (episodios, agentes) de todos."""
+        coluna = self.dados[:, :, self._idx_metrica[metrica]]
+        if agente is None:
+            return coluna
+        return coluna[:, self._idx_agente[agente]]
+
+    def guardar(self, ficheiro: str):
+        np.savez_compressed(
+            ficheiro, dados=self.dados, agentes=np.asarray(self.agentes), metricas=np.asarray(self.metricas)
+        )
+
+    @classmethod
+    def carregar(cls, ficheiro: str) -> "RegistoMetricas":
+        with np.load(ficheiro) as f:
+            registo = cls(f["agentes"].tolist(), f["metricas"].tolist(), capacidade=len(f["dados"]))
+            registo._dados[: len(f["dados"])] = f["dados"]
+            registo.n_episodios = len(f["dados"])
+        return registo
+
+
+def empilha_registos(registos: Sequence[RegistoMetricas]) -> np.ndarray:
+    """
+    Junta várias execuções num array (execucao x episodio x agente x metrica).
+    Execuções mais curtas ficam com NaN no fim; usar as funções nan* do NumPy para agregar.
+    """
+    if not registos:
+        return np.empty((0, 0, 0, 0))
+    n_ep = max(r.n_episodios for r in registos)
+    n_ag = max(len(r.agentes) for r in registos)
+    n_met = len(registos[0].metricas)
+    saida = np.full((len(registos), n_ep, n_ag, n_met), np.nan)
+    for i, r in enumerate(registos):
+        d = r.dados
+        saida[i, : d.shape[0], : d.shape[1]] = d
+    return saida
+
+
+# --------------------------------------------------------------
+#   Retornos descontados
+# --------------------------------------------------------------
+
+def retorno_descontado(recompensas, gamma: float) -> np.ndarray:
+    """G_0 = sum_t gamma^t r_t ao longo do último eixo."""
+    r = np.asarray(recompensas, dtype=float)
+    if r.shape[-1] == 0:
+        return np.zeros(r.shape[:-1])
+    return r @ np.power(gamma, np.arange(r.shape[-1], dtype=float))
+
+
+def retornos_descontados(recompensas, gamma: float) -> np.ndarray:
+    """
+    G_t = r_t + gamma * G_{t+1} para todos os t (filtro acumulado invertido) ao longo do último eixo.
+
+    Cada bloco é uma soma acumulada reescalada por gamma^t; os blocos são curtos o
+    suficiente para gamma^-L não rebentar em float64, e encadeiam-se do fim para o início.
+    """
+    r = np.asarray(recompensas, dtype=float)
+    n = r.shape[-1]
+    if n == 0 or gamma == 0.0:
+        return r.copy()
+    if gamma == 1.0:
+        return np.flip(np.cumsum(np.flip(r, -1), axis=-1), -1)
+
+    bloco = n if gamma > 1.0 else max(1, min(n, int(250 / -math.log10(gamma))))
+    saida = np.empty_like(r)
+    seguinte = np.zeros(r.shape[:-1])  # G no início do bloco seguinte
+    for fim in range(n, 0, -bloco):
+        ini = max(0, fim - bloco)
+        t = np.arange(fim - ini, dtype=float)
+        escala = np.power(gamma, t)
+        parcial = np.flip(np.cumsum(np.flip(r[..., ini:fim] * escala, -1), axis=-1), -1) / escala
+        parcial += seguinte[..., None] * np.power(gamma, (fim - ini) - t)
+        saida[..., ini:fim] = parcial
+        seguinte = parcial[..., 0]
+    return saida
+
+
+# --------------------------------------------------------------
+#   Janelas e intervalos de confiança
+# --------------------------------------------------------------
+
+def media_movel(valores, janela: int, eixo: int = -1) -> np.ndarray:
+    """Média móvel 'valid' (como np.convolve(..., mode="valid")) ao longo de um eixo, via somas acumuladas."""
+    x = np.moveaxis(np.asarray(valores, dtype=float), eixo, -1)
+    if janela <= 0 or x.shape[-1] < janela:
+        return np.moveaxis(x[..., :0], -1, eixo)
+    acumulado = np.cumsum(x, axis=-1)
+    acumulado = np.concatenate([np.zeros(x.shape[:-1] + (1,)), acumulado], axis=-1)
+    return np.moveaxis((acumulado[..., janela:] - acumulado[..., :-janela]) / janela, -1, eixo)
+
+
+def intervalo_bootstrap(
+    amostras,
+    n_reamostras: int = 1000,
+    nivel: float = 0.95,
+    rng: Optional[np.random.Generator] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Intervalo de confiança por bootstrap da média ao longo do eixo 0 (execuções / seeds),
+    vetorizado para todas as outras posições (ex.: episódios). Ignora NaN.
+    Devolve (media, inferior, superior).
+    """
+    x = np.asarray(amostras, dtype=float)
+    rng = rng if rng is not None else np.random.default_rng()
+    n = x.shape[0]
+    media = np.nanmean(x, axis=0)
+    if n < 2:
+        return media, media.copy(), media.copy()
+
+    indices = rng.integers(0, n, size=(n_reamostras, n))
+    medias = np.nanmean(x[indices], axis=1)  # (reamostras, ...)
+    alfa = (1.0 - nivel) / 2.0
+    inferior, superior = np.nanquantile(medias, [alfa, 1.0 - alfa], axis=0)
+    return media, inferior, superior
+
+
+# --------------------------------------------------------------
+#   Gráficos de várias execuções
+# --------------------------------------------------------------
+
+def mostrar_curvas_execucoes(
+    execucoes: np.ndarray,
+    titulo: str,
+    ficheiro_png: str,
+    janela: int = 1,
+    nivel: float = 0.95,
+):
+    """
+    Desenha todas as execuções (execucao x episodio) de uma métrica numa só passagem:
+    as curvas individuais vão numa LineCollection e a média com o intervalo bootstrap por cima.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    y = np.asarray(execucoes, dtype=float)
+    if janela > 1:
+        y = media_movel(y, janela, eixo=1)
+    episodios = np.arange(1, y.shape[1] + 1) + (janela - 1)
+
+    media, inferior, superior = intervalo_bootstrap(y, nivel=nivel)
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    segmentos = np.stack([np.broadcast_to(episodios, y.shape), y], axis=-1)
+    ax.add_collection(LineCollection(segmentos, colors="0.7", linewidths=0.5, alpha=0.5))
+    ax.fill_between(episodios, inferior, superior, alpha=0.3, label=f"IC {int(nivel * 100)}%")
+    ax.plot(episodios, media, label=f"Média ({y.shape[0]} execuções)")
+    ax.autoscale()
+    ax.set_xlabel("Episódio")
+    ax.set_ylabel("Valor")
+    ax.set_title(titulo)
+    ax.legend()
+    ax.grid(True)
+    fig.savefig(ficheiro_png)
+    plt.close(fig)
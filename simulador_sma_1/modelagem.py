@@ -0,0 +1,130 @@
+"""
+Termos de modelação de recompensa (reward shaping) que se ligam ao Ambiente.
+
+Cada termo soma um valor à recompensa de Ambiente.agir depois do movimento:
+    ambiente.adicionaModelagem(PenalizacaoRevisitas(0.06))
+
+As contagens de visitas ficam numa grelha NumPy (linhas x altura x largura), uma
+linha por agente, e o reset de episódio é um único fill(0). Em grelhas muito grandes
+(acima de max_celulas_densas células) cada linha passa a um dict só com as células visitadas. O mesmo termo serve o
+caminho escalar (termo: um agente de cada vez, em Ambiente.agir) e o vetorizado
+(termos: muitas linhas de uma vez, ex.: avaliacao.avaliar_politica, uma linha por episódio).
+"""
+from abc import ABC, abstractmethod
+from typing import Dict
+
+import numpy as np
+
+
+class TermoModelagem(ABC):
+    """Base: contagens de visitas por linha; as subclasses definem o valor a partir da contagem."""
+
+    # acima disto (células por linha) as contagens passam a dicts esparsos: uma grelha densa de
+    # 10k x 10k (mapa_blocos.MapaBlocos) seriam 400 MB por agente
+    max_celulas_densas = 1 << 22
+
+    def __init__(self):
+        # densa: array (linhas, altura, largura); esparsa: lista de {y * largura + x: visitas}
+        self.contagens = np.zeros((0, 0, 0), dtype=np.int32)
+        self.largura = 0
+        # agente -> linha (caminho escalar); o próprio agente e não id(agente), que se reaproveita
+        # depois de o agente ser recolhido
+        self._linhas: Dict[object, int] = {}
+
+    @property
+    def esparsa(self) -> bool:
+        return isinstance(self.contagens, list)
+
+    def prepara(self, n_linhas: int, largura: int, altura: int):
+        """Reserva n_linhas a zero para uma grelha largura x altura (reaproveita a memória se couber)."""
+        esparsa = largura * altura > self.max_celulas_densas
+        n_linhas = max(n_linhas, 1)
+        if esparsa:
+            if self.esparsa and self.largura == largura and len(self.contagens) >= n_linhas:
+                self.reset()
+            else:
+                self.contagens = [{} for _ in range(n_linhas)]
+                self._linhas.clear()
+        else:
+            l, h, w = self.contagens.shape if not self.esparsa else (0, 0, 0)
+            if l >= n_linhas and h == altura and w == largura:
+                self.contagens.fill(0)
+            else:
+                self.contagens = np.zeros((n_linhas, altura, largura), dtype=np.int32)
+                self._linhas.clear()
+        self.largura = largura
+
+    def reset(self):
+        if self.esparsa:
+            for visitas in self.contagens:
+                visitas.clear()
+        else:
+            self.contagens.fill(0)
+
+    def _linha(self, agente) -> int:
+        linha = self._linhas.get(agente)
+        if linha is None:
+            linha = self._linhas[agente] = len(self._linhas)
+            if linha >= len(self.contagens):
+                if self.esparsa:
+                    self.contagens.extend({} for _ in range(len(self.contagens)))
+                else:
+                    maior = np.zeros((2 * len(self.contagens) or 1,) + self.contagens.shape[1:], dtype=np.int32)
+                    maior[: len(self.contagens)] = self.contagens
+                    self.contagens = maior
+        return linha
+
+    @abstractmethod
+    def valor(self, anteriores):
+        """Termo a somar, dado o nº de visitas anteriores à célula (int ou array)."""
+        pass
+
+    def termo(self, agente, posicao) -> float:
+        """Caminho escalar: conta a visita do agente a posicao e devolve o termo."""
+        x, y = posicao
+        linha = self._linha(agente)
+        if self.esparsa:
+            visitas = self.contagens[linha]
+            chave = y * self.largura + x
+            anteriores = visitas.get(chave, 0)
+            visitas[chave] = anteriores + 1
+        else:
+            anteriores = int(self.contagens[linha, y, x])
+            self.contagens[linha, y, x] = anteriores + 1
+        return float(self.valor(anteriores))
+
+    def termos(self, linhas: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Caminho vetorizado: uma visita por linha (linhas distintas), devolve o termo de cada uma."""
+        if self.esparsa:
+            anteriores = np.empty(len(linhas), dtype=np.int32)
+            for i, (linha, chave) in enumerate(zip(np.asarray(linhas).tolist(), (ys * self.largura + xs).tolist())):
+                visitas = self.contagens[linha]
+                anteriores[i] = visitas.get(chave, 0)
+                visitas[chave] = anteriores[i] + 1
+            return self.valor(anteriores)
+        anteriores = self.contagens[linhas, ys, xs]
+        self.contagens[linhas, ys, xs] = anteriores + 1
+        return self.valor(anteriores)
+
+
+class PenalizacaoRevisitas(TermoModelagem):
+    """-coeficiente * repeticoes**expoente, em que repeticoes é o nº de vezes que já lá esteve (0 na 1ª visita)."""
+
+    def __init__(self, coeficiente: float = 0.06, expoente: float = 2.0):
+        super().__init__()
+        self.coeficiente = coeficiente
+        self.expoente = expoente
+
+    def valor(self, anteriores):
+        return -self.coeficiente * anteriores ** self.expoente
+
+
+class BonusNovidade(TermoModelagem):
+    """Bónus por contagem: beta / sqrt(nº de visitas, contando esta); a 1ª visita vale beta."""
+
+    def __init__(self, beta: float = 0.05):
+        super().__init__()
+        self.beta = beta
+
+    def valor(self, anteriores):
+        return self.beta / np.sqrt(anteriores + 1)
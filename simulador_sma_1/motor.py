@@ -0,0 +1,399 @@
+"""
+Motor de episódios único, usado por main.executar_experiencia, Simulador.executa e
+Simulador.executa_async (corre_episodio_async: observações e decisões pedidas em simultâneo).
+
+O passo é sempre: observar -> decidir -> ambiente.agir -> ganchos do agente, e no
+fim do passo os ganchos de passo. O que muda entre treino, teste, simulação com
+barramento, gravação ou janela são só os ganchos registados em cada fase:
+
+  inicio_episodio  gancho(motor)                       depois de ambiente.reset()
+  pre_passo        gancho(motor)                       antes de observar
+  pos_acao         gancho(motor, agente, obs, acao, recompensa, terminou)
+  aprende          gancho(motor, agente, obs, acao, recompensa, terminou)
+  regista          gancho(motor, agente, obs, acao, recompensa, terminou)
+  fim_passo        gancho(motor)                       ex.: ambiente.atualizacao, barramento
+  desenha          gancho(motor)
+  fim_episodio     gancho(motor)
+
+compila() junta as listas numa tupla fixa de chamadas (e liga já os métodos de cada
+agente), por isso o ciclo interior não faz hasattr nem procura de atributos por passo.
+Durante os ganchos, motor.passo, motor.episodio, motor.pos_antiga (posição do agente
+antes de agir) e motor.objetivo (primeiro objetivo) descrevem o ponto atual.
+"""
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+FASES = ("inicio_episodio", "pre_passo", "pos_acao", "aprende", "regista", "fim_passo", "desenha", "fim_episodio")
+
+
+def observacao_simples(ambiente, agente):
+    """Sensor do agente, se tiver, senão ambiente.observacaoPara (como executar_experiencia)."""
+    sensor = getattr(agente, "sensor", None)
+    if sensor is not None:
+        return sensor.ler(ambiente, agente)
+    return ambiente.observacaoPara(agente)
+
+
+def _decisor(agente) -> Callable[[Any], Any]:
+    for nome in ("age", "agir", "escolher_acao"):
+        metodo = getattr(agente, nome, None)
+        if metodo is not None:
+            return metodo
+    raise AttributeError(f"Agente {agente} não tem método age/agir/escolher_acao")
+
+
+class MotorEpisodios:
+    def __init__(
+        self,
+        ambiente,
+        agentes,
+        simultaneo: bool = False,
+        observador: Optional[Callable[[Any, Any], Any]] = None,
+        agir: Optional[Callable[[Any, Any], Any]] = None,
+    ):
+        """
+        simultaneo=False: cada agente observa, age e aprende antes do seguinte (executar_experiencia);
+        simultaneo=True: todos observam e decidem, depois as ações são aplicadas por ordem (Simulador).
+        observador(ambiente, agente) e agir(acao, agente) substituem os de omissão.
+        """
+        self.ambiente = ambiente
+        self.agentes = list(agentes)
+        self.simultaneo = simultaneo
+        self.observador = observador or observacao_simples
+        self.agir = agir
+        self.ganchos: Dict[str, List[Callable]] = {f: [] for f in FASES}
+        self.criterios_paragem: List[Callable[["MotorEpisodios"], bool]] = []
+        self._compilado = None
+
+        self.episodio = 0
+        self.passo = 0
+        self.pos_antiga = None
+        self.objetivo = None
+        self.terminou = False
+        self.passos_executados = 0
+
+    def adiciona(self, fase: str, gancho: Callable) -> "MotorEpisodios":
+        if fase not in self.ganchos:
+            raise ValueError(f"Fase desconhecida {fase!r}; fases: {', '.join(FASES)}")
+        self.ganchos[fase].append(gancho)
+        self._compilado = None
+        return self
+
+    def para_quando(self, criterio: Callable[["MotorEpisodios"], bool]) -> "MotorEpisodios":
+        """Critério extra de paragem, verificado no fim de cada passo (além de algum agente terminar)."""
+        self.criterios_paragem.append(criterio)
+        self._compilado = None
+        return self
+
+    def compila(self):
+        g = self.ganchos
+        self._compilado = (
+            tuple((ag, partial(self.observador, self.ambiente, ag), _decisor(ag)) for ag in self.agentes),
+            self.agir or self.ambiente.agir,
+            tuple(g["pos_acao"] + g["aprende"] + g["regista"]),
+            tuple(g["pre_passo"]),
+            tuple(g["fim_passo"] + g["desenha"]),
+            tuple(self.criterios_paragem),
+        )
+        return self
+
+    def corre_episodio(self, passos: int, reset: bool = True) -> Dict[str, Any]:
+        """Um episódio de até `passos` passos. Devolve recompensas por passo, nº de passos e se terminou."""
+        if self._compilado is None:
+            self.compila()
+        agentes, agir, por_agente, antes, depois, paragem = self._compilado
+
+        self._inicia_episodio(reset)
+        recompensas: List[float] = []
+        for passo in range(passos):
+            self.passo = passo
+            for gancho in antes:
+                gancho(self)
+
+            if self.simultaneo:
+                observacoes = [observa() for _, observa, _ in agentes]
+                acoes = [decide(obs) for (_, _, decide), obs in zip(agentes, observacoes)]
+                total, terminou_global = self._aplica(agentes, agir, por_agente, observacoes, acoes)
+            else:
+                total = 0.0
+                terminou_global = False
+                for agente, observa, decide in agentes:
+                    obs = observa()
+                    self.pos_antiga = getattr(agente, "posicao", None)
+                    acao = decide(obs)
+                    recompensa, terminou = agir(acao, agente)
+                    for gancho in por_agente:
+                        gancho(self, agente, obs, acao, recompensa, terminou)
+                    total += recompensa
+                    terminou_global = terminou_global or terminou
+
+            if self._fecha_passo(recompensas, total, terminou_global, depois, paragem):
+                break
+
+        return self._termina_episodio(recompensas)
+
+    async def corre_episodio_async(
+        self,
+        passos: int,
+        reset: bool = True,
+        observa_async: Optional[Callable[[Any], Awaitable[Any]]] = None,
+        decide_async: Optional[Callable[[Any, Any], Awaitable[Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        corre_episodio simultâneo em que as observações e as decisões de todos os agentes
+        são pedidas ao mesmo tempo: observa_async(agente) e decide_async(agente, obs) são
+        corrotinas (sem elas usa o observador e o método age do agente). Ganchos, critérios
+        de paragem e aplicação das ações são os mesmos do caminho síncrono.
+        """
+        import asyncio
+
+        if self._compilado is None:
+            self.compila()
+        agentes, agir, por_agente, antes, depois, paragem = self._compilado
+
+        self._inicia_episodio(reset)
+        recompensas: List[float] = []
+        for passo in range(passos):
+            self.passo = passo
+            for gancho in antes:
+                gancho(self)
+
+            if observa_async is not None:
+                observacoes = await asyncio.gather(*(observa_async(ag) for ag, _, _ in agentes))
+            else:
+                observacoes = [observa() for _, observa, _ in agentes]
+            if decide_async is not None:
+                acoes = await asyncio.gather(*(decide_async(ag, obs) for (ag, _, _), obs in zip(agentes, observacoes)))
+            else:
+                acoes = [decide(obs) for (_, _, decide), obs in zip(agentes, observacoes)]
+            total, terminou_global = self._aplica(agentes, agir, por_agente, observacoes, acoes)
+
+            if self._fecha_passo(recompensas, total, terminou_global, depois, paragem):
+                break
+
+        return self._termina_episodio(recompensas)
+
+    # ---------- partes comuns aos dois caminhos ----------
+
+    def _inicia_episodio(self, reset: bool):
+        if reset:
+            self.ambiente.reset()
+        objetivos = getattr(self.ambiente, "objetivos", None)
+        self.objetivo = objetivos[0] if objetivos else None
+        self.terminou = False
+        self.passos_executados = 0
+        for gancho in self.ganchos["inicio_episodio"]:
+            gancho(self)
+
+    def _aplica(self, agentes, agir, por_agente, observacoes, acoes):
+        """Aplica as ações já decididas, por ordem. Devolve (recompensa do passo, algum terminou)."""
+        total = 0.0
+        terminou_global = False
+        for (agente, _, _), obs, acao in zip(agentes, observacoes, acoes):
+            self.pos_antiga = getattr(agente, "posicao", None)
+            recompensa, terminou = agir(acao, agente)
+            for gancho in por_agente:
+                gancho(self, agente, obs, acao, recompensa, terminou)
+            total += recompensa
+            terminou_global = terminou_global or terminou
+        return total, terminou_global
+
+    def _fecha_passo(self, recompensas, total, terminou_global, depois, paragem) -> bool:
+        """Ganchos de fim de passo; devolve True se o episódio acaba aqui."""
+        recompensas.append(total)
+        self.passos_executados += 1
+        for gancho in depois:
+            gancho(self)
+        if terminou_global or any(criterio(self) for criterio in paragem):
+            self.terminou = terminou_global
+            return True
+        return False
+
+    def _termina_episodio(self, recompensas: List[float]) -> Dict[str, Any]:
+        for gancho in self.ganchos["fim_episodio"]:
+            gancho(self)
+        self.episodio += 1
+        return {"recompensas_por_passo": recompensas, "passos": self.passos_executados, "terminou": self.terminou}
+
+    def corre(self, episodios: int, passos_por_episodio: int, reset: bool = True) -> List[Dict[str, Any]]:
+        return [self.corre_episodio(passos_por_episodio, reset=reset) for _ in range(episodios)]
+
+
+# --------------------------------------------------------------
+#   Ganchos prontos
+# --------------------------------------------------------------
+
+def reinicia_agentes(motor: MotorEpisodios):
+    """inicio_episodio: zera recompensa, históricos e a última transição de cada agente."""
+    agora = time.time()
+    for ag in motor.agentes:
+        ag.reset_episodio(agora)
+
+
+def fecha_episodio(motor: MotorEpisodios):
+    """fim_episodio: cada agente aplica o que tem pendente (p.ex. o lote do aproximador linear)."""
+    for ag in motor.agentes:
+        fim = getattr(ag, "fim_episodio", None)
+        if fim is not None:
+            fim()
+
+
+def acumula_recompensa(motor, agente, obs, acao, recompensa, terminou):
+    agente.avaliacaoEstadoAtual(recompensa)
+
+
+def atualiza_q(motor, agente, obs, acao, recompensa, terminou):
+    """aprende: transição (s, a, r, s') com a observação do ambiente depois da ação."""
+    agente.update_transition(motor.ambiente.observacaoPara(agente), recompensa, terminou)
+
+
+def regista_passos(motor, agente, obs, acao, recompensa, terminou):
+    agente.regista_passos(acao, motor.pos_antiga, agente.posicao, motor.objetivo)
+
+
+def regista_desempenho(motor, agente, obs, acao, recompensa, terminou):
+    agente.regista_desempenho(obs, acao, recompensa)
+
+
+def atualiza_ambiente(motor: MotorEpisodios):
+    motor.ambiente.atualizacao()
+
+
+def ganchos_gravador(motor: MotorEpisodios, gravador):
+    """Liga um trajetorias.GravadorTrajetorias ao motor."""
+    motor.adiciona("inicio_episodio", lambda m: gravador.novo_episodio(m.ambiente, m.agentes))
+    motor.adiciona("regista", lambda m, ag, obs, acao, r, t: gravador.regista(ag, acao, r, t))
+    motor.adiciona("fim_passo", lambda m: gravador.fim_passo())
+    return motor
+
+
+def motor_experiencia(ambiente, agentes, treino: bool = True, gravador=None) -> MotorEpisodios:
+    """Motor com os ganchos de executar_experiencia (sem visualização nem métricas por episódio)."""
+    motor = MotorEpisodios(ambiente, agentes)
+    motor.adiciona("inicio_episodio", reinicia_agentes)
+    motor.adiciona("pos_acao", acumula_recompensa)
+    if treino:
+        motor.adiciona("aprende", atualiza_q)
+    motor.adiciona("regista", regista_passos)
+    motor.adiciona("fim_passo", atualiza_ambiente)
+    if treino:
+        motor.adiciona("fim_episodio", fecha_episodio)
+    if gravador is not None:
+        ganchos_gravador(motor, gravador)
+    return motor
+
+
+# --------------------------------------------------------------
+#   Benchmark contra os ciclos antigos
+# --------------------------------------------------------------
+
+def _ciclo_referencia_experiencia(ambiente, agentes, episodios, passos_por_episodio):
+    """Ciclo de executar_experiencia antes do motor (sem prints, janela nem métricas)."""
+    for _ in range(episodios):
+        ambiente.reset()
+        objetivo = ambiente.objetivos[0] if ambiente.objetivos else None
+        reinicia_agentes(MotorEpisodios(ambiente, agentes))
+        for _ in range(passos_por_episodio):
+            terminou_global = False
+            for ag in agentes:
+                obs = ag.sensor.ler(ambiente, ag) if ag.sensor is not None else ambiente.observacaoPara(ag)
+                pos_antiga = getattr(ag, "posicao", None)
+                acao = ag.age(obs)
+                recompensa, terminou = ambiente.agir(acao, ag)
+                ag.avaliacaoEstadoAtual(recompensa)
+                ag.update_transition(ambiente.observacaoPara(ag), recompensa, terminou)
+                ag.regista_passos(acao, pos_antiga, getattr(ag, "posicao", None), objetivo)
+                terminou_global = terminou_global or terminou
+            ambiente.atualizacao()
+            if terminou_global:
+                break
+
+
+def _ciclo_referencia_simulador(ambiente, agentes, passos):
+    """Ciclo de Simulador.executa antes do motor (sem tqdm nem logging), sem aprender."""
+    from simulador import Simulador
+
+    sim = Simulador.cria(ambiente, agentes)
+    for _ in range(passos):
+        obs_dict = {ag: sim._obtem_observacao(ag) for ag in agentes}
+        acoes = {ag: sim._acao_de(ag, obs) for ag, obs in obs_dict.items()}
+        termino = False
+        for ag, acao in acoes.items():
+            recompensa, terminou = sim._aplica_acao_no_ambiente(acao, ag)
+            if hasattr(ag, "avaliacaoEstadoAtual"):
+                ag.avaliacaoEstadoAtual(recompensa)
+            if hasattr(ag, "regista_desempenho"):
+                ag.regista_desempenho(obs_dict.get(ag), acao, recompensa)
+            termino = termino or terminou
+        if hasattr(ambiente, "atualizacao"):
+            ambiente.atualizacao()
+        if termino:
+            break
+
+
+def benchmark(cenario=None, episodios: int = 200, n_agentes: int = 4, repeticoes: int = 3, seed: int = 0):
+    """
+    Passos por segundo do motor contra os dois ciclos antigos, com a mesma seed
+    (n_agentes Q-learning em treino no labirinto, por omissão).
+    """
+    from aleatorio import fluxos
+    from agente import Agente
+    from cenarios import CENARIO_LABIRINTO, constroi_ambiente, normaliza_cenario
+    from sensor import SensorPosicao
+
+    cenario = cenario or normaliza_cenario(CENARIO_LABIRINTO)
+    passos_ep = cenario["treino"]["passos_por_episodio"]
+
+    def monta():
+        rngs = fluxos(seed, n_agentes + 1)
+        ambiente = constroi_ambiente(cenario, "treino", rng=rngs[0])
+        agentes = []
+        for i in range(n_agentes):
+            ag = Agente(f"A{i}", modo="learn", rng=rngs[i + 1])
+            ag.instala(SensorPosicao())
+            ambiente.adicionaAgente(ag, cenario["inicio"])
+            agentes.append(ag)
+        return ambiente, agentes
+
+    def mede(correr):
+        melhor = float("inf")
+        estado = None
+        for _ in range(repeticoes):
+            ambiente, agentes = monta()
+            t0 = time.perf_counter()
+            correr(ambiente, agentes)
+            melhor = min(melhor, time.perf_counter() - t0)
+            # para confirmar que motor e referência fazem exatamente o mesmo
+            estado = [(ag.recompensa_total, ag.posicao, len(ag.q_table)) for ag in agentes]
+        return melhor, estado
+
+    def motor_treino(ambiente, agentes):
+        motor_experiencia(ambiente, agentes).corre(episodios, passos_ep)
+
+    def motor_sim(ambiente, agentes):
+        m = MotorEpisodios(ambiente, agentes, simultaneo=True)
+        m.adiciona("pos_acao", acumula_recompensa).adiciona("regista", regista_desempenho)
+        m.adiciona("fim_passo", atualiza_ambiente)
+        m.corre_episodio(episodios * passos_ep, reset=False)
+
+    linhas = []
+    for nome, ref, novo in (
+        ("executar_experiencia", lambda a, g: _ciclo_referencia_experiencia(a, g, episodios, passos_ep), motor_treino),
+        ("Simulador.executa", lambda a, g: _ciclo_referencia_simulador(a, g, episodios * passos_ep), motor_sim),
+    ):
+        t_ref, p_ref = mede(ref)
+        t_novo, p_novo = mede(novo)
+        linhas.append({
+            "ciclo": nome,
+            "referencia_s": t_ref,
+            "motor_s": t_novo,
+            "aceleracao": t_ref / t_novo if t_novo else 0.0,
+            "mesmo_resultado": p_ref == p_novo,
+        })
+    return linhas
+
+
+if __name__ == "__main__":
+    for linha in benchmark():
+        print({k: round(v, 3) if isinstance(v, float) else v for k, v in linha.items()})
@@ -0,0 +1,87 @@
+"""
+Orçamento de arranque do ponto de entrada de treino sem interface ("import main").
+
+pygame, matplotlib, tqdm e asyncio só são importados onde são usados (visualização,
+gráficos, barra de progresso e caminho assíncrono do Simulador) e não podem aparecer
+no arranque. O numpy carrega-se logo, de propósito: aleatorio, grelha, cenarios,
+codificadores e modelagem usam-no ao nível do módulo e é nele que estão os caminhos
+rápidos. O orçamento conta com ele
+(~100 ms dos ~190 ms medidos numa máquina de desenvolvimento).
+"""
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# "import main" não pode carregar estes módulos e tem de ficar abaixo do orçamento (numpy incluído)
+ORCAMENTO_ARRANQUE_US = 300_000
+MODULOS_PROIBIDOS = ("pygame", "matplotlib", "tqdm", "asyncio")
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+
+def medir_importacao(modulo: str = "main") -> Dict[str, Tuple[int, int]]:
+    """
+    Corre `python -X importtime -c "import <modulo>"` num processo novo e devolve
+    {nome_modulo: (tempo_proprio_us, tempo_cumulativo_us)} lido do stderr.
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=PASTA_PROJETO,
+        capture_output=True,
+        text=True,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falhou a importação de {modulo}: {resultado.stderr.strip()}")
+
+    tempos: Dict[str, Tuple[int, int]] = {}
+    for linha in resultado.stderr.splitlines():
+        # formato: "import time:   self [us] | cumulative | imported package"
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3:
+            continue
+        try:
+            proprio, cumulativo = int(partes[0]), int(partes[1])
+        except ValueError:
+            continue  # cabeçalho
+        tempos[partes[2].strip()] = (proprio, cumulativo)
+    return tempos
+
+
+def verifica_orcamento(
+    modulo: str = "main",
+    orcamento_us: int = ORCAMENTO_ARRANQUE_US,
+    proibidos=MODULOS_PROIBIDOS,
+) -> Tuple[bool, List[str]]:
+    """Devolve (ok, problemas) para o tempo de arranque do módulo dado."""
+    tempos = medir_importacao(modulo)
+    problemas = []
+
+    carregados = [m for m in tempos if m.split(".")[0] in proibidos]
+    if carregados:
+        problemas.append(f"módulos pesados carregados no arranque: {sorted(set(m.split('.')[0] for m in carregados))}")
+
+    total = tempos.get(modulo, (0, 0))[1]
+    if total > orcamento_us:
+        problemas.append(f"import {modulo} demorou {total} us (orçamento {orcamento_us} us)")
+
+    return not problemas, problemas
+
+
+def mais_lentos(tempos: Dict[str, Tuple[int, int]], n: int = 10) -> List[Tuple[str, int]]:
+    """Os n módulos com maior tempo próprio de importação."""
+    return sorted(((m, t[0]) for m, t in tempos.items()), key=lambda x: x[1], reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    modulo: Optional[str] = sys.argv[1] if len(sys.argv) > 1 else "main"
+    tempos = medir_importacao(modulo)
+    print(f"import {modulo}: {tempos.get(modulo, (0, 0))[1]} us")
+    for nome, t in mais_lentos(tempos):
+        print(f"  {t:>8} us  {nome}")
+    ok, problemas = verifica_orcamento(modulo)
+    for p in problemas:
+        print("PROBLEMA:", p)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,239 @@
+"""
+Perfil de memória por episódio (opcional) com tracemalloc.
+
+Liga-se ao motor de executar_experiencia (ver motor.py) e, no fim de cada episódio,
+tira um snapshot do tracemalloc e mede as estruturas que crescem durante o treino:
+linhas da Q-table (novas no episódio e bytes por estado), históricos do agente e o
+histórico de métricas da experiência. Cada episódio dá uma linha em <base>_memoria.csv,
+com a mesma coluna "episodio" do <base>_historico.csv, para pôr ao lado da curva de
+aprendizagem; os locais que mais alocaram vão para <base>_memoria_topo.json.
+
+    with PerfilMemoria("resultados/labirinto") as perfil:
+        executar_experiencia(ambiente, [agente], episodios=500, perfil=perfil)
+
+O tracemalloc torna o treino várias vezes mais lento: é só para investigar.
+"""
+import csv
+import json
+import os
+import sys
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+CAMPOS = (
+    "episodio",
+    "memoria_atual",
+    "memoria_pico",
+    "delta_memoria",
+    "rss",
+    "estados_q",
+    "estados_novos",
+    "bytes_q_table",
+    "bytes_por_estado",
+    "historico_passos",
+    "historico_distancias",
+    "caixa_entrada",
+    "episodios_historico",
+    "bytes_historico",
+)
+
+# alocações do próprio tracemalloc, deste perfil e da maquinaria de importação não interessam
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss() -> int:
+    """Memória residente do processo em bytes (pico, se não houver /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def tamanho_q_table(q_table) -> int:
+    """
+    Estimativa dos bytes de uma Q-table {estado: {acao: valor}}: o dicionário, as chaves
+    (estados) e cada linha com os seus valores. Os nomes das ações são partilhados e não contam.
+    """
+    total = sys.getsizeof(q_table)
+    for estado, linha in q_table.items():
+        total += sys.getsizeof(estado) + sys.getsizeof(linha)
+        total += sum(sys.getsizeof(v) for v in linha.values())
+    return total
+
+
+def tamanho_historico(historico: List[Dict[str, Dict[str, float]]]) -> int:
+    """Bytes da lista de métricas por episódio (lista, um dict por episódio e um por agente)."""
+    total = sys.getsizeof(historico)
+    for ep in historico:
+        total += sys.getsizeof(ep)
+        for mets in ep.values():
+            total += sys.getsizeof(mets) + sum(sys.getsizeof(v) for v in mets.values())
+    return total
+
+
+def _local(estatistica) -> str:
+    quadro = estatistica.traceback[0]
+    return f"{os.path.basename(quadro.filename)}:{quadro.lineno}"
+
+
+def _topo(diferencas, n: int) -> List[Dict[str, Any]]:
+    return [
+        {"local": _local(d), "bytes": d.size, "delta_bytes": d.size_diff, "blocos": d.count, "delta_blocos": d.count_diff}
+        for d in sorted(diferencas, key=lambda d: abs(d.size_diff), reverse=True)[:n]
+    ]
+
+
+class PerfilMemoria:
+    def __init__(self, base: Optional[str] = None, top: int = 10, quadros: int = 1):
+        """
+        base: prefixo dos ficheiros (<base>_memoria.csv e <base>_memoria_topo.json); None não escreve nada.
+        top: nº de locais de alocação guardados por episódio e no total.
+        quadros: profundidade do traceback guardado pelo tracemalloc (1 chega para "ficheiro:linha").
+        """
+        self.base = base
+        self.top = top
+        self.quadros = quadros
+        self.linhas: List[Dict[str, Any]] = []
+        self.topo_episodios: List[List[Dict[str, Any]]] = []
+        self.topo_total: List[Dict[str, Any]] = []
+        self._iniciou_tracemalloc = False
+        self._primeiro = None
+        self._anterior = None
+        self._estados_anteriores = 0
+
+    # ---------- tracemalloc ----------
+    def __enter__(self):
+        self.inicia()
+        return self
+
+    def __exit__(self, *exc):
+        self.fecha()
+
+    def inicia(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.quadros)
+            self._iniciou_tracemalloc = True
+        return self
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_FILTROS)
+
+    # ---------- ganchos do motor ----------
+    def liga(self, motor, historico: Optional[list] = None):
+        """Junta os ganchos ao motor; historico é a lista de métricas que a experiência vai enchendo."""
+        self.inicia()
+
+        def inicio(m):
+            if self._primeiro is None:
+                self._estados_anteriores = sum(len(ag.q_table) for ag in m.agentes)
+                self._primeiro = self._anterior = self._snapshot()
+            tracemalloc.reset_peak()
+
+        motor.adiciona("inicio_episodio", inicio)
+        motor.adiciona("fim_episodio", lambda m: self.regista(m.episodio, m.agentes, historico))
+        return motor
+
+    def regista(self, episodio: int, agentes, historico: Optional[list] = None) -> Dict[str, Any]:
+        # o pico do tracemalloc conta também os snapshots guardados aqui; a memória atual
+        # vem do snapshot filtrado, só com o que o simulador alocou
+        pico = tracemalloc.get_traced_memory()[1]
+        snapshot = self._snapshot()
+        atual = sum(s.size for s in snapshot.statistics("filename"))
+        diferencas = snapshot.compare_to(self._anterior, "lineno") if self._anterior is not None else []
+
+        estados = sum(len(ag.q_table) for ag in agentes)
+        bytes_q = sum(tamanho_q_table(ag.q_table) for ag in agentes)
+        bytes_q += sum(ag.aproximador.pesos.nbytes for ag in agentes if ag.aproximador is not None)
+        linha = {
+            "episodio": episodio + 1,
+            "memoria_atual": atual,
+            "memoria_pico": pico,
+            "delta_memoria": sum(d.size_diff for d in diferencas),
+            "rss": rss(),
+            "estados_q": estados,
+            "estados_novos": estados - self._estados_anteriores,
+            "bytes_q_table": bytes_q,
+            "bytes_por_estado": bytes_q / estados if estados else 0.0,
+            "historico_passos": sum(len(ag.historico_passos) for ag in agentes),
+            "historico_distancias": sum(len(ag.historico_distancias) for ag in agentes),
+            "caixa_entrada": sum(len(ag.caixa_entrada) for ag in agentes if ag.caixa_entrada is not None),
+            "episodios_historico": len(historico) if historico is not None else 0,
+            "bytes_historico": tamanho_historico(historico) if historico is not None else 0,
+        }
+        self.linhas.append(linha)
+        self.topo_episodios.append(_topo(diferencas, self.top))
+        self._anterior = snapshot
+        self._estados_anteriores = estados
+        return linha
+
+    # ---------- resultados ----------
+    def resumo(self) -> Dict[str, Any]:
+        if not self.linhas:
+            return {"episodios": 0}
+        primeira, ultima = self.linhas[0], self.linhas[-1]
+        n = len(self.linhas)
+        return {
+            "episodios": n,
+            "memoria_final": ultima["memoria_atual"],
+            "memoria_pico": max(l["memoria_pico"] for l in self.linhas),
+            "crescimento_por_episodio": (ultima["memoria_atual"] - primeira["memoria_atual"]) / max(n - 1, 1),
+            "rss_final": ultima["rss"],
+            "estados_q": ultima["estados_q"],
+            "bytes_por_estado": ultima["bytes_por_estado"],
+            "topo": self.topo_total[:3],
+        }
+
+    def fecha(self):
+        if self._primeiro is not None and tracemalloc.is_tracing():
+            self.topo_total = _topo(self._snapshot().compare_to(self._primeiro, "lineno"), self.top)
+            self._primeiro = self._anterior = None
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+        if self.base is not None and self.linhas:
+            self.guarda(self.base)
+
+    def guarda(self, base: str):
+        pasta = os.path.dirname(base)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(f"{base}_memoria.csv", "w", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=CAMPOS)
+            escritor.writeheader()
+            escritor.writerows(self.linhas)
+        with open(f"{base}_memoria_topo.json", "w", encoding="utf-8") as f:
+            json.dump({"total": self.topo_total, "por_episodio": self.topo_episodios}, f, indent=1)
+
+
+if __name__ == "__main__":
+    from agente import Agente
+    from cenarios import CENARIO_LABIRINTO, constroi_ambiente, normaliza_cenario
+    from main import executar_experiencia
+    from sensor import SensorPosicao
+
+    episodios = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cenario = normaliza_cenario(CENARIO_LABIRINTO)
+    ambiente = constroi_ambiente(cenario, "treino", rng=0)
+    agente = Agente.cria("labirinto", modo="learn", rng=1)
+    agente.instala(SensorPosicao())
+    ambiente.adicionaAgente(agente, cenario["inicio"])
+
+    with PerfilMemoria() as perfil:
+        executar_experiencia(
+            ambiente, [agente], episodios=episodios,
+            passos_por_episodio=cenario["treino"]["passos_por_episodio"], verboso=False, perfil=perfil,
+        )
+    for chave, valor in perfil.resumo().items():
+        if chave != "topo":
+            print(f"{chave:26s} {valor:,.1f}")
+    for local in perfil.topo_total:
+        print(f"  {local['delta_bytes']:>12,} B  {local['delta_blocos']:>8,} blocos  {local['local']}")
@@ -0,0 +1,149 @@
+"""
+Política fixa (Agente._acao_fixa) tabelada por célula.
+
+A política fixa só depende da posição e do objetivo: das quatro jogadas válidas
+(dentro da grelha, sem obstáculo) ficam as que encurtam a distância de Manhattan
+ao objetivo; se nenhuma encurta, ficam todas as válidas; sem jogadas válidas, "parado".
+O agente escolhe ao acaso entre as que ficam.
+
+Para uma Grelha e um objetivo isto é uma máscara (altura, largura, 5) de ações
+candidatas, calculada uma vez com NumPy. Um agente sozinho lê a lista de candidatas
+da sua célula; uma população inteira escolhe com um gather e um desempate aleatório
+vetorizado (escolhe).
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from grelha import CacheGrelhas
+
+# pela ordem de Agente.ACOES
+ACOES = ("cima", "baixo", "esquerda", "direita", "parado")
+_DESLOCAMENTOS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+PARADO = ACOES.index("parado")
+
+Posicao = Tuple[int, int]
+
+
+def mascara_fixa(grelha, objetivo: Optional[Posicao]) -> np.ndarray:
+    """(altura, largura, 5) bool: ações candidatas da política fixa em cada célula."""
+    h, w = grelha.altura, grelha.largura
+    mascara = np.zeros((h, w, len(ACOES)), dtype=bool)
+    if objetivo is None:
+        mascara[..., PARADO] = True
+        return mascara
+
+    ys, xs = np.mgrid[0:h, 0:w]
+    ox, oy = objetivo
+    dist = np.abs(xs - ox) + np.abs(ys - oy)
+    livre = np.pad(~grelha.ocupacao, 1, constant_values=False)  # borda = fora da grelha
+
+    validas = np.empty((h, w, 4), dtype=bool)
+    aproxima = np.empty((h, w, 4), dtype=bool)
+    for a, (dx, dy) in enumerate(_DESLOCAMENTOS):
+        validas[..., a] = livre[1 + dy: 1 + dy + h, 1 + dx: 1 + dx + w]
+        aproxima[..., a] = np.abs(xs + dx - ox) + np.abs(ys + dy - oy) < dist
+
+    gulosas = validas & aproxima
+    sem_gulosas = ~gulosas.any(axis=2, keepdims=True)
+    mascara[..., :4] = np.where(sem_gulosas, validas, gulosas)
+    mascara[..., PARADO] = ~validas.any(axis=2)
+    return mascara
+
+
+class TabelaFixa:
+    """Máscara da política fixa para (grelha, objetivo), com as vistas que cada caminho usa."""
+
+    __slots__ = ("grelha", "objetivo", "mascara", "plana", "unica", "n_candidatas", "candidatas")
+
+    def __init__(self, grelha, objetivo: Optional[Posicao]):
+        self.grelha = grelha
+        self.objetivo = objetivo
+        self.mascara = mascara_fixa(grelha, objetivo)
+        # índices planos i = y * largura + x, como em avaliacao.tabela_transicoes
+        self.plana = self.mascara.reshape(-1, len(ACOES))
+        self.n_candidatas = self.plana.sum(axis=1)
+        self.unica = np.argmax(self.plana, axis=1)
+        # caminho escalar: listas de nomes por [y][x] (indexar listas é mais barato que arrays)
+        self.candidatas: List[List[Tuple[str, ...]]] = [
+            [tuple(ACOES[a] for a in np.flatnonzero(celula)) for celula in linha] for linha in self.mascara
+        ]
+
+    def escolhe(self, celulas: np.ndarray, gerador: np.random.Generator) -> np.ndarray:
+        """
+        Índice da ação (em ACOES) para cada célula plana: gather da máscara e, onde há mais
+        de uma candidata, a de maior sorteio uniforme entre as candidatas.
+        """
+        acoes = self.unica[celulas]
+        empatadas = self.n_candidatas[celulas] > 1
+        if empatadas.any():
+            sorteio = gerador.random((int(empatadas.sum()), len(ACOES))) * self.plana[celulas[empatadas]]
+            acoes[empatadas] = np.argmax(sorteio, axis=1)
+        return acoes
+
+
+# (grelha, objetivo) -> TabelaFixa, limitada como cenarios.compila_grelha (a grelha é imutável)
+_tabelas = CacheGrelhas(maximo=64)
+
+
+def tabela_fixa(grelha, objetivo: Optional[Posicao]) -> TabelaFixa:
+    return _tabelas.obtem(grelha, objetivo, TabelaFixa)
+
+
+# --------------------------------------------------------------
+#   Benchmark
+# --------------------------------------------------------------
+
+def benchmark(n: int = 100_000, passos: int = 5, seed: int = 0):
+    """
+    Decisões por segundo da política fixa para n agentes no labirinto:
+      ciclo:    Agente._acao_fixa sem grelha na observação (set dos obstáculos a cada decisão, o que havia)
+      tabela:   Agente._acao_fixa com a grelha (lista de candidatas da célula)
+      vetorial: TabelaFixa.escolhe para a população toda
+    """
+    import time
+
+    from agente import Agente
+    from cenarios import CENARIO_LABIRINTO, constroi_ambiente, normaliza_cenario
+
+    cenario = normaliza_cenario(CENARIO_LABIRINTO)
+    ambiente = constroi_ambiente(cenario, "teste", rng=seed)
+    grelha = ambiente.compila()
+    rng = np.random.default_rng(seed)
+    livres = np.flatnonzero(~grelha.ocupacao.ravel())
+    celulas = livres[rng.integers(len(livres), size=n)]
+    ys, xs = np.divmod(celulas, grelha.largura)
+    posicoes = list(zip(xs.tolist(), ys.tolist()))
+    agente = Agente("bench", tipo_politica="fixa", rng=seed)
+
+    def por_agente(obs_base):
+        t0 = time.perf_counter()
+        for _ in range(passos):
+            for pos in posicoes:
+                agente.posicao = pos
+                agente._acao_fixa(dict(obs_base, posicao_agente=pos))
+        return time.perf_counter() - t0
+
+    obs = ambiente.observacaoPara(agente)
+    t_ciclo = por_agente(dict(obs, grelha=None))
+    t_tabela = por_agente(obs)
+
+    tabela = tabela_fixa(grelha, grelha.objetivos[0])
+    t0 = time.perf_counter()
+    for _ in range(passos):
+        acoes = tabela.escolhe(celulas, rng)
+    t_vetorial = time.perf_counter() - t0
+
+    decisoes = n * passos
+    return {
+        "agentes": n,
+        "decisoes_s_ciclo": decisoes / t_ciclo,
+        "decisoes_s_tabela": decisoes / t_tabela,
+        "decisoes_s_vetorial": decisoes / t_vetorial,
+        "acoes_validas": bool(tabela.plana[celulas, acoes].all()),
+    }
+
+
+if __name__ == "__main__":
+    for chave, valor in benchmark().items():
+        print(f"{chave:22s} {valor:,.2f}" if isinstance(valor, float) else f"{chave:22s} {valor}")
@@ -0,0 +1,505 @@
+"""
+População de agentes em colunas NumPy (struct-of-arrays), para multidões de 10^5 agentes.
+
+Um Agente tem ~20 atributos, listas de histórico, caixa de entrada e Q-table próprios;
+com 100 mil agentes de política fixa a memória vai quase toda nisso. Aqui cada campo
+é uma coluna (posição, política, recompensa, contadores) e o agente i é uma vista
+leve, AgenteVista(populacao, i), com a interface de AgenteBase/Agente que o Ambiente,
+o motor (motor.py) e o Simulador usam. As vistas não guardam estado: duas vistas do
+mesmo índice são iguais.
+
+O que não cabe em colunas fica em dicionários esparsos (só para quem os usa):
+sensores instalados e caixas de entrada. A aprendizagem fica no Agente; a população
+corre a política fixa ou uma Q-table partilhada por todos (em teste).
+
+Populacao.aplica faz o passo de todos os agentes de uma vez, com as regras de
+Ambiente.agir tabeladas por (célula, ação) (avaliacao.tabela_transicoes), e
+Populacao.escolhe_acoes decide por todos com as políticas tabeladas por célula
+(politica_fixa.py e avaliacao.politica_gulosa): Populacao.passo junta as duas.
+"""
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agente import Agente, AgenteBase
+from aleatorio import fluxo
+from politica_fixa import tabela_fixa
+
+POLITICAS = ("fixa", "qlearning")
+
+
+class Populacao:
+    def __init__(
+        self,
+        n: int,
+        prefixo: str = "Agente_",
+        tipo_politica: str = "fixa",
+        modo: str = "test",
+        q_table: Optional[Dict[Any, Dict[str, float]]] = None,
+        rng=None,
+    ):
+        """
+        tipo_politica: "fixa" ou "qlearning" (com q_table partilhada, só leitura); pode ser mudada
+        por agente na coluna politica (índices em POLITICAS).
+        """
+        if tipo_politica not in POLITICAS:
+            raise ValueError(f"Política {tipo_politica!r} não suportada numa população; usar {POLITICAS}")
+        self.n = n
+        self.prefixo = prefixo
+        self.modo = modo
+        self.q_table: Dict[Any, Dict[str, float]] = q_table if q_table is not None else {}
+        # um fluxo para a população toda (as vistas partilham-no)
+        self.rng = fluxo(rng)
+
+        # ---------- colunas ----------
+        self.x = np.zeros(n, dtype=np.int32)
+        self.y = np.zeros(n, dtype=np.int32)
+        self.politica = np.full(n, POLITICAS.index(tipo_politica), dtype=np.uint8)
+        self.recompensa_total = np.zeros(n)
+        self.passos = np.zeros(n, dtype=np.int32)
+        self.colisoes = np.zeros(n, dtype=np.int32)
+        self.decisoes_erradas = np.zeros(n, dtype=np.int32)
+        self.soma_distancias = np.zeros(n)
+        self.n_distancias = np.zeros(n, dtype=np.int32)
+        # NaN faz de None
+        self.tempo_inicio_ep = np.full(n, np.nan)
+        self.tempo_fim_ep = np.full(n, np.nan)
+
+        # ---------- esparsos ----------
+        self.sensores: Dict[int, Any] = {}
+        self.caixas: Dict[int, deque] = {}
+
+        # tabelas de avaliacao.tabela_transicoes para a última grelha usada em aplica
+        self._transicoes: Optional[Tuple[Any, Tuple[np.ndarray, ...]]] = None
+        # (grelha, q_table, empates planos) de avaliacao.politica_gulosa para os agentes "qlearning"
+        self._gulosa: Optional[Tuple[Any, Any, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> "AgenteVista":
+        if not -self.n <= i < self.n:
+            raise IndexError(f"Agente {i} fora de 0..{self.n - 1}")
+        return AgenteVista(self, i % self.n)
+
+    def __iter__(self) -> Iterator["AgenteVista"]:
+        return (AgenteVista(self, i) for i in range(self.n))
+
+    def nbytes(self) -> int:
+        """Memória das colunas (sem sensores nem caixas de entrada)."""
+        return sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+
+    # ---------- configuração ----------
+
+    def coloca(self, ambiente, posicoes: Sequence[Tuple[int, int]]) -> List["AgenteVista"]:
+        """Adiciona os n agentes ao ambiente (como Ambiente.adicionaAgente) e devolve as vistas."""
+        if len(posicoes) != self.n:
+            raise ValueError(f"São precisas {self.n} posições, foram dadas {len(posicoes)}")
+        vistas = list(self)
+        for ag, pos in zip(vistas, posicoes):
+            ambiente.adicionaAgente(ag, tuple(pos))
+        return vistas
+
+    def reset_episodio(self, instante: Optional[float] = None):
+        """Agente.reset_episodio para todos os agentes de uma vez."""
+        self.recompensa_total.fill(0.0)
+        self.passos.fill(0)
+        self.colisoes.fill(0)
+        self.decisoes_erradas.fill(0)
+        self.soma_distancias.fill(0.0)
+        self.n_distancias.fill(0)
+        self.tempo_inicio_ep.fill(time.time() if instante is None else instante)
+        self.tempo_fim_ep.fill(np.nan)
+
+    # ---------- passo vetorizado ----------
+
+    def _tabelas(self, grelha) -> Tuple[np.ndarray, ...]:
+        if self._transicoes is None or self._transicoes[0] is not grelha:
+            from avaliacao import tabela_transicoes
+
+            self._transicoes = (grelha, tabela_transicoes(grelha))
+        return self._transicoes[1]
+
+    def aplica(self, acoes: np.ndarray, ambiente) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ambiente.agir para todos os agentes (acoes: índices em Agente.ACOES, um por agente)
+        seguido de avaliacaoEstadoAtual e regista_passos. Devolve (recompensa, terminou).
+        Os termos de ambiente.modelagem usam a linha i para o agente i.
+        """
+        grelha = ambiente.compila()
+        destino, recompensa_tab, colisao = self._tabelas(grelha)
+        w = grelha.largura
+        celula = self.y.astype(np.int64) * w + self.x
+        acoes = np.asarray(acoes, dtype=np.int64)
+
+        novo = destino[celula, acoes]
+        recompensa = recompensa_tab[celula, acoes]
+        self.colisoes += colisao[celula, acoes]
+        ny, nx = np.divmod(novo, w)
+        self.x[:] = nx
+        self.y[:] = ny
+
+        chegada = np.zeros(w * grelha.altura, dtype=bool)
+        for (ox, oy) in grelha.objetivos:
+            chegada[oy * w + ox] = True
+        terminou = chegada[novo]
+        # Ambiente.passos conta uma chamada a agir por agente, como no ciclo sequencial
+        contador = ambiente.passos + np.arange(1, self.n + 1)
+        terminou |= contador >= ambiente.max_passos
+        ambiente.passos += self.n
+
+        if ambiente.modelagem:
+            linhas = np.arange(self.n)
+            for termo in ambiente.modelagem:
+                if len(termo.contagens) < self.n:
+                    termo.prepara(self.n, w, grelha.altura)
+                recompensa = recompensa + termo.termos(linhas, nx, ny)
+
+        self.recompensa_total += recompensa
+        self.passos += 1
+        if grelha.objetivos:
+            ox, oy = grelha.objetivos[0]
+            self.soma_distancias += np.abs(nx - ox) + np.abs(ny - oy)
+            self.n_distancias += 1
+        return recompensa, terminou
+
+    def _empates_gulosos(self, grelha) -> np.ndarray:
+        if self._gulosa is None or self._gulosa[0] is not grelha or self._gulosa[1] is not self.q_table:
+            from avaliacao import politica_gulosa
+
+            _, empates = politica_gulosa(self.q_table, grelha)
+            self._gulosa = (grelha, self.q_table, empates.reshape(-1, len(Agente.ACOES)))
+        return self._gulosa[2]
+
+    def escolhe_acoes(self, ambiente) -> np.ndarray:
+        """
+        Ação (índice em Agente.ACOES) de cada agente, sem ciclo Python: gather na tabela da
+        política de cada um e desempate aleatório vetorizado. A Q-table partilhada é lida uma
+        vez por grelha; se for alterada, pôr populacao._gulosa = None.
+        """
+        grelha = ambiente.compila()
+        celulas = self.y.astype(np.int64) * grelha.largura + self.x
+        objetivo = grelha.objetivos[0] if grelha.objetivos else None
+        gerador = self.rng.gerador
+
+        fixa = self.politica == POLITICAS.index("fixa")
+        if fixa.all():
+            return tabela_fixa(grelha, objetivo).escolhe(celulas, gerador)
+
+        acoes = np.empty(self.n, dtype=np.int64)
+        if fixa.any():
+            acoes[fixa] = tabela_fixa(grelha, objetivo).escolhe(celulas[fixa], gerador)
+        gulosos = ~fixa
+        empates = self._empates_gulosos(grelha)[celulas[gulosos]]
+        acoes[gulosos] = np.argmax(gerador.random(empates.shape) * empates, axis=1)
+        return acoes
+
+    def passo(self, ambiente) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """escolhe_acoes + aplica; devolve (acoes, recompensa, terminou)."""
+        acoes = self.escolhe_acoes(ambiente)
+        recompensa, terminou = self.aplica(acoes, ambiente)
+        return acoes, recompensa, terminou
+
+    # ---------- métricas ----------
+
+    def metricas(self, objetivo: Optional[Tuple[int, int]] = None) -> Dict[str, np.ndarray]:
+        """Agente.calculo_metricas em colunas (um valor por agente)."""
+        passos = self.passos
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = np.where(passos > 0, self.recompensa_total / np.maximum(passos, 1), 0.0)
+            distancia = np.where(
+                self.n_distancias > 0, self.soma_distancias / np.maximum(self.n_distancias, 1), 0.0
+            )
+        if objetivo is not None:
+            sucesso = ((self.x == objetivo[0]) & (self.y == objetivo[1])).astype(float)
+        else:
+            sucesso = np.zeros(self.n)
+        return {
+            "recompensa_total": self.recompensa_total.copy(),
+            "passos_total": passos.copy(),
+            "media_recompensa_por_passo": media,
+            "taxa_sucesso": sucesso,
+            "tempo_medio_por_episodio": np.nan_to_num(self.tempo_fim_ep - self.tempo_inicio_ep),
+            "colisoes": self.colisoes.copy(),
+            "distancia_media_ao_objetivo": distancia,
+            "decisoes_erradas": self.decisoes_erradas.copy(),
+        }
+
+
+def _tempo(valor: float) -> Optional[float]:
+    return None if np.isnan(valor) else float(valor)
+
+
+class AgenteVista(AgenteBase):
+    """Agente i de uma Populacao: lê e escreve nas colunas, sem estado próprio."""
+
+    __slots__ = ("populacao", "indice")
+    ACOES = Agente.ACOES
+
+    # sem codificador nem exploração: Agente._estado_from_obs/_acao_fixa funcionam sobre a vista
+    codificador = None
+    last_state = None
+    last_action = None
+
+    def __init__(self, populacao: Populacao, indice: int):
+        self.populacao = populacao
+        self.indice = indice
+
+    def __eq__(self, outro):
+        return (
+            isinstance(outro, AgenteVista) and outro.populacao is self.populacao and outro.indice == self.indice
+        )
+
+    def __hash__(self):
+        return hash((id(self.populacao), self.indice))
+
+    def __repr__(self):
+        return f"AgenteVista({self.nome!r})"
+
+    # ---------- atributos de Agente ----------
+
+    @property
+    def nome(self) -> str:
+        return f"{self.populacao.prefixo}{self.indice}"
+
+    @property
+    def posicao(self) -> Tuple[int, int]:
+        p, i = self.populacao, self.indice
+        return int(p.x[i]), int(p.y[i])
+
+    @posicao.setter
+    def posicao(self, valor: Tuple[int, int]):
+        p, i = self.populacao, self.indice
+        p.x[i], p.y[i] = valor
+
+    @property
+    def tipo_politica(self) -> str:
+        return POLITICAS[self.populacao.politica[self.indice]]
+
+    @property
+    def modo(self) -> str:
+        return self.populacao.modo
+
+    @property
+    def rng(self):
+        return self.populacao.rng
+
+    @property
+    def q_table(self):
+        return self.populacao.q_table
+
+    @property
+    def sensor(self):
+        return self.populacao.sensores.get(self.indice)
+
+    @property
+    def recompensa_total(self) -> float:
+        return float(self.populacao.recompensa_total[self.indice])
+
+    @property
+    def historico_colisoes(self) -> int:
+        return int(self.populacao.colisoes[self.indice])
+
+    @property
+    def historico_decisoes_erradas(self) -> int:
+        return int(self.populacao.decisoes_erradas[self.indice])
+
+    @property
+    def tempo_inicio_ep(self) -> Optional[float]:
+        return _tempo(self.populacao.tempo_inicio_ep[self.indice])
+
+    @tempo_inicio_ep.setter
+    def tempo_inicio_ep(self, valor: Optional[float]):
+        self.populacao.tempo_inicio_ep[self.indice] = np.nan if valor is None else valor
+
+    @property
+    def tempo_fim_ep(self) -> Optional[float]:
+        return _tempo(self.populacao.tempo_fim_ep[self.indice])
+
+    @tempo_fim_ep.setter
+    def tempo_fim_ep(self, valor: Optional[float]):
+        self.populacao.tempo_fim_ep[self.indice] = np.nan if valor is None else valor
+
+    # ---------- interface de base ----------
+
+    def age(self, obs):
+        if self.populacao.politica[self.indice] == 0:
+            return Agente._acao_fixa(self, obs)
+        # Q-table partilhada, gulosa com desempate aleatório (estados novos: tudo empatado)
+        acoes_estado = self.populacao.q_table.get(Agente._estado_from_obs(self, obs))
+        if not acoes_estado:
+            return self.rng.choice(self.ACOES)
+        melhor_q = max(acoes_estado.values())
+        return self.rng.choice([a for a, q in acoes_estado.items() if q == melhor_q])
+
+    def avaliacaoEstadoAtual(self, recompensa: float):
+        self.populacao.recompensa_total[self.indice] += recompensa
+
+    def instala(self, sensor):
+        self.populacao.sensores[self.indice] = sensor
+
+    def _caixa(self) -> deque:
+        caixa = self.populacao.caixas.get(self.indice)
+        if caixa is None:
+            caixa = self.populacao.caixas[self.indice] = deque(maxlen=64)
+        return caixa
+
+    def comunica(self, mensagem: str, de_agente: AgenteBase):
+        self._caixa().append((getattr(de_agente, "nome", None), mensagem))
+
+    def recebe_mensagens(self, lote):
+        self._caixa().extend((getattr(m.de, "nome", None), m.conteudo) for m in lote)
+
+    def le_mensagens(self) -> List[Tuple[Any, Any]]:
+        caixa = self.populacao.caixas.pop(self.indice, None)
+        return list(caixa) if caixa else []
+
+    # ---------- ciclo / métricas (mesmos nomes que Agente) ----------
+
+    def update_transition(self, next_obs, recompensa: float, terminou: bool):
+        """A população não aprende (ver docstring do módulo)."""
+
+    def regista_passos(self, acao, pos_antiga, pos_nova, objetivo=None):
+        p, i = self.populacao, self.indice
+        if pos_nova is not None:
+            p.passos[i] += 1
+            if objetivo is not None:
+                p.soma_distancias[i] += abs(pos_nova[0] - objetivo[0]) + abs(pos_nova[1] - objetivo[1])
+                p.n_distancias[i] += 1
+        if pos_antiga is not None and pos_antiga == pos_nova and acao in ("cima", "baixo", "esquerda", "direita"):
+            p.colisoes[i] += 1
+        if acao is None:
+            p.decisoes_erradas[i] += 1
+
+    def regista_desempenho(self, obs, acao, recompensa):
+        pass
+
+    def reset_recompensa(self):
+        self.populacao.recompensa_total[self.indice] = 0.0
+
+    def reset_episodio(self, instante: Optional[float] = None):
+        p, i = self.populacao, self.indice
+        p.recompensa_total[i] = 0.0
+        p.passos[i] = p.colisoes[i] = p.decisoes_erradas[i] = p.n_distancias[i] = 0
+        p.soma_distancias[i] = 0.0
+        p.tempo_inicio_ep[i] = time.time() if instante is None else instante
+        p.tempo_fim_ep[i] = np.nan
+
+    def calculo_metricas(self, objetivo: Optional[Tuple[int, int]] = None) -> Dict[str, float]:
+        p, i = self.populacao, self.indice
+        passos = int(p.passos[i])
+        inicio, fim = self.tempo_inicio_ep, self.tempo_fim_ep
+        return {
+            "recompensa_total": self.recompensa_total,
+            "passos_total": passos,
+            "media_recompensa_por_passo": self.recompensa_total / passos if passos > 0 else 0.0,
+            "taxa_sucesso": 1.0 if objetivo is not None and self.posicao == objetivo else 0.0,
+            "tempo_medio_por_episodio": fim - inicio if inicio is not None and fim is not None else 0.0,
+            "colisoes": self.historico_colisoes,
+            "distancia_media_ao_objetivo": (
+                float(p.soma_distancias[i]) / int(p.n_distancias[i]) if p.n_distancias[i] else 0.0
+            ),
+            "decisoes_erradas": self.historico_decisoes_erradas,
+        }
+
+
+# --------------------------------------------------------------
+#   Benchmark: objeto por agente vs colunas
+# --------------------------------------------------------------
+
+def benchmark(n: int = 100_000, passos: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """
+    Memória (tracemalloc) para criar n agentes de política fixa e pô-los no ambiente,
+    e passos de agente por segundo para o mesmo passo (agir + avaliacaoEstadoAtual +
+    regista_passos, ações sorteadas antes) com:
+      objetos: um Agente por agente (o que havia)
+      vistas:  AgenteVista da população pelo mesmo ciclo Python
+      colunas: Populacao.aplica
+    """
+    import tracemalloc
+
+    from cenarios import CENARIO_LABIRINTO, constroi_ambiente, normaliza_cenario
+
+    cenario = normaliza_cenario(CENARIO_LABIRINTO)
+    rng = np.random.default_rng(seed)
+
+    def ambiente_novo():
+        amb = constroi_ambiente(cenario, "teste", rng=seed)
+        amb.max_passos = np.iinfo(np.int64).max
+        return amb
+
+    grelha = ambiente_novo().compila()
+    livres = np.argwhere(~grelha.ocupacao)
+    inicios = [(int(x), int(y)) for y, x in livres[rng.integers(len(livres), size=n)]]
+    acoes = rng.integers(len(Agente.ACOES), size=(passos, n))
+
+    def memoria(cria):
+        tracemalloc.start()
+        objetos = cria()
+        usado = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return usado, objetos
+
+    def cria_objetos():
+        amb = ambiente_novo()
+        for i, pos in enumerate(inicios):
+            amb.adicionaAgente(Agente(f"Agente_{i}", tipo_politica="fixa", rng=i), pos)
+        return amb, amb.agentes
+
+    def cria_populacao():
+        amb = ambiente_novo()
+        pop = Populacao(n, rng=seed)
+        pop.coloca(amb, inicios)
+        return amb, pop
+
+    mem_objetos, (amb_obj, agentes) = memoria(cria_objetos)
+    mem_pop, (amb_pop, pop) = memoria(cria_populacao)
+    mem_colunas = pop.nbytes()
+
+    objetivo = grelha.objetivos[0]
+
+    def ciclo(amb, ags):
+        t0 = time.perf_counter()
+        for linha in acoes:
+            for ag, a in zip(ags, linha.tolist()):
+                acao = Agente.ACOES[a]
+                pos_antiga = ag.posicao
+                recompensa, _ = amb.agir(acao, ag)
+                ag.avaliacaoEstadoAtual(recompensa)
+                ag.regista_passos(acao, pos_antiga, ag.posicao, objetivo)
+        return time.perf_counter() - t0
+
+    t_objetos = ciclo(amb_obj, agentes)
+    t_vistas = ciclo(amb_pop, amb_pop.agentes)
+    total_vistas = pop.recompensa_total.copy()
+
+    amb_pop.reset()
+    pop.reset_episodio()
+    t0 = time.perf_counter()
+    for linha in acoes:
+        pop.aplica(linha, amb_pop)
+    t_colunas = time.perf_counter() - t0
+
+    referencia = np.array([ag.recompensa_total for ag in agentes])
+    passos_agente = n * passos
+    return {
+        "agentes": n,
+        "memoria_objetos_mb": mem_objetos / 2 ** 20,
+        "memoria_populacao_mb": mem_pop / 2 ** 20,
+        "memoria_colunas_mb": mem_colunas / 2 ** 20,
+        "bytes_por_agente_objetos": mem_objetos / n,
+        "bytes_por_agente_colunas": mem_colunas / n,
+        "passos_s_objetos": passos_agente / t_objetos,
+        "passos_s_vistas": passos_agente / t_vistas,
+        "passos_s_colunas": passos_agente / t_colunas,
+        "mesmo_resultado": bool(
+            np.allclose(referencia, total_vistas) and np.allclose(referencia, pop.recompensa_total)
+        ),
+    }
+
+
+if __name__ == "__main__":
+    for chave, valor in benchmark().items():
+        print(f"{chave:28s} {valor:,.2f}" if isinstance(valor, float) else f"{chave:28s} {valor}")
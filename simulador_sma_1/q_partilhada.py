@@ -0,0 +1,372 @@
+"""
+Q-table partilhada entre processos.
+
+Os estados têm de ser inteiros em [0, n_estados) — usar um codificador de
+codificadores.py no Agente — e a tabela é uma matriz float64 (n_estados x 5)
+num bloco multiprocessing.shared_memory (ou num ficheiro mmap). Vários agentes,
+no mesmo processo ou em processos diferentes, leem e escrevem nos mesmos valores:
+
+    tabela = TabelaQPartilhada.cria(cod.n_estados)           # processo principal
+    ... Process(target=f, args=(tabela.descritor(), ...))
+    tabela = TabelaQPartilhada.liga(descritor)                # em cada worker
+    agente.q_table = tabela
+
+Escritas: sem locks (estilo Hogwild, n_riscas=0) ou com locks às riscas
+(o estado s usa o lock s % n_riscas), o que serializa só as escritas que caem na mesma risca.
+"""
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from agente import Agente
+
+ACOES = Agente.ACOES
+_INDICE_ACAO = {a: i for i, a in enumerate(ACOES)}
+
+
+def _liga_memoria(nome: str) -> shared_memory.SharedMemory:
+    """
+    Liga a um bloco existente. Os processos criados pelo multiprocessing partilham o
+    resource_tracker do processo principal, por isso quem apaga o bloco é só o dono (fecha()).
+    """
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)  # Python >= 3.13
+    except TypeError:
+        return shared_memory.SharedMemory(name=nome)
+
+
+class _LinhaQ:
+    """Vista de uma linha da tabela com a interface de dict {acao: q} que o Agente usa."""
+
+    __slots__ = ("_tabela", "_estado")
+
+    def __init__(self, tabela: "TabelaQPartilhada", estado: int):
+        self._tabela = tabela
+        self._estado = estado
+
+    def __getitem__(self, acao: str) -> float:
+        return float(self._tabela.valores[self._estado, _INDICE_ACAO[acao]])
+
+    def __setitem__(self, acao: str, valor: float):
+        self._tabela.escreve(self._estado, _INDICE_ACAO[acao], valor)
+
+    def get(self, acao: str, omissao: float = 0.0) -> float:
+        return self[acao] if acao in _INDICE_ACAO else omissao
+
+    def values(self) -> List[float]:
+        return self._tabela.valores[self._estado].tolist()
+
+    def items(self):
+        return zip(ACOES, self.values())
+
+    def keys(self):
+        return list(ACOES)
+
+    def __iter__(self):
+        return iter(ACOES)
+
+
+class TabelaQPartilhada:
+    def __init__(self, valores: np.ndarray, locks: Optional[List[Any]], shm=None, nome: Optional[str] = None,
+                 ficheiro: Optional[str] = None, dono: bool = False):
+        self.valores = valores
+        self.locks = locks or []
+        self.n_estados = valores.shape[0]
+        self._shm = shm
+        self._nome = nome
+        self._ficheiro = ficheiro
+        self._dono = dono
+
+    # ---------- criação / ligação ----------
+
+    @classmethod
+    def cria(
+        cls,
+        n_estados: int,
+        n_riscas: int = 64,
+        ficheiro: Optional[str] = None,
+        valor_inicial: float = 0.0,
+        contexto=None,
+    ) -> "TabelaQPartilhada":
+        """Cria a tabela (no processo principal). ficheiro=None usa shared_memory, senão um mmap nesse ficheiro."""
+        ctx = contexto or mp
+        locks = [ctx.Lock() for _ in range(n_riscas)]
+        forma = (n_estados, len(ACOES))
+
+        if ficheiro is not None:
+            valores = np.memmap(ficheiro, dtype=np.float64, mode="w+", shape=forma)
+            valores[:] = valor_inicial
+            return cls(valores, locks, ficheiro=ficheiro, dono=True)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n_estados * len(ACOES) * 8))
+        valores = np.ndarray(forma, dtype=np.float64, buffer=shm.buf)
+        valores[:] = valor_inicial
+        return cls(valores, locks, shm=shm, nome=shm.name, dono=True)
+
+    def descritor(self) -> Dict[str, Any]:
+        """O que é preciso passar a um processo (nos argumentos do Process) para ele se ligar."""
+        return {
+            "nome": self._nome,
+            "ficheiro": self._ficheiro,
+            "n_estados": self.n_estados,
+            "locks": self.locks,
+        }
+
+    @classmethod
+    def liga(cls, descritor: Dict[str, Any]) -> "TabelaQPartilhada":
+        forma = (descritor["n_estados"], len(ACOES))
+        if descritor["ficheiro"] is not None:
+            valores = np.memmap(descritor["ficheiro"], dtype=np.float64, mode="r+", shape=forma)
+            return cls(valores, descritor["locks"], ficheiro=descritor["ficheiro"])
+        shm = _liga_memoria(descritor["nome"])
+        valores = np.ndarray(forma, dtype=np.float64, buffer=shm.buf)
+        return cls(valores, descritor["locks"], shm=shm, nome=descritor["nome"])
+
+    def fecha(self):
+        """Desliga deste processo (um mmap é gravado no ficheiro); o dono também apaga a memória partilhada."""
+        if isinstance(self.valores, np.memmap):
+            self.valores.flush()
+        self.valores = None
+        if self._shm is not None:
+            self._shm.close()
+            if self._dono:
+                self._shm.unlink()
+            self._shm = None
+
+    # ---------- interface de dict (compatível com Agente.q_table) ----------
+
+    def __contains__(self, estado) -> bool:
+        # todas as linhas existem (a zero) desde o início
+        return isinstance(estado, (int, np.integer)) and 0 <= estado < self.n_estados
+
+    def __getitem__(self, estado: int) -> _LinhaQ:
+        if estado not in self:
+            raise KeyError(f"Estado {estado!r} fora do índice fixo [0, {self.n_estados}); usar um codificador inteiro")
+        return _LinhaQ(self, estado)
+
+    def __setitem__(self, estado: int, linha: Dict[str, float]):
+        for acao, valor in linha.items():
+            self.escreve(estado, _INDICE_ACAO[acao], valor)
+
+    def __len__(self) -> int:
+        return self.n_estados
+
+    def get(self, estado, omissao=None):
+        return self[estado] if estado in self else omissao
+
+    def copia_dict(self) -> Dict[int, Dict[str, float]]:
+        """Cópia num dict normal (só linhas não nulas), para guardar em pickle como as outras Q-tables."""
+        copia = np.array(self.valores)
+        return {int(s): dict(zip(ACOES, copia[s].tolist())) for s in np.flatnonzero(np.any(copia != 0.0, axis=1))}
+
+    # ---------- escritas ----------
+
+    def _lock(self, estado: int):
+        return self.locks[estado % len(self.locks)] if self.locks else None
+
+    def escreve(self, estado: int, acao: int, valor: float):
+        lock = self._lock(estado)
+        if lock is None:
+            self.valores[estado, acao] = valor
+            return
+        with lock:
+            self.valores[estado, acao] = valor
+
+    def atualiza_td(self, estado: int, acao: str, recompensa: float, prox_estado: int, alpha: float, gamma: float):
+        """Q(s,a) += alpha * (r + gamma * max Q(s') - Q(s,a)), com ler-modificar-escrever dentro do lock da risca."""
+        a = _INDICE_ACAO[acao]
+        lock = self._lock(estado)
+        if lock is not None:
+            lock.acquire()
+        try:
+            max_q_prox = self.valores[prox_estado].max()
+            q_atual = self.valores[estado, a]
+            self.valores[estado, a] = q_atual + alpha * (recompensa + gamma * max_q_prox - q_atual)
+        finally:
+            if lock is not None:
+                lock.release()
+
+
+# --------------------------------------------------------------
+#   Treino com vários processos a partilhar a tabela
+# --------------------------------------------------------------
+
+def _worker_treino(descritor, cenario, codificador_nome, episodios, indice, semente, fila):
+    from aleatorio import fluxos
+    from codificadores import cria_codificador
+    from main import executar_experiencia
+    from cenarios import constroi_ambiente
+    from sensor import SensorPosicao
+
+    rng_ambiente, rng_agente = fluxos(semente, 2)
+    tabela = None
+    try:
+        tabela = TabelaQPartilhada.liga(descritor)
+        ambiente = constroi_ambiente(cenario, "treino", rng=rng_ambiente)
+        agente = Agente.cria(
+            f"{cenario['nome']}_{indice}", modo="learn", codificador=cria_codificador(codificador_nome), rng=rng_agente
+        )
+        agente.q_table = tabela
+        agente.instala(SensorPosicao())
+        ambiente.adicionaAgente(agente, cenario["inicio"])
+
+        fase = cenario["treino"]
+        inicio = time.perf_counter()
+        historico = executar_experiencia(
+            ambiente,
+            [agente],
+            episodios=episodios,
+            passos_por_episodio=fase["passos_por_episodio"],
+            penalizar_revisitas=fase["penalizar_revisitas"],
+            verboso=False,
+        )
+        passos = sum(ep[agente.nome]["passos_total"] for ep in historico)
+        fila.put({"worker": indice, "passos": passos, "tempo_s": time.perf_counter() - inicio})
+    except Exception:
+        # sem isto o processo principal ficava à espera na fila para sempre
+        fila.put({"worker": indice, "erro": traceback.format_exc()})
+    finally:
+        if tabela is not None:
+            tabela.fecha()
+
+
+def treino_partilhado(
+    cenario: Dict[str, Any],
+    n_workers: int = 2,
+    episodios: Optional[int] = None,
+    codificador: str = "relativo+janela",
+    n_riscas: int = 64,
+    seed: int = 0,
+    espera_s: float = 600.0,
+):
+    """
+    Treina n_workers agentes em processos separados (cada um com o seu Ambiente)
+    sobre a mesma Q-table partilhada. Devolve (copia_dict da tabela, estatísticas).
+    Um erro num worker é levantado aqui como RuntimeError (com o traceback do worker),
+    tal como um worker que morra sem responder ou a falta de resposta em espera_s segundos.
+    """
+    from aleatorio import sequencia
+    from codificadores import cria_codificador
+
+    cod = cria_codificador(codificador)
+    if cod is None:
+        raise ValueError("A Q-table partilhada precisa de um codificador com estados inteiros")
+
+    ctx = mp.get_context()
+    tabela = TabelaQPartilhada.cria(cod.n_estados, n_riscas=n_riscas, contexto=ctx)
+    fila = ctx.Queue()
+    episodios = episodios or cenario["treino"]["episodios"]
+    # um fluxo por worker, todos derivados da mesma seed
+    sementes = sequencia(seed).spawn(n_workers)
+    processos = []
+    try:
+        processos = [
+            ctx.Process(
+                target=_worker_treino,
+                args=(tabela.descritor(), cenario, codificador, episodios, i, sementes[i], fila),
+                daemon=True,
+            )
+            for i in range(n_workers)
+        ]
+        inicio = time.perf_counter()
+        for p in processos:
+            p.start()
+        resultados = _recolhe(fila, processos, espera_s)
+        for p in processos:
+            p.join()
+        tempo = time.perf_counter() - inicio
+
+        passos = sum(r["passos"] for r in resultados)
+        estatisticas = {
+            "workers": n_workers,
+            "passos": passos,
+            "tempo_s": tempo,
+            "atualizacoes_por_segundo": passos / tempo if tempo > 0 else 0.0,
+        }
+        return tabela.copia_dict(), estatisticas
+    finally:
+        for p in processos:
+            if p.is_alive():
+                p.terminate()
+        tabela.fecha()
+
+
+def _recolhe(fila, processos, espera_s: float) -> List[Dict[str, Any]]:
+    """Uma mensagem por worker; um erro, um worker morto ou o fim do prazo levantam RuntimeError."""
+    resultados = []
+    limite = time.monotonic() + espera_s
+    while len(resultados) < len(processos):
+        try:
+            mensagem = fila.get(timeout=1.0)
+        except queue.Empty:
+            mortos = [p.exitcode for p in processos if p.exitcode not in (None, 0)]
+            if mortos:
+                raise RuntimeError(f"Um worker terminou com código {mortos[0]} sem responder") from None
+            if time.monotonic() > limite:
+                raise RuntimeError(f"Nenhum worker respondeu em {espera_s} s") from None
+            continue
+        if "erro" in mensagem:
+            raise RuntimeError(f"O worker {mensagem['worker']} falhou:\n{mensagem['erro']}")
+        resultados.append(mensagem)
+    return resultados
+
+
+def mede_escalabilidade(cenario: Dict[str, Any], workers=(1, 2, 4), episodios: int = 50, **kwargs) -> List[Dict[str, Any]]:
+    """Débito (atualizações/s) do treino partilhado para cada nº de workers, e eficiência face a 1 worker."""
+    linhas = []
+    base = None
+    for n in workers:
+        _, est = treino_partilhado(cenario, n_workers=n, episodios=episodios, **kwargs)
+        base = base or est["atualizacoes_por_segundo"]
+        est["aceleracao"] = est["atualizacoes_por_segundo"] / base if base else 0.0
+        est["eficiencia"] = est["aceleracao"] / n
+        linhas.append(est)
+    return linhas
+
+
+# --------------------------------------------------------------
+#   Verificação de correção sob concorrência
+# --------------------------------------------------------------
+
+def _worker_incrementa(descritor, n_incrementos, n_estados, com_locks):
+    tabela = TabelaQPartilhada.liga(descritor)
+    try:
+        for i in range(n_incrementos):
+            s = i % n_estados
+            if com_locks:
+                with tabela._lock(s):
+                    tabela.valores[s, 0] += 1.0
+            else:
+                tabela.valores[s, 0] += 1.0
+    finally:
+        tabela.fecha()
+
+
+def verifica_concorrencia(n_workers: int = 4, n_incrementos: int = 20000, n_estados: int = 8, n_riscas: int = 4):
+    """
+    Cada worker soma +1 a Q(s, 0) n_incrementos vezes. Com locks às riscas o total tem
+    de ser exato; sem locks (Hogwild) mostra quantas atualizações se perderam.
+    Devolve {"com_locks": (esperado, obtido), "sem_locks": (esperado, obtido)}.
+    """
+    ctx = mp.get_context()
+    resultado = {}
+    for nome, com_locks in (("com_locks", True), ("sem_locks", False)):
+        tabela = TabelaQPartilhada.cria(n_estados, n_riscas=n_riscas, contexto=ctx)
+        try:
+            processos = [
+                ctx.Process(target=_worker_incrementa, args=(tabela.descritor(), n_incrementos, n_estados, com_locks))
+                for _ in range(n_workers)
+            ]
+            for p in processos:
+                p.start()
+            for p in processos:
+                p.join()
+            resultado[nome] = (n_workers * n_incrementos, float(tabela.valores[:, 0].sum()))
+        finally:
+            tabela.fecha()
+    return resultado
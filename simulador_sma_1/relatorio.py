@@ -0,0 +1,317 @@
+"""
+Relatório de um lote / sweep: lê todos os <prefixo>_historico.csv de uma pasta
+(prefixo = <cenario>_<politica>_s<seed>, como os escreve cli.py) e gera em <pasta>/relatorio:
+
+  execucoes.npz            todas as linhas em colunas (config, seed, episodio, agente, métricas)
+  execucoes.parquet        o mesmo, se o pyarrow estiver instalado
+  configuracoes.csv        uma linha por configuração (cenário + política), agregada sobre as seeds
+  <config>.png             curvas de cada seed e média com IC bootstrap
+  <cenario>_<metrica>.png  sobreposição das médias de todas as configurações de um cenário
+  index.html               página estática com a tabela e as figuras
+
+Os CSV são lidos uma vez e as figuras desenhadas num ProcessPoolExecutor com o backend
+Agg. manifesto.json guarda um hash dos dados de cada figura: figuras cujos dados não
+mudaram não voltam a ser desenhadas.
+
+    python cli.py relatorio --saida resultados/lote1 --workers 4
+"""
+import csv
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+METRICAS_CURVAS = ("media_recompensa_por_passo", "taxa_sucesso")
+JANELA_FINAL = 10  # episódios do fim usados na tabela
+_PREFIXO = re.compile(r"^(?P<cenario>.+)_(?P<politica>qlearning|fixa|linear)_s(?P<seed>[^_]+)$")
+
+
+# --------------------------------------------------------------
+#   Leitura (uma passagem por ficheiro)
+# --------------------------------------------------------------
+
+def _partes(prefixo: str) -> Tuple[str, str, Optional[int]]:
+    m = _PREFIXO.match(prefixo)
+    if m is None:
+        return prefixo, "", None
+    seed = m["seed"]
+    return m["cenario"], m["politica"], int(seed) if seed.lstrip("-").isdigit() else None
+
+
+def le_historico_csv(ficheiro: str) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """(agentes, colunas) de um CSV de guardar_historico_csv; as métricas ficam float."""
+    with open(ficheiro, newline="") as f:
+        leitor = csv.reader(f)
+        cabecalho = next(leitor)
+        linhas = list(leitor)
+    colunas = dict(zip(cabecalho, zip(*linhas))) if linhas else {c: () for c in cabecalho}
+    agentes = list(dict.fromkeys(colunas.get("agente", ())))
+    saida: Dict[str, np.ndarray] = {
+        "episodio": np.asarray(colunas.get("episodio", ()), dtype=np.int64),
+        "agente": np.asarray(colunas.get("agente", ()), dtype=str),
+    }
+    for nome in cabecalho:
+        if nome not in saida:
+            saida[nome] = np.asarray(colunas[nome], dtype=float)
+    return agentes, saida
+
+
+def le_pasta(pasta: str) -> Dict[str, Any]:
+    """
+    Junta os históricos da pasta em colunas: uma entrada por linha de CSV, com
+    config ("<cenario>_<politica>"), cenario, politica e seed repetidos.
+    """
+    partes: Dict[str, List[np.ndarray]] = {}
+    metricas: List[str] = []
+    ficheiros = sorted(glob.glob(os.path.join(pasta, "*_historico.csv")))
+    for ficheiro in ficheiros:
+        prefixo = os.path.basename(ficheiro)[: -len("_historico.csv")]
+        cenario, politica, seed = _partes(prefixo)
+        _, colunas = le_historico_csv(ficheiro)
+        n = len(colunas["episodio"])
+        config = f"{cenario}_{politica}" if politica else cenario
+        extra = {
+            "config": np.full(n, config),
+            "cenario": np.full(n, cenario),
+            "politica": np.full(n, politica),
+            "seed": np.full(n, -1 if seed is None else seed, dtype=np.int64),
+            "ficheiro": np.full(n, os.path.basename(ficheiro)),
+        }
+        for nome, valores in list(extra.items()) + list(colunas.items()):
+            partes.setdefault(nome, []).append(valores)
+        metricas += [m for m in colunas if m not in ("episodio", "agente") and m not in metricas]
+    tabela = {nome: np.concatenate(valores) for nome, valores in partes.items()}
+    return {"tabela": tabela, "metricas": metricas, "ficheiros": ficheiros}
+
+
+def curvas_por_seed(tabela: Dict[str, np.ndarray], config: str, metrica: str) -> np.ndarray:
+    """(seeds x episódios) da métrica, média sobre os agentes; NaN onde uma seed tem menos episódios."""
+    linhas = tabela["config"] == config
+    ficheiros = tabela["ficheiro"][linhas]
+    episodios = tabela["episodio"][linhas]
+    valores = tabela[metrica][linhas]
+    nomes, execucao = np.unique(ficheiros, return_inverse=True)
+    n_ep = int(episodios.max()) if len(episodios) else 0
+    soma = np.zeros((len(nomes), n_ep))
+    contagem = np.zeros((len(nomes), n_ep))
+    np.add.at(soma, (execucao, episodios - 1), valores)
+    np.add.at(contagem, (execucao, episodios - 1), 1)
+    with np.errstate(invalid="ignore"):
+        return soma / contagem
+
+
+def resumo_configuracoes(tabela: Dict[str, np.ndarray], metricas: List[str]) -> List[Dict[str, Any]]:
+    linhas = []
+    for config in dict.fromkeys(tabela["config"].tolist()):
+        sel = tabela["config"] == config
+        linha: Dict[str, Any] = {
+            "config": config,
+            "cenario": str(tabela["cenario"][sel][0]),
+            "politica": str(tabela["politica"][sel][0]),
+            "execucoes": int(len(np.unique(tabela["ficheiro"][sel]))),
+            "episodios": int(tabela["episodio"][sel].max()),
+        }
+        for metrica in metricas:
+            curvas = curvas_por_seed(tabela, config, metrica)
+            linha[f"{metrica}_media"] = float(np.nanmean(curvas))
+            linha[f"{metrica}_final"] = float(np.nanmean(curvas[:, -JANELA_FINAL:]))
+        linhas.append(linha)
+    return linhas
+
+
+# --------------------------------------------------------------
+#   Figuras (correm nos workers)
+# --------------------------------------------------------------
+
+def _hash_tarefa(tarefa: Dict[str, Any]) -> str:
+    h = hashlib.sha256(json.dumps(
+        {k: v for k, v in tarefa.items() if k != "series"}, sort_keys=True, default=str
+    ).encode())
+    for nome in sorted(tarefa["series"]):
+        h.update(nome.encode())
+        h.update(np.ascontiguousarray(tarefa["series"][nome], dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def desenha_figura(tarefa: Dict[str, Any]) -> str:
+    """
+    tarefa["tipo"] == "config": um painel por métrica com as seeds (cinzento) e a média com IC;
+    "sobreposicao": uma curva média por configuração. Devolve o caminho do PNG.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from metricas import intervalo_bootstrap
+
+    series = tarefa["series"]
+    if tarefa["tipo"] == "config":
+        fig, eixos = plt.subplots(1, len(series), figsize=(5 * len(series), 3.5), squeeze=False)
+        for ax, (metrica, curvas) in zip(eixos[0], series.items()):
+            episodios = np.arange(1, curvas.shape[1] + 1)
+            for curva in curvas:
+                ax.plot(episodios, curva, color="0.7", linewidth=0.5)
+            media, inferior, superior = intervalo_bootstrap(curvas, rng=np.random.default_rng(0))
+            ax.fill_between(episodios, inferior, superior, alpha=0.3)
+            ax.plot(episodios, media, label=f"Média ({curvas.shape[0]} seeds)")
+            ax.set_title(metrica)
+            ax.set_xlabel("Episódio")
+            ax.grid(True)
+            ax.legend()
+        fig.suptitle(tarefa["titulo"])
+    else:
+        fig, ax = plt.subplots(figsize=(8, 4))
+        for config, media in series.items():
+            ax.plot(np.arange(1, len(media) + 1), media, label=config)
+        ax.set_title(tarefa["titulo"])
+        ax.set_xlabel("Episódio")
+        ax.grid(True)
+        ax.legend(fontsize="small")
+    fig.tight_layout()
+    fig.savefig(tarefa["png"])
+    plt.close(fig)
+    return tarefa["png"]
+
+
+def tarefas_figuras(tabela: Dict[str, np.ndarray], pasta_relatorio: str) -> List[Dict[str, Any]]:
+    tarefas = []
+    medias: Dict[Tuple[str, str], Dict[str, np.ndarray]] = {}
+    for config in dict.fromkeys(tabela["config"].tolist()):
+        cenario = str(tabela["cenario"][tabela["config"] == config][0])
+        series = {m: curvas_por_seed(tabela, config, m) for m in METRICAS_CURVAS if m in tabela}
+        tarefas.append({
+            "tipo": "config",
+            "titulo": config,
+            "png": os.path.join(pasta_relatorio, f"{config}.png"),
+            "series": series,
+        })
+        for metrica, curvas in series.items():
+            medias.setdefault((cenario, metrica), {})[config] = np.nanmean(curvas, axis=0)
+    for (cenario, metrica), series in medias.items():
+        if len(series) > 1:
+            tarefas.append({
+                "tipo": "sobreposicao",
+                "titulo": f"{cenario}: {metrica}",
+                "png": os.path.join(pasta_relatorio, f"{cenario}_{metrica}.png"),
+                "series": series,
+            })
+    return tarefas
+
+
+# --------------------------------------------------------------
+#   Saídas
+# --------------------------------------------------------------
+
+def guarda_colunas(tabela: Dict[str, np.ndarray], pasta_relatorio: str) -> List[str]:
+    escritos = [os.path.join(pasta_relatorio, "execucoes.npz")]
+    np.savez_compressed(escritos[0], **tabela)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return escritos
+    escritos.append(os.path.join(pasta_relatorio, "execucoes.parquet"))
+    pq.write_table(pa.table({k: v for k, v in tabela.items()}), escritos[-1])
+    return escritos
+
+
+def _celula(valor: Any) -> str:
+    return f"{valor:.4g}" if isinstance(valor, float) else html.escape(str(valor))
+
+
+def escreve_html(resumo: List[Dict[str, Any]], tarefas: List[Dict[str, Any]], ficheiro: str):
+    colunas = list(resumo[0].keys()) if resumo else []
+    partes = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Relatório</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:2px 6px;text-align:right}img{max-width:100%}</style>",
+        "</head><body><h1>Relatório</h1>",
+        f"<p>Gerado em {html.escape(time.strftime('%Y-%m-%d %H:%M:%S'))}</p>",
+        "<table><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in colunas) + "</tr>",
+    ]
+    for linha in resumo:
+        partes.append(
+            "<tr>" + "".join(
+                f"<td><a href='#{html.escape(linha['config'])}'>{_celula(linha[c])}</a></td>" if c == "config"
+                else f"<td>{_celula(linha[c])}</td>" for c in colunas
+            ) + "</tr>"
+        )
+    partes.append("</table>")
+
+    sobreposicoes = [t for t in tarefas if t["tipo"] == "sobreposicao"]
+    if sobreposicoes:
+        partes.append("<h2>Comparação</h2>")
+        for t in sobreposicoes:
+            partes.append(f"<h3>{html.escape(t['titulo'])}</h3><img src='{html.escape(os.path.basename(t['png']))}'>")
+    partes.append("<h2>Configurações</h2>")
+    for t in tarefas:
+        if t["tipo"] == "config":
+            partes.append(
+                f"<h3 id='{html.escape(t['titulo'])}'>{html.escape(t['titulo'])}</h3>"
+                f"<img src='{html.escape(os.path.basename(t['png']))}'>"
+            )
+    partes.append("</body></html>")
+    with open(ficheiro, "w", encoding="utf-8") as f:
+        f.write("\n".join(partes))
+
+
+def gera_relatorio(pasta: str, destino: Optional[str] = None, workers: int = 1, forcar: bool = False) -> Dict[str, Any]:
+    """
+    Relatório dos históricos em `pasta` (em destino, por omissão <pasta>/relatorio).
+    forcar=True volta a desenhar todas as figuras. Devolve contagens e caminhos.
+    """
+    inicio = time.perf_counter()
+    destino = destino or os.path.join(pasta, "relatorio")
+    dados = le_pasta(pasta)
+    if not dados["ficheiros"]:
+        raise ValueError(f"{pasta}: sem ficheiros *_historico.csv")
+    os.makedirs(destino, exist_ok=True)
+    tabela, metricas = dados["tabela"], dados["metricas"]
+
+    colunares = guarda_colunas(tabela, destino)
+    resumo = resumo_configuracoes(tabela, metricas)
+    with open(os.path.join(destino, "configuracoes.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(resumo[0].keys()))
+        writer.writeheader()
+        writer.writerows(resumo)
+
+    manifesto_ficheiro = os.path.join(destino, "manifesto.json")
+    manifesto: Dict[str, str] = {}
+    if os.path.exists(manifesto_ficheiro) and not forcar:
+        with open(manifesto_ficheiro, encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+    tarefas = tarefas_figuras(tabela, destino)
+    hashes = {t["png"]: _hash_tarefa(t) for t in tarefas}
+    por_desenhar = [
+        t for t in tarefas
+        if manifesto.get(os.path.basename(t["png"])) != hashes[t["png"]] or not os.path.exists(t["png"])
+    ]
+    if workers > 1 and len(por_desenhar) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(desenha_figura, por_desenhar))
+    else:
+        for t in por_desenhar:
+            desenha_figura(t)
+
+    with open(manifesto_ficheiro, "w", encoding="utf-8") as f:
+        json.dump({os.path.basename(png): h for png, h in hashes.items()}, f, indent=1)
+    index = os.path.join(destino, "index.html")
+    escreve_html(resumo, tarefas, index)
+
+    return {
+        "historicos": len(dados["ficheiros"]),
+        "configuracoes": len(resumo),
+        "figuras": len(tarefas),
+        "desenhadas": len(por_desenhar),
+        "saltadas": len(tarefas) - len(por_desenhar),
+        "colunares": colunares,
+        "index": index,
+        "tempo_s": time.perf_counter() - inicio,
+    }
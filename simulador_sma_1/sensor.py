@@ -21,8 +21,34 @@ class SensorPosicao:
         return {
             "posicao": pos,
             "objetivos": list(getattr(ambiente, "objetivos", [])),
-            "obstaculos": list(getattr(ambiente, "obstaculos", [])),
+            "obstaculos": (
+                ambiente.obstaculos_visiveis(agente)
+                if hasattr(ambiente, "obstaculos_visiveis")
+                else list(getattr(ambiente, "obstaculos", []))
+            ),
             "largura": getattr(ambiente, "largura", 0),
             "altura": getattr(ambiente, "altura", 0),
+            "grelha": getattr(ambiente, "grelha", None),
             "alcance": self.alcance,
-        }
\ No newline at end of file
+        }
+
+class SensorAssincrono:
+    """
+    Envolve outro sensor e simula uma leitura lenta (ex.: sensor remoto) com ler_async,
+    para usar com Simulador.executa_async. ler() continua disponível e não espera.
+    """
+
+    def __init__(self, sensor, atraso: float = 0.0):
+        self.sensor = sensor
+        self.atraso = atraso
+
+    def ler(self, ambiente, agente) -> Dict[str, Any]:
+        return self.sensor.ler(ambiente, agente)
+
+    async def ler_async(self, ambiente, agente) -> Dict[str, Any]:
+        # asyncio só aqui: puxa ssl e socket e o treino síncrono não precisa dele
+        import asyncio
+
+        if self.atraso > 0:
+            await asyncio.sleep(self.atraso)
+        return self.sensor.ler(ambiente, agente)
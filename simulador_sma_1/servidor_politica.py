@@ -0,0 +1,184 @@
+"""
+Servidor de políticas de teste para Simulador.executa_async.
+
+O protocolo é uma linha JSON por pedido, numa ligação TCP persistente:
+    pedido:   {"agente": "A1", "obs": {...}}
+    resposta: {"acao": "direita"}
+
+ServidorPoliticaMock responde com uma política local (por omissão a fixa do Agente)
+depois de um atraso configurável, para simular planeadores ou modelos lentos.
+AgenteRemoto pede as ações a um servidor destes.
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional
+
+from agente import Agente
+from aleatorio import fluxos
+
+# campos da observação que vão pela rede (a grelha compilada não é serializável)
+CAMPOS_OBS = ("posicao_agente", "posicao", "objetivos", "obstaculos", "largura", "altura")
+
+
+def obs_para_json(obs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: obs[k] for k in CAMPOS_OBS if k in obs}
+
+
+def obs_de_json(dados: Dict[str, Any]) -> Dict[str, Any]:
+    obs = dict(dados)
+    for k in ("posicao_agente", "posicao"):
+        if k in obs:
+            obs[k] = tuple(obs[k])
+    for k in ("objetivos", "obstaculos"):
+        if k in obs:
+            obs[k] = [tuple(p) for p in obs[k]]
+    return obs
+
+
+class ServidorPoliticaMock:
+    def __init__(
+        self,
+        politica: Optional[Callable[[Dict[str, Any]], str]] = None,
+        atraso: float = 0.0,
+        atrasos_por_agente: Optional[Dict[str, float]] = None,
+        variacao: float = 0.0,
+        host: str = "127.0.0.1",
+        porta: int = 0,
+        rng=None,
+    ):
+        """
+        atraso: segundos antes de cada resposta (mais um valor uniforme em [0, variacao]);
+        atrasos_por_agente sobrepõe-se ao atraso para os agentes indicados.
+        porta=0 escolhe uma porta livre (ver self.porta depois de inicia()).
+        rng: semente ou fluxo (ver aleatorio.py) da variação e da política fixa por omissão.
+        """
+        self.rng, rng_politica = fluxos(rng, 2)
+        self.politica = politica or Agente("servidor", tipo_politica="fixa", rng=rng_politica)._acao_fixa
+        self.atraso = atraso
+        self.atrasos_por_agente = dict(atrasos_por_agente or {})
+        self.variacao = variacao
+        self.host = host
+        self.porta = porta
+        self.pedidos = 0
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._ligacoes = set()
+
+    async def inicia(self) -> "ServidorPoliticaMock":
+        self._servidor = await asyncio.start_server(self._trata_ligacao, self.host, self.porta)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def para(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            # pedidos ainda a "pensar" (clientes que já desistiram por timeout)
+            for tarefa in list(self._ligacoes):
+                tarefa.cancel()
+            await asyncio.gather(*self._ligacoes, return_exceptions=True)
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+    async def __aenter__(self):
+        return await self.inicia()
+
+    async def __aexit__(self, *exc):
+        await self.para()
+
+    async def _trata_ligacao(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tarefa = asyncio.current_task()
+        self._ligacoes.add(tarefa)
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                pedido = json.loads(linha)
+                self.pedidos += 1
+
+                atraso = self.atrasos_por_agente.get(pedido.get("agente"), self.atraso)
+                if self.variacao > 0:
+                    atraso += self.rng.uniform(0.0, self.variacao)
+                if atraso > 0:
+                    await asyncio.sleep(atraso)
+
+                acao = self.politica(obs_de_json(pedido.get("obs", {})))
+                writer.write((json.dumps({"acao": acao}) + "\n").encode())
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError, asyncio.CancelledError):
+            pass
+        finally:
+            self._ligacoes.discard(tarefa)
+            writer.close()
+
+
+class AgenteRemoto(Agente):
+    """
+    Agente cuja política está num servidor (age_async). Se um pedido for cancelado por
+    timeout a ligação é fechada, para a resposta atrasada não ser lida no passo seguinte.
+    Em executa (síncrono) usa a política fixa local.
+    """
+
+    def __init__(self, nome: str, host: str = "127.0.0.1", porta: int = 0, **kwargs):
+        kwargs.setdefault("tipo_politica", "fixa")
+        super().__init__(nome, **kwargs)
+        self.host = host
+        self.porta = porta
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _liga(self):
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.porta)
+
+    async def age_async(self, obs) -> str:
+        await self._liga()
+        if "posicao_agente" not in obs and "posicao" not in obs:
+            obs = dict(obs, posicao_agente=self.posicao)
+        pedido = {"agente": self.nome, "obs": obs_para_json(obs)}
+        try:
+            self._writer.write((json.dumps(pedido) + "\n").encode())
+            await self._writer.drain()
+            linha = await self._reader.readline()
+        except BaseException:
+            await self.fecha()
+            raise
+        if not linha:
+            await self.fecha()
+            raise ConnectionError(f"Servidor de políticas fechou a ligação ({self.host}:{self.porta})")
+        acao = json.loads(linha)["acao"]
+        self.last_action = acao
+        return acao
+
+    async def fecha(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            self._writer = self._reader = None
+
+
+if __name__ == "__main__":
+    # demonstração: 3 agentes remotos, um deles mais lento do que o timeout
+    from ambiente import Ambiente
+    from sensor import SensorAssincrono, SensorPosicao
+    from simulador import Simulador
+
+    async def demo():
+        async with ServidorPoliticaMock(atraso=0.01, atrasos_por_agente={"lento": 0.5}) as servidor:
+            amb = Ambiente(10, 10, max_passos=60)
+            amb.adicionaObjetivo((9, 9))
+            agentes = []
+            for nome, inicio in (("A1", (0, 0)), ("A2", (0, 9)), ("lento", (9, 0))):
+                ag = AgenteRemoto(nome, porta=servidor.porta)
+                ag.instala(SensorAssincrono(SensorPosicao(), atraso=0.005))
+                amb.adicionaAgente(ag, inicio)
+                agentes.append(ag)
+            sim = Simulador.cria(amb, agentes)
+            resultado = await sim.executa_async(passos=30, timeout_por_agente=0.1)
+            for ag in agentes:
+                await ag.fecha()
+        print({k: resultado[k] for k in ("passos_executados", "recompensa_total", "timeouts", "latencia_media_s")})
+
+    asyncio.run(demo())
@@ -1,24 +1,46 @@
+from collections.abc import Collection
 from typing import List, Any, Dict, Tuple, Optional
 from ambiente import AmbienteBase
 from agente import AgenteBase
-from tqdm import trange
-import numpy as np
 import logging
+from functools import partial
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+# mapas maiores do que isto (ex.: mapa_blocos.MapaBlocos) imprimem só uma janela à volta do 1º agente
+MAX_IMPRESSAO = 60
+
+
+def _chama_agente(metodo: str, argumentos):
+    """Gancho de agente do motor que chama agente.<metodo>(*argumentos(obs, acao, r)) se existir, ignorando falhas."""
+    def gancho(motor, agente, obs, acao, recompensa, terminou):
+        f = getattr(agente, metodo, None)
+        if f is not None:
+            try:
+                f(*argumentos(obs, acao, recompensa))
+            except Exception:
+                logger.debug(f"{metodo} falhou, ignorado")
+    return gancho
+
 
 class Simulador:
     def __init__(self):
         self.ambiente: Optional[AmbienteBase] = None
         self.agentes: List[AgenteBase] = []
+        # barramento de mensagens opcional (comunicacao.BarramentoMensagens), entregue no fim de cada passo
+        self.barramento = None
 
     @classmethod
-    def cria(cls, ambiente: AmbienteBase, agentes: List[AgenteBase]):
+    def cria(cls, ambiente: AmbienteBase, agentes: List[AgenteBase], barramento=None):
         sim = cls()
         sim.ambiente = ambiente
         sim.agentes = agentes
+        sim.barramento = barramento
+        if barramento is not None:
+            for ag in agentes:
+                if getattr(ag, "barramento", None) is not barramento:
+                    barramento.inscreve(ag)
         return sim
 
     def listaAgentes(self) -> List[AgenteBase]:
@@ -65,105 +87,230 @@ class Simulador:
             return recompensa, terminou
         raise AttributeError("Ambiente não possui método 'agir'")
 
-    def executa(self, passos: int = 100, visualizar: bool = True, desconto: float = 0.99) -> Dict[str, Any]:
+    @staticmethod
+    def _acao_de(agente: AgenteBase, obs: Any) -> Any:
+        if hasattr(agente, "age"):
+            return agente.age(obs)
+        elif hasattr(agente, "agir"):
+            return agente.agir(obs)
+        elif hasattr(agente, "escolher_acao"):
+            return agente.escolher_acao(obs)
+        raise AttributeError(f"Agente {agente} não tem método age/agir/escolher_acao")
+
+    def executa(
+        self, passos: int = 100, visualizar: bool = True, desconto: float = 0.99, treinar: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Um episódio de até `passos` passos sem reset (todos observam e decidem, depois agem por ordem).
+        treinar=True faz também o update da Q-table de cada agente com update_transition.
+        """
         if self.ambiente is None:
             raise RuntimeError("Simulador sem ambiente associado.")
         if not self.agentes:
             raise RuntimeError("Simulador sem agentes.")
 
-        total_recompensa = 0.0
-        recompensas_por_passo: List[float] = []
-        passos_executados = 0
-
-        for passo in trange(passos, desc="Simulação"):
-            passos_executados += 1
-            recompensa_este_passo = 0.0
-
+        # importado aqui para o treino (que só usa o Simulador como contentor) não o carregar
+        from tqdm import tqdm
+
+        motor = self._motor(passos, visualizar, treinar)
+        barra = tqdm(total=passos, desc="Simulação")
+        motor.adiciona("fim_passo", lambda m: barra.update())
+        try:
+            ep = motor.corre_episodio(passos, reset=False)
+        finally:
+            barra.close()
+        return self._fecha_execucao(ep, visualizar, desconto)
+
+    def _motor(self, passos: int, visualizar: bool, treinar: bool):
+        """MotorEpisodios simultâneo com os ganchos de executa/executa_async (e as suas tolerâncias a falhas)."""
+        from motor import MotorEpisodios, atualiza_q, fecha_episodio
+
+        motor = MotorEpisodios(
+            self.ambiente, self.agentes, simultaneo=True,
+            observador=self._observacao_segura, agir=self._acao_segura,
+        )
+        if visualizar:
+            motor.adiciona("pre_passo", lambda m: logger.info(f"\nPasso {m.passo + 1}/{passos}"))
+        if any(hasattr(ag, "avaliacaoEstadoAtual") for ag in self.agentes):
+            motor.adiciona("pos_acao", _chama_agente("avaliacaoEstadoAtual", lambda obs, acao, r: (r,)))
+        if treinar:
+            motor.adiciona("aprende", atualiza_q)
+            # o que ficou pendente (lote do aproximador linear) entra antes de a execução acabar
+            motor.adiciona("fim_episodio", fecha_episodio)
+        if any(hasattr(ag, "regista_desempenho") for ag in self.agentes):
+            motor.adiciona("regista", _chama_agente("regista_desempenho", lambda obs, acao, r: (obs, acao, r)))
+        if hasattr(self.ambiente, "atualizacao"):
+            motor.adiciona("fim_passo", self._atualiza_ambiente)
+        if self.barramento is not None:
+            motor.adiciona("fim_passo", lambda m: self.barramento.entrega())
+        if visualizar:
+            motor.adiciona("desenha", self._desenha)
+        motor.para_quando(partial(self._objetivos_esgotados, visualizar=visualizar))
+        if callable(getattr(self.ambiente, "terminou", None)):
+            motor.para_quando(partial(self._ambiente_terminou, visualizar=visualizar))
+        return motor
+
+    def _fecha_execucao(self, ep: Dict[str, Any], visualizar: bool, desconto: float) -> Dict[str, Any]:
+        if ep["terminou"] and visualizar:
+            logger.info(f"\nUm agente atingiu condição de término no passo {ep['passos']}")
+        recompensas_por_passo = ep["recompensas_por_passo"]
+        return self._resultado(recompensas_por_passo, sum(recompensas_por_passo), ep["passos"], desconto)
+
+    # ---------- ganchos do motor (com as mesmas tolerâncias a falhas do ciclo antigo) ----------
+
+    def _observacao_segura(self, ambiente, agente: AgenteBase) -> Any:
+        try:
+            return self._obtem_observacao(agente)
+        except Exception as e:
+            logger.warning(f"Impossivel observação para agente {getattr(agente, 'nome', agente)}: {e}")
+            return None
+
+    def _acao_segura(self, acao: Any, agente: AgenteBase) -> Tuple[float, bool]:
+        try:
+            return self._aplica_acao_no_ambiente(acao, agente)
+        except Exception as e:
+            logger.error(f"Erro ao aplicar ação do agente {getattr(agente, 'nome', agente)}: {e}")
+            return 0.0, False
+
+    def _atualiza_ambiente(self, motor):
+        try:
+            self.ambiente.atualizacao()
+        except Exception:
+            logger.debug("atualizacao do ambiente falhou, ignorado")
+
+    def _desenha(self, motor):
+        try:
+            self.imprimeAmbiente()
+        except Exception:
+            logger.debug("imprimeAmbiente falhou")
+
+    def _objetivos_esgotados(self, motor, visualizar: bool) -> bool:
+        objetivos = getattr(self.ambiente, "objetivos", None)
+        # lista, conjunto ou o tuplo de um ambiente compilado (Grelha partilhada)
+        if isinstance(objetivos, Collection) and len(objetivos) == 0:
             if visualizar:
-                logger.info(f"\nPasso {passo + 1}/{passos}")
-
-            obs_dict: Dict[AgenteBase, Any] = {}
-            for agente in self.agentes:
-                try:
-                    obs = self._obtem_observacao(agente)
-                except Exception as e:
-                    logger.warning(f"Impossivel observação para agente {getattr(agente, 'nome', agente)}: {e}")
-                    obs = None
-                obs_dict[agente] = obs
-
-            acoes_dict: Dict[AgenteBase, Any] = {}
-            for agente, obs in obs_dict.items():
-                action = None
-                if hasattr(agente, "age"):
-                    action = agente.age(obs)
-                elif hasattr(agente, "agir"):
-                    action = agente.agir(obs)
-                elif hasattr(agente, "escolher_acao"):
-                    action = agente.escolher_acao(obs)
-                else:
-                    raise AttributeError(f"Agente {agente} não tem método age/agir/escolher_acao")
-                acoes_dict[agente] = action
-
-            termino_global = False
-            for agente, acao in acoes_dict.items():
-                try:
-                    recompensa, terminou = self._aplica_acao_no_ambiente(acao, agente)
-                except Exception as e:
-                    logger.error(f"Erro ao aplicar ação do agente {getattr(agente, 'nome', agente)}: {e}")
-                    recompensa, terminou = 0.0, False
-
+                logger.info(f"\nObjetivos esgotados. Pára no passo {motor.passos_executados}")
+            return True
+        return False
 
-                if hasattr(agente, "avaliacaoEstadoAtual"):
-                    try:
-                        agente.avaliacaoEstadoAtual(recompensa)
-                    except Exception:
-                        logger.debug("avaliacaoEstadoAtual falhou, ignorado")
+    def _ambiente_terminou(self, motor, visualizar: bool) -> bool:
+        try:
+            if self.ambiente.terminou():
+                if visualizar:
+                    logger.info(f"\nAmbiente reportou que terminou no passo {motor.passos_executados}")
+                return True
+        except Exception:
+            pass
+        return False
 
-                if hasattr(agente, "regista_desempenho"):
-                    try:
-                        agente.regista_desempenho(obs_dict.get(agente), acao, recompensa)
-                    except Exception:
-                        logger.debug("regista_desempenho falhou, ignorado")
+    # ---------- versão assíncrona ----------
 
-                recompensa_este_passo += float(recompensa)
-                if terminou:
-                    termino_global = True
+    async def _obtem_observacao_async(self, agente: AgenteBase, timeout: Optional[float]) -> Any:
+        """Como _obtem_observacao, mas espera por sensores com ler_async (em simultâneo, se forem vários)."""
+        import asyncio
 
-            if hasattr(self.ambiente, "atualizacao"):
-                try:
-                    self.ambiente.atualizacao()
-                except Exception:
-                    logger.debug("atualizacao do ambiente falhou, ignorado")
+        sensores = getattr(agente, 'sensores', None) or []
+        single_sensor = getattr(agente, 'sensor', None)
+        if not any(hasattr(s, "ler_async") for s in list(sensores) + [single_sensor]):
+            return self._obtem_observacao(agente)
 
-            recompensas_por_passo.append(recompensa_este_passo)
-            total_recompensa += recompensa_este_passo
+        async def ler(s):
+            try:
+                if hasattr(s, "ler_async"):
+                    return await asyncio.wait_for(s.ler_async(self.ambiente, agente), timeout)
+                return s.ler(self.ambiente, agente)
+            except Exception as e:
+                logger.debug(f"Sensor {s} falhou: {e!r}")
+                return None
 
-            if visualizar:
-                try:
-                    self.imprimeAmbiente()
-                except Exception:
-                    logger.debug("imprimeAmbiente falhou")
+        if sensores:
+            partes = await asyncio.gather(*(ler(s) for s in sensores))
+            return {f"sensor_{i}_{s.__class__.__name__}": p for i, (s, p) in enumerate(zip(sensores, partes))}
+
+        obs = await ler(single_sensor)
+        return obs if obs is not None else self.ambiente.observacaoPara(agente)
+
+    async def _acao_async(self, agente: AgenteBase, obs: Any, timeout: Optional[float], acao_omissao: Any,
+                          sincronos_em_thread: bool) -> Tuple[Any, bool, float]:
+        """Devolve (acao, excedeu_tempo, latencia_s)."""
+        import asyncio
+        import time
+
+        inicio = time.perf_counter()
+        excedeu = False
+        try:
+            if hasattr(agente, "age_async"):
+                acao = await asyncio.wait_for(agente.age_async(obs), timeout)
+            elif sincronos_em_thread:
+                acao = await asyncio.wait_for(asyncio.to_thread(self._acao_de, agente, obs), timeout)
+            else:
+                acao = self._acao_de(agente, obs)
+        except asyncio.TimeoutError:
+            acao, excedeu = acao_omissao, True
+        except Exception as e:
+            logger.warning(f"Agente {getattr(agente, 'nome', agente)} falhou a decidir: {e!r}")
+            acao = acao_omissao
+        return acao, excedeu, time.perf_counter() - inicio
+
+    async def executa_async(
+        self,
+        passos: int = 100,
+        timeout_por_agente: Optional[float] = 1.0,
+        acao_omissao: Any = "parado",
+        desconto: float = 0.99,
+        sincronos_em_thread: bool = False,
+        visualizar: bool = False,
+        treinar: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Variante de executa para agentes com políticas lentas ou externas (servidor de
+        políticas, planeador remoto, humano). Em cada passo as observações e as ações de
+        todos os agentes são pedidas em simultâneo; um agente que não responda em
+        timeout_por_agente segundos fica com acao_omissao nesse passo.
+
+        Agentes com age_async / sensores com ler_async são esperados com asyncio; os
+        restantes são chamados diretamente ou, com sincronos_em_thread=True, numa thread
+        (para age bloqueantes, como input()). O resto do passo (aplicar as ações, treinar,
+        barramento, condições de paragem, tolerância a falhas) é o mesmo motor de executa.
+
+        Uso: resultado = asyncio.run(sim.executa_async(passos=50, timeout_por_agente=0.2))
+        """
+        if self.ambiente is None:
+            raise RuntimeError("Simulador sem ambiente associado.")
+        if not self.agentes:
+            raise RuntimeError("Simulador sem agentes.")
 
-            objetivos = getattr(self.ambiente, "objetivos", None)
+        nomes = {ag: getattr(ag, "nome", str(i)) for i, ag in enumerate(self.agentes)}
+        timeouts = {nome: 0 for nome in nomes.values()}
+        latencias = {nome: 0.0 for nome in nomes.values()}
 
-            if isinstance(objetivos, (list, set)) and len(objetivos) == 0:
-                if visualizar:
-                    logger.info(f"\nObjetivos esgotados. Pára no passo {passos_executados}")
-                break
-
-            if hasattr(self.ambiente, "terminou") and callable(getattr(self.ambiente, "terminou")):
-                try:
-                    if self.ambiente.terminou():
-                        if visualizar:
-                            logger.info(f"\nAmbiente reportou que terminou no passo {passos_executados}")
-                        break
-                except Exception:
-                    pass
-
-            if termino_global:
-                if visualizar:
-                    logger.info(f"\nUm agente atingiu condição de término no passo {passos_executados}")
-                break
+        async def observa(agente):
+            try:
+                return await self._obtem_observacao_async(agente, timeout_por_agente)
+            except Exception as e:
+                logger.warning(f"Impossivel observação para agente {nomes[agente]}: {e}")
+                return None
+
+        async def decide(agente, obs):
+            acao, excedeu, latencia = await self._acao_async(
+                agente, obs, timeout_por_agente, acao_omissao, sincronos_em_thread
+            )
+            timeouts[nomes[agente]] += excedeu
+            latencias[nomes[agente]] += latencia
+            return acao
+
+        motor = self._motor(passos, visualizar, treinar)
+        ep = await motor.corre_episodio_async(passos, reset=False, observa_async=observa, decide_async=decide)
+
+        resultado = self._fecha_execucao(ep, visualizar, desconto)
+        resultado["timeouts"] = timeouts
+        resultado["latencia_media_s"] = {nome: t / max(1, ep["passos"]) for nome, t in latencias.items()}
+        return resultado
+
+    def _resultado(
+        self, recompensas_por_passo: List[float], total_recompensa: float, passos_executados: int, desconto: float
+    ) -> Dict[str, Any]:
+        from metricas import media_movel as _media_movel, retorno_descontado
 
         sucesso_count = 0
 
@@ -180,13 +327,13 @@ class Simulador:
             except Exception:
                 pass
 
-        recompensa_descontada = sum((desconto ** t) * r for t, r in enumerate(recompensas_por_passo))
+        recompensa_descontada = float(retorno_descontado(recompensas_por_passo, desconto))
         media_movel = []
         window = 5
         if len(recompensas_por_passo) >= window:
-            media_movel = np.convolve(recompensas_por_passo, np.ones(window) / window, mode="valid").tolist()
+            media_movel = _media_movel(recompensas_por_passo, window).tolist()
 
-        return {
+        resultado = {
             "recompensa_total": total_recompensa,
             "recompensa_media_por_agente": total_recompensa / max(1, len(self.agentes)),
             "recompensa_descontada": recompensa_descontada,
@@ -195,6 +342,9 @@ class Simulador:
             "recompensas_passo_a_passo": recompensas_por_passo,
             "media_movel": media_movel
         }
+        if self.barramento is not None:
+            resultado["mensagens"] = self.barramento.estatisticas()
+        return resultado
 
     def imprimeAmbiente(self):
         print("Legenda: A=Agente, O=Objetivo, R=Recurso, X=Obstáculo\n")
@@ -210,20 +360,34 @@ class Simulador:
                 print("Ambiente sem dimensão conhecida - impressão não disponivel")
                 return
 
-        objetivos = set(getattr(self.ambiente, "objetivos", []))
-        obstaculos = set(getattr(self.ambiente, "obstaculos", []))
-        recursos_attr = getattr(self.ambiente, "recursos", {})
-        recursos = set(recursos_attr.keys()) if isinstance(recursos_attr, dict) else set(recursos_attr)
-
         agentes_pos = {}
         for ag in self.agentes:
             pos = getattr(ag, "posicao", None)
             if pos is not None:
                 agentes_pos[pos] = ag
 
-        for y in range(altura):
+        x0, y0, x1, y1 = 0, 0, largura, altura
+        if largura > MAX_IMPRESSAO or altura > MAX_IMPRESSAO:
+            cx, cy = next(iter(agentes_pos), (0, 0))
+            x0 = max(0, min(cx - MAX_IMPRESSAO // 2, largura - MAX_IMPRESSAO))
+            y0 = max(0, min(cy - MAX_IMPRESSAO // 2, altura - MAX_IMPRESSAO))
+            x1, y1 = min(largura, x0 + MAX_IMPRESSAO), min(altura, y0 + MAX_IMPRESSAO)
+            print(f"Janela x {x0}..{x1 - 1}, y {y0}..{y1 - 1} de {largura}x{altura}\n")
+
+        objetivos = set(getattr(self.ambiente, "objetivos", []))
+        obstaculos_attr = getattr(self.ambiente, "obstaculos", [])
+        if hasattr(obstaculos_attr, "janela"):
+            # MapaBlocos: só os blocos da janela, sem percorrer o mapa inteiro
+            ys, xs = obstaculos_attr.janela(x0, y0, x1, y1).nonzero()
+            obstaculos = set(zip((xs + x0).tolist(), (ys + y0).tolist()))
+        else:
+            obstaculos = set(obstaculos_attr)
+        recursos_attr = getattr(self.ambiente, "recursos", {})
+        recursos = set(recursos_attr.keys()) if isinstance(recursos_attr, dict) else set(recursos_attr)
+
+        for y in range(y0, y1):
             linha = ""
-            for x in range(largura):
+            for x in range(x0, x1):
                 pos = (x, y)
                 if pos in agentes_pos:
                     linha += "A "
@@ -0,0 +1,181 @@
+"""
+Q-table do Agente: {estado: {acao: q}} com a ação gulosa em cache.
+
+TabelaQ é um dict normal (pickle, avaliacao.politica_gulosa e populacao.py leem-na
+como sempre) que guarda, por estado, o máximo da linha e o tuplo das ações empatadas
+nesse máximo. A cache é atualizada quando a linha é escrita (escreve / atualiza_td):
+se o novo valor passa o máximo fica só essa ação; se fica abaixo e a ação não era das
+melhores nada muda; nos outros casos (empate novo ou uma das melhores a descer) a
+linha é recalculada no próximo pedido. Em modo teste nada é escrito e a escolha
+gulosa é um acesso ao dict em vez de percorrer a linha a cada passo.
+
+valor_inicial é o Q das linhas novas: com um valor acima das recompensas esperadas
+(inicialização otimista) as ações ainda não tentadas parecem melhores e o agente
+experimenta-as primeiro, mesmo com epsilon baixo.
+
+As escritas têm de passar por escreve / atualiza_td (ou __setitem__ da linha toda);
+quem mexer diretamente em tabela[s][a] chama invalida(s).
+"""
+from typing import Any, Dict, Optional, Tuple
+
+# pela ordem de Agente.ACOES
+ACOES = ("cima", "baixo", "esquerda", "direita", "parado")
+
+
+class TabelaQ(dict):
+    __slots__ = ("valor_inicial", "_gulosas")
+
+    def __init__(self, linhas: Optional[Dict[Any, Dict[str, float]]] = None, valor_inicial: float = 0.0):
+        super().__init__(linhas or {})
+        self.valor_inicial = valor_inicial
+        # estado -> (máximo da linha, ações com esse valor pela ordem da linha)
+        self._gulosas: Dict[Any, Tuple[float, Tuple[str, ...]]] = {}
+
+    def __reduce__(self):
+        # a cache não viaja (pickle para os workers de afinacao.py); volta a ser calculada
+        return self.__class__, (dict(self), self.valor_inicial)
+
+    # ---------- linhas ----------
+    def linha(self, estado) -> Dict[str, float]:
+        """A linha do estado, criada com valor_inicial se for nova."""
+        linha = self.get(estado)
+        if linha is None:
+            linha = dict.fromkeys(ACOES, self.valor_inicial)
+            dict.__setitem__(self, estado, linha)
+            self._gulosas[estado] = (self.valor_inicial, ACOES)
+        return linha
+
+    def _gulosa(self, estado) -> Tuple[float, Tuple[str, ...]]:
+        gulosa = self._gulosas.get(estado)
+        if gulosa is None:
+            linha = self.linha(estado)
+            maximo = max(linha.values())
+            gulosa = self._gulosas[estado] = (maximo, tuple(a for a, q in linha.items() if q == maximo))
+        return gulosa
+
+    def melhores(self, estado) -> Tuple[str, ...]:
+        """Ações empatadas no máximo da linha (cria a linha se for nova)."""
+        return self._gulosa(estado)[1]
+
+    def maximo(self, estado) -> float:
+        return self._gulosa(estado)[0]
+
+    # ---------- escritas ----------
+    def escreve(self, estado, acao: str, valor: float):
+        self.linha(estado)[acao] = valor
+        gulosa = self._gulosas.get(estado)
+        if gulosa is None:
+            return
+        maximo, melhores = gulosa
+        if valor > maximo:
+            self._gulosas[estado] = (valor, (acao,))
+        elif valor < maximo and acao not in melhores:
+            pass
+        else:
+            del self._gulosas[estado]
+
+    def atualiza_td(self, estado, acao: str, recompensa: float, prox_estado, alpha: float, gamma: float):
+        """Q(s,a) += alpha * (r + gamma * max Q(s') - Q(s,a)), com max Q(s') da cache."""
+        q_atual = self.linha(estado)[acao]
+        max_q_prox = self.maximo(prox_estado)
+        self.escreve(estado, acao, q_atual + alpha * (recompensa + gamma * max_q_prox - q_atual))
+
+    def invalida(self, estado=None):
+        """Esquece a ação gulosa de um estado (ou de todos) depois de uma escrita direta na linha."""
+        if estado is None:
+            self._gulosas.clear()
+        else:
+            self._gulosas.pop(estado, None)
+
+    def __setitem__(self, estado, linha: Dict[str, float]):
+        dict.__setitem__(self, estado, linha)
+        self._gulosas.pop(estado, None)
+
+    def __delitem__(self, estado):
+        dict.__delitem__(self, estado)
+        self._gulosas.pop(estado, None)
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._gulosas.clear()
+
+    def clear(self):
+        dict.clear(self)
+        self._gulosas.clear()
+
+    def copia_dict(self) -> Dict[Any, Dict[str, float]]:
+        """Dict normal com as mesmas linhas, para guardar em pickle como as outras Q-tables."""
+        return dict(self)
+
+
+# --------------------------------------------------------------
+#   Benchmark
+# --------------------------------------------------------------
+
+def benchmark(episodios: int = 300, decisoes: int = 200_000, seed: int = 0):
+    """
+    Decisões gulosas por segundo (modo teste) com a lista de empates refeita a cada passo
+    (o que havia) e com a cache da TabelaQ, sobre a Q-table de um treino do labirinto;
+    e o sucesso do mesmo treino com valor_inicial 0 e otimista.
+    """
+    import time
+
+    import numpy as np
+
+    from agente import Agente
+    from aleatorio import FluxoAleatorio, fluxos
+    from cenarios import CENARIO_LABIRINTO, constroi_ambiente, normaliza_cenario
+    from main import executar_experiencia
+    from sensor import SensorPosicao
+
+    cenario = normaliza_cenario(CENARIO_LABIRINTO)
+
+    def treina(q_inicial):
+        rng_ambiente, rng_agente = fluxos(seed, 2)
+        ambiente = constroi_ambiente(cenario, "treino", rng=rng_ambiente)
+        agente = Agente.cria("bench", modo="learn", rng=rng_agente, q_inicial=q_inicial)
+        agente.instala(SensorPosicao())
+        ambiente.adicionaAgente(agente, cenario["inicio"])
+        historico = executar_experiencia(
+            ambiente, [agente], episodios=episodios,
+            passos_por_episodio=cenario["treino"]["passos_por_episodio"], verboso=False,
+        )
+        sucesso = [m["taxa_sucesso"] for ep in historico for m in ep.values()]
+        return agente, float(np.mean(sucesso)), float(np.mean(sucesso[-50:]))
+
+    agente, sucesso_zero, final_zero = treina(0.0)
+    _, sucesso_otimista, final_otimista = treina(1.0)
+
+    tabela = agente.q_table
+    estados = list(tabela)
+    sorteio = np.random.default_rng(seed).integers(len(estados), size=decisoes)
+    sequencia_estados = [estados[i] for i in sorteio]
+
+    rng = FluxoAleatorio(seed)
+    t0 = time.perf_counter()
+    for estado in sequencia_estados:
+        acoes_estado = tabela[estado]
+        melhor_q = max(acoes_estado.values())
+        rng.choice([a for a, q in acoes_estado.items() if q == melhor_q])
+    t_lista = time.perf_counter() - t0
+
+    rng = FluxoAleatorio(seed)
+    t0 = time.perf_counter()
+    for estado in sequencia_estados:
+        rng.choice(tabela.melhores(estado))
+    t_cache = time.perf_counter() - t0
+
+    return {
+        "estados": len(estados),
+        "decisoes_s_lista": decisoes / t_lista,
+        "decisoes_s_cache": decisoes / t_cache,
+        "sucesso_medio_q0": sucesso_zero,
+        "sucesso_medio_otimista": sucesso_otimista,
+        "sucesso_ultimos50_q0": final_zero,
+        "sucesso_ultimos50_otimista": final_otimista,
+    }
+
+
+if __name__ == "__main__":
+    for chave, valor in benchmark().items():
+        print(f"{chave:28s} {valor:,.3f}" if isinstance(valor, float) else f"{chave:28s} {valor}")
@@ -0,0 +1,62 @@
+"""
+Testes do simulador. Correr a partir de simulador_sma_1/:
+
+    python -m pytest -q tests
+    python -m pytest -q tests --atualiza-dourados   # regrava tests/dados/dourados.json
+
+Os módulos do simulador estão no topo do projeto (sem pacote), por isso a pasta do
+projeto entra no sys.path aqui.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PASTA_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_DADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados")
+
+if PASTA_PROJETO not in sys.path:
+    sys.path.insert(0, PASTA_PROJETO)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--atualiza-dourados",
+        action="store_true",
+        help="regrava as Q-tables de referência em tests/dados em vez de as comparar",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "processos: lança processos (multiprocessing)")
+
+
+@pytest.fixture
+def atualiza_dourados(request) -> bool:
+    return request.config.getoption("--atualiza-dourados")
+
+
+@pytest.fixture(autouse=True)
+def _pasta_temporaria(tmp_path, monkeypatch):
+    # nada de resultados/ ou q_table.pkl espalhados pelo projeto
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def grelha_aleatoria():
+    """Fábrica de Grelha aleatória: (semente, largura, altura, densidade, n_objetivos)."""
+    from grelha import Grelha
+
+    def cria(semente: int, largura: int = 8, altura: int = 6, densidade: float = 0.25, n_objetivos: int = 1):
+        gerador = np.random.default_rng(semente)
+        ocupado = gerador.random((altura, largura)) < densidade
+        ys, xs = np.nonzero(~ocupado)
+        escolha = gerador.choice(len(xs), size=min(n_objetivos, len(xs)), replace=False)
+        objetivos = [(int(xs[i]), int(ys[i])) for i in escolha]
+        for (x, y) in objetivos:
+            ocupado[y, x] = False
+        ys, xs = np.nonzero(ocupado)
+        return Grelha(largura, altura, objetivos, list(zip(xs.tolist(), ys.tolist())))
+
+    return cria
@@ -0,0 +1,147 @@
+"""Agente.update_transition, TabelaQ e escolha de ações."""
+import pickle
+
+import pytest
+
+from agente import Agente
+from tabela_q import ACOES, TabelaQ
+
+S0, S1 = (0,), (1,)
+
+
+def _agente(**kwargs) -> Agente:
+    kwargs.setdefault("modo", "learn")
+    return Agente("a", rng=0, **kwargs)
+
+
+def _transicao(agente, estado, acao, recompensa, proximo, terminou=False):
+    agente.last_state, agente.last_action = estado, acao
+    agente.update_transition(proximo, recompensa, terminou)
+
+
+@pytest.mark.parametrize("tabela", ["TabelaQ", "dict"])
+def test_update_transition_valores(tabela):
+    agente = _agente(alpha=0.5, gamma=0.9, epsilon=0.2)
+    if tabela == "dict":
+        agente.q_table = {}
+
+    # Q(s0, direita) = 0 + 0.5 * (1 + 0.9 * 0 - 0)
+    _transicao(agente, S0, "direita", 1.0, S1)
+    assert agente.q_table[S0]["direita"] == 0.5
+    assert agente.q_table[S1] == dict.fromkeys(ACOES, 0.0)
+    # Q(s1, cima) = 0 + 0.5 * (-0.21 + 0.9 * 0.5 - 0), com s' = s0
+    _transicao(agente, S1, "cima", -0.21, S0)
+    assert agente.q_table[S1]["cima"] == 0.0 + 0.5 * (-0.21 + 0.9 * 0.5 - 0.0)
+    # o epsilon decai uma vez por atualização
+    assert agente.epsilon == max(0.01, 0.2 * 0.995 * 0.995)
+
+
+def test_update_transition_terminal_limpa_ultima_transicao():
+    agente = _agente()
+    _transicao(agente, S0, "direita", 1.09, S1, terminou=True)
+    assert agente.last_state is None and agente.last_action is None
+    # sem transição anterior nada muda
+    antes = {s: dict(l) for s, l in agente.q_table.items()}
+    agente.update_transition(S0, 5.0, False)
+    assert agente.q_table == antes
+
+
+def test_update_transition_modo_teste_nao_aprende():
+    agente = _agente(modo="test")
+    _transicao(agente, S0, "direita", 1.0, S1)
+    assert agente.q_table == {}
+
+
+def test_epsilon_tem_minimo():
+    agente = _agente(epsilon=0.0101, decaimento_epsilon=0.5)
+    _transicao(agente, S0, "cima", 0.0, S1)
+    assert agente.epsilon == 0.01
+
+
+def test_q_inicial_otimista():
+    agente = _agente(q_inicial=1.0)
+    _transicao(agente, S0, "direita", 0.0, S1)
+    # max Q(s1) = 1.0 (linha nova), Q(s0, direita) = 1 + 0.5 * (0 + 0.9 * 1 - 1)
+    assert agente.q_table[S0]["direita"] == 1.0 + 0.5 * (0.0 + 0.9 * 1.0 - 1.0)
+    assert agente.q_table[S1] == dict.fromkeys(ACOES, 1.0)
+    # a ação atualizada desceu: a escolha gulosa é uma das outras
+    assert "direita" not in agente.q_table.melhores(S0)
+
+
+def test_escolha_gulosa_em_teste():
+    agente = _agente(modo="test")
+    agente.q_table = TabelaQ({S0: {"cima": 0.0, "baixo": 2.0, "esquerda": 2.0, "direita": -1.0, "parado": 0.0}})
+    escolhas = {agente._escolhe_acao(S0) for _ in range(200)}
+    assert escolhas == {"baixo", "esquerda"}
+
+
+def test_guardar_e_carregar_q_table(tmp_path):
+    agente = _agente()
+    _transicao(agente, S0, "direita", 1.0, S1)
+    ficheiro = str(tmp_path / "q.pkl")
+    agente.guardar_q_table(ficheiro)
+    with open(ficheiro, "rb") as f:
+        assert type(pickle.load(f)) is dict  # ficheiros continuam a ser dicts normais
+
+    outro = _agente(modo="test")
+    outro.carregar_q_table(ficheiro)
+    assert isinstance(outro.q_table, TabelaQ)
+    assert outro.q_table == agente.q_table
+    assert outro.q_table.melhores(S0) == ("direita",)
+
+    outro.carregar_q_table(str(tmp_path / "nao_existe.pkl"))
+    assert outro.q_table == {}
+
+
+def test_tabela_q_pickle_reconstroi_cache():
+    tabela = TabelaQ(valor_inicial=0.5)
+    tabela.escreve(S0, "baixo", 3.0)
+    copia = pickle.loads(pickle.dumps(tabela))
+    assert isinstance(copia, TabelaQ)
+    assert copia.valor_inicial == 0.5
+    assert copia == tabela
+    assert copia.melhores(S0) == ("baixo",)
+    assert copia.maximo(S1) == 0.5
+
+
+def test_tabela_q_escritas_diretas_invalidam():
+    tabela = TabelaQ()
+    assert tabela.melhores(S0) == ACOES
+    tabela[S0] = {"cima": 1.0, "baixo": 0.0, "esquerda": 1.0, "direita": 0.0, "parado": 0.0}
+    assert tabela.melhores(S0) == ("cima", "esquerda")
+    tabela[S0]["baixo"] = 5.0
+    tabela.invalida(S0)
+    assert tabela.melhores(S0) == ("baixo",)
+    tabela.update({S0: dict.fromkeys(ACOES, 0.0)})
+    assert tabela.melhores(S0) == ACOES
+    del tabela[S0]
+    assert S0 not in tabela
+
+
+def test_acao_fixa_encurrala_fica_parado():
+    from grelha import Grelha
+
+    grelha = Grelha(3, 3, [(2, 2)], [(0, 1), (1, 0)])
+    agente = Agente("a", tipo_politica="fixa", rng=0)
+    obs = {"posicao_agente": (0, 0), "objetivos": [(2, 2)], "obstaculos": list(grelha.obstaculos),
+           "largura": 3, "altura": 3}
+    assert agente._acao_fixa(obs) == "parado"
+    assert agente._acao_fixa(dict(obs, grelha=grelha)) == "parado"
+
+
+def test_linear_guarda_transicoes_de_episodio_truncado(tmp_path):
+    import numpy as np
+    from cenarios import obter_cenario
+    from main import treinar_cenario
+
+    cenario = obter_cenario("farol")[0]
+    cenario["treino"]["episodios"] = 3
+    agente, _ = treinar_cenario(cenario, tipo_politica="linear", verboso=False, graficos=False, seed=0)
+    # o farol acaba pelo limite de passos: o fim do episódio tem de esvaziar o lote
+    assert agente.aproximador._lote == []
+
+    agente.aproximador.regista(np.array([0, 1]), 0, 1.0, np.array([0, 1]), False)
+    ficheiro = str(tmp_path / "pesos.npy")
+    agente.guardar_q_table(ficheiro)
+    assert agente.aproximador._lote == []
+    assert np.array_equal(np.load(ficheiro), agente.aproximador.pesos)
@@ -0,0 +1,140 @@
+"""Recompensas de Ambiente.agir, fixadas caso a caso (pela mesma ordem de somas do código)."""
+import pytest
+
+from agente import Agente
+from ambiente import Ambiente
+from modelagem import BonusNovidade, PenalizacaoRevisitas
+
+
+def _ambiente(posicao, max_passos=50, objetivos=((4, 4),), obstaculos=((2, 1),)):
+    ambiente = Ambiente(5, 5, max_passos=max_passos, rng=0)
+    for o in objetivos:
+        ambiente.adicionaObjetivo(o)
+    for o in obstaculos:
+        ambiente.adicionaObstaculo(o)
+    agente = Agente("a", rng=0)
+    ambiente.adicionaAgente(agente, posicao)
+    return ambiente, agente
+
+
+# (posição, ação, nova posição, recompensa, terminou)
+CASOS = {
+    "aproxima": ((0, 0), "direita", (1, 0), -0.01 + 0.1, False),
+    "afasta": ((1, 0), "esquerda", (0, 0), -0.01 - 0.1, False),
+    "parado": ((1, 0), "parado", (1, 0), -0.01 - 0.2, False),
+    "acao_desconhecida": ((1, 0), None, (1, 0), -0.01 - 0.2, False),
+    "borda": ((0, 0), "cima", (0, 0), -0.01 - 0.2, False),
+    "colisao": ((1, 1), "direita", (1, 1), -0.01 - 1.0 - 0.2, False),
+    "objetivo": ((3, 4), "direita", (4, 4), -0.01 + 0.1 + 1.0, True),
+    "objetivo_por_baixo": ((4, 3), "baixo", (4, 4), -0.01 + 0.1 + 1.0, True),
+}
+
+
+@pytest.mark.parametrize("caso", sorted(CASOS))
+def test_recompensa_agir(caso):
+    posicao, acao, nova, recompensa, terminou = CASOS[caso]
+    ambiente, agente = _ambiente(posicao)
+    assert ambiente.agir(acao, agente) == (recompensa, terminou)
+    assert agente.posicao == nova
+    assert ambiente.passos == 1
+
+
+def test_limite_de_passos_termina():
+    ambiente, agente = _ambiente((0, 0), max_passos=2)
+    assert ambiente.agir("direita", agente) == (-0.01 + 0.1, False)
+    assert ambiente.agir("baixo", agente) == (-0.01 + 0.1, True)
+
+
+def test_objetivo_no_ultimo_passo():
+    ambiente, agente = _ambiente((3, 4), max_passos=1)
+    assert ambiente.agir("direita", agente) == (-0.01 + 0.1 + 1.0, True)
+
+
+def test_sem_objetivos_so_custo_base():
+    ambiente, agente = _ambiente((0, 0), objetivos=())
+    assert ambiente.agir("direita", agente) == (-0.01, False)
+    assert ambiente.agir("parado", agente) == (-0.01 - 0.2, False)
+
+
+def test_objetivo_mais_proximo_entre_varios():
+    # (0, 2) está a 2 de (0, 0) e a 6 de (4, 4): descer aproxima
+    ambiente, agente = _ambiente((0, 0), objetivos=((4, 4), (0, 2)), obstaculos=())
+    assert ambiente.agir("baixo", agente) == (-0.01 + 0.1, False)
+    assert ambiente.agir("baixo", agente) == (-0.01 + 0.1 + 1.0, True)
+
+
+def test_penalizacao_revisitas():
+    ambiente, agente = _ambiente((1, 0))
+    ambiente.adicionaModelagem(PenalizacaoRevisitas(coeficiente=0.06))
+    recompensas = [ambiente.agir("parado", agente)[0] for _ in range(3)]
+    parado = -0.01 - 0.2
+    assert recompensas == [parado + -0.06 * 0 ** 2.0, parado + -0.06 * 1 ** 2.0, parado + -0.06 * 2 ** 2.0]
+
+    ambiente.reset()
+    assert ambiente.agir("parado", agente)[0] == parado + -0.06 * 0 ** 2.0
+
+
+def test_bonus_novidade():
+    ambiente, agente = _ambiente((1, 0))
+    ambiente.adicionaModelagem(BonusNovidade(beta=0.05))
+    r1, _ = ambiente.agir("parado", agente)
+    r2, _ = ambiente.agir("parado", agente)
+    assert r1 == pytest.approx(-0.21 + 0.05)
+    assert r2 == pytest.approx(-0.21 + 0.05 / 2 ** 0.5)
+
+
+def test_proxima_posicao_fica_na_grelha():
+    ambiente, _ = _ambiente((0, 0))
+    assert ambiente._proxima_posicao((0, 0), "cima") == (0, 0)
+    assert ambiente._proxima_posicao((0, 0), "esquerda") == (0, 0)
+    assert ambiente._proxima_posicao((4, 4), "baixo") == (4, 4)
+    assert ambiente._proxima_posicao((4, 4), "direita") == (4, 4)
+    assert ambiente._proxima_posicao((2, 2), "cima") == (2, 1)
+    assert ambiente._proxima_posicao((2, 2), "baixo") == (2, 3)
+    assert ambiente._proxima_posicao((2, 2), "esquerda") == (1, 2)
+    assert ambiente._proxima_posicao((2, 2), "direita") == (3, 2)
+    assert ambiente._proxima_posicao((2, 2), "parado") == (2, 2)
+
+
+def test_reset_repoe_posicoes_e_passos():
+    ambiente, agente = _ambiente((0, 0))
+    ambiente.agir("direita", agente)
+    ambiente.reset()
+    assert agente.posicao == (0, 0)
+    assert ambiente.passos == 0
+
+
+def test_reset_depois_de_remover_e_readicionar_agentes():
+    ambiente, a = _ambiente((0, 0))
+    b, c = Agente("b", rng=0), Agente("c", rng=0)
+    ambiente.adicionaAgente(b, (1, 0))
+    ambiente.adicionaAgente(c, (2, 0))
+    ambiente.removeAgente(a)
+    ambiente.adicionaAgente(b, (3, 0))  # outra vez: só muda a posição inicial
+    ambiente.adicionaAgente(a, (0, 3))
+    assert ambiente.agentes == [b, c, a]
+
+    for ag in ambiente.agentes:
+        ag.posicao = (4, 0)
+    ambiente.reset()
+    assert [ag.posicao for ag in ambiente.agentes] == [(3, 0), (2, 0), (0, 3)]
+    with pytest.raises(ValueError):
+        ambiente.removeAgente(Agente("d", rng=0))
+
+
+def test_modelagem_grelha_grande_usa_contagens_esparsas():
+    termo = PenalizacaoRevisitas()
+    termo.prepara(2, 10_000, 10_000)
+    assert termo.esparsa
+    agente = object()
+    assert [termo.termo(agente, (9_999, 9_999)) for _ in range(3)] == [-0.06 * k ** 2.0 for k in range(3)]
+    termo.reset()
+    assert termo.termo(agente, (9_999, 9_999)) == -0.0
+
+
+def test_modelagem_linha_por_agente_e_nao_por_id():
+    termo = PenalizacaoRevisitas()
+    termo.prepara(1, 3, 3)
+    termo.termo(Agente("a", rng=0), (1, 1))  # o agente é recolhido logo a seguir
+    # um agente novo (que pode reaproveitar o id) começa sem visitas
+    assert termo.termo(Agente("b", rng=0), (1, 1)) == -0.0
@@ -0,0 +1,10 @@
+"""Orçamento de arranque: importar main não pode puxar matplotlib/pygame/tqdm (numpy sim, ver perfil_importacao.py)."""
+import pytest
+
+
+@pytest.mark.processos
+def test_orcamento_de_importacao():
+    from perfil_importacao import verifica_orcamento
+
+    ok, problemas = verifica_orcamento()
+    assert ok, problemas
@@ -0,0 +1,44 @@
+"""Cache de execuções: acertos devolvem o agente treinado e o LRU não apaga a entrada nova."""
+from cache_execucoes import CacheExecucoes
+
+
+def _treina(cache, episodios=2, seed=0):
+    from cenarios import obter_cenario
+    from main import treinar_cenario
+
+    cenario = obter_cenario("farol")[0]
+    cenario["treino"]["episodios"] = episodios
+    return treinar_cenario(cenario, verboso=False, graficos=False, seed=seed, cache=cache)
+
+
+def test_acerto_devolve_q_table_historico_e_epsilon(tmp_path):
+    cache = CacheExecucoes(str(tmp_path / "cache"))
+    agente, historico = _treina(cache)
+    assert cache.falhas == 1
+
+    outro, historico_cache = _treina(cache)
+    assert cache.acertos == 1
+    assert historico_cache == historico
+    assert outro.q_table == agente.q_table
+    assert outro.epsilon == agente.epsilon < 0.2
+
+
+def test_entrada_maior_que_o_limite_nao_se_apaga(tmp_path):
+    cache = CacheExecucoes(str(tmp_path / "cache"), max_bytes=100)
+    _treina(cache, seed=0)
+    _treina(cache, seed=1)
+    # só fica a última; a anterior saiu pelo LRU
+    assert len(cache.entradas()) == 1
+    assert cache.removidas == 1
+
+    _treina(cache, seed=1)
+    assert cache.acertos == 1
+
+
+def test_limita_remove_as_mais_antigas(tmp_path):
+    cache = CacheExecucoes(str(tmp_path / "cache"))
+    _treina(cache, seed=0)
+    _treina(cache, seed=1)
+    cache.limita(max_bytes=0)
+    assert cache.entradas() == []
+    assert cache.removidas == 2
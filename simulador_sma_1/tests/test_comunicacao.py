@@ -0,0 +1,41 @@
+"""BarramentoMensagens (comunicacao.py)."""
+from comunicacao import BarramentoMensagens
+
+
+class Caixa:
+    def __init__(self):
+        self.recebidas = []
+
+    def recebe_mensagens(self, lote):
+        self.recebidas.extend(m.conteudo for m in lote)
+
+
+def test_direta_a_agente_nao_inscrito_conta_como_descartada():
+    barramento = BarramentoMensagens()
+    a, b, fora = Caixa(), Caixa(), Caixa()
+    barramento.inscreve(a)
+    barramento.inscreve(b)
+    assert barramento.envia(a, "ola", para=b)
+    assert barramento.envia(a, "perdida", para=fora)
+    assert barramento.entrega() == 1
+    assert b.recebidas == ["ola"]
+
+    barramento.cancela(b)
+    assert barramento.envia(a, "tarde", para=b)  # b já saiu quando chega a entrega
+    assert barramento.entrega() == 0
+
+    estat = barramento.estatisticas()
+    assert (estat["enviadas"], estat["entregues"], estat["descartadas"], estat["sem_destino"]) == (3, 1, 2, 2)
+
+
+def test_caixa_cheia_descarta_as_mais_antigas():
+    barramento = BarramentoMensagens(capacidade_caixa=2)
+    a, b = Caixa(), Caixa()
+    barramento.inscreve(a)
+    barramento.inscreve(b)
+    for k in range(3):
+        barramento.envia(a, k, para=b)
+    barramento.entrega()
+    assert b.recebidas == [1, 2]
+    assert barramento.estatisticas()["descartadas"] == 1
+    assert barramento.estatisticas()["sem_destino"] == 0
@@ -0,0 +1,62 @@
+"""Tabela Q partilhada e treino com atores (lançam processos; -m "not processos" para os saltar)."""
+import pytest
+
+pytestmark = pytest.mark.processos
+
+
+def test_locks_as_riscas_nao_perdem_incrementos():
+    from q_partilhada import verifica_concorrencia
+
+    resultado = verifica_concorrencia(n_workers=2, n_incrementos=5000)
+    esperado, obtido = resultado["com_locks"]
+    assert obtido == esperado
+
+
+@pytest.mark.parametrize("nome", ["farol", "labirinto"])
+def test_ator_sincrono_igual_ao_sequencial(nome):
+    from atores import verifica_equivalencia
+    from cenarios import obter_cenario
+
+    resultado = verifica_equivalencia(obter_cenario(nome)[0], episodios=10, seed=3)
+    assert resultado["q_table_igual"]
+    assert resultado["metricas_iguais"]
+
+
+def test_treino_atores_assincrono():
+    from atores import treino_atores
+    from cenarios import obter_cenario
+
+    cenario = obter_cenario("farol")[0]
+    tabela, historico, estatisticas = treino_atores(cenario, n_atores=2, episodios=6, seed=0, espera_s=120.0)
+    assert estatisticas["episodios"] == len(historico) == 6
+    assert estatisticas["estados"] == len(tabela)
+    assert estatisticas["publicacoes"] >= 1
+    assert estatisticas["transicoes"] == sum(m["passos_total"] for ep in historico for m in ep.values())
+
+
+def test_erro_num_worker_partilhado_chega_ao_principal():
+    from cenarios import obter_cenario
+    from q_partilhada import treino_partilhado
+
+    cenario = obter_cenario("farol")[0]
+    del cenario["treino"]["passos_por_episodio"]
+    with pytest.raises(RuntimeError, match="passos_por_episodio"):
+        treino_partilhado(cenario, n_workers=2, episodios=2, espera_s=60.0)
+
+
+def test_fecha_grava_mmap_no_ficheiro(tmp_path, monkeypatch):
+    import numpy as np
+
+    from q_partilhada import ACOES, TabelaQPartilhada
+
+    despejos = []
+    flush = np.memmap.flush
+    monkeypatch.setattr(np.memmap, "flush", lambda self: despejos.append(1) or flush(self))
+
+    ficheiro = str(tmp_path / "q.bin")
+    tabela = TabelaQPartilhada.cria(3, n_riscas=2, ficheiro=ficheiro)
+    tabela.escreve(2, 1, 0.5)
+    tabela.fecha()
+    tabela.fecha()
+    assert despejos == [1]
+    assert np.fromfile(ficheiro, dtype=np.float64).reshape(3, len(ACOES))[2, 1] == 0.5
@@ -0,0 +1,67 @@
+"""
+Tempos dos caminhos quentes com pytest-benchmark (saltados se não estiver instalado).
+
+Os limites são largos de propósito (~10x o medido numa máquina de desenvolvimento):
+servem para apanhar regressões de ordem de grandeza, não para comparar máquinas.
+Para comparar entre commits: --benchmark-autosave e --benchmark-compare.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from agente import Agente
+from ambiente import Ambiente
+from tabela_q import ACOES, TabelaQ
+
+
+def _media(benchmark) -> float:
+    return benchmark.stats.stats.mean
+
+
+def test_tempo_agir(benchmark):
+    ambiente = Ambiente(10, 10, max_passos=10 ** 9, rng=0)
+    ambiente.adicionaObjetivo((9, 9))
+    ambiente.adicionaObstaculo((5, 5))
+    agente = Agente("a", rng=0)
+    ambiente.adicionaAgente(agente, (4, 4))
+
+    def passos():
+        for acao in ACOES:
+            ambiente.agir(acao, agente)
+
+    benchmark(passos)
+    assert _media(benchmark) < 200e-6
+
+
+def test_tempo_escolha_gulosa(benchmark):
+    tabela = TabelaQ()
+    for s in range(100):
+        tabela.escreve(s, ACOES[s % 5], float(s))
+
+    def escolhe():
+        for s in range(100):
+            tabela.melhores(s)
+
+    benchmark(escolhe)
+    assert _media(benchmark) < 500e-6
+
+
+def test_tempo_politica_fixa_vetorial(benchmark, grelha_aleatoria):
+    from politica_fixa import tabela_fixa
+
+    grelha = grelha_aleatoria(0, largura=32, altura=32, densidade=0.2)
+    tabela = tabela_fixa(grelha, grelha.objetivos[0])
+    gerador = np.random.default_rng(0)
+    celulas = gerador.integers(32 * 32, size=10_000)
+
+    benchmark(tabela.escolhe, celulas, gerador)
+    assert _media(benchmark) < 10e-3
+
+
+def test_tempo_tabela_transicoes(benchmark, grelha_aleatoria):
+    from avaliacao import tabela_transicoes
+
+    grelha = grelha_aleatoria(0, largura=32, altura=32, densidade=0.2)
+    benchmark(tabela_transicoes, grelha)
+    assert _media(benchmark) < 50e-3
@@ -0,0 +1,75 @@
+"""
+Q-tables de referência de treinos curtos com seed (tests/dados/dourados.json).
+
+Qualquer mudança na dinâmica, nas recompensas, na regra de atualização ou no consumo
+dos fluxos aleatórios muda estes valores. Se a mudança for intencional, regravar com
+
+    python -m pytest -q tests --atualiza-dourados
+
+e rever o diff do JSON no commit.
+"""
+import json
+import os
+
+import pytest
+
+from conftest import PASTA_DADOS
+
+FICHEIRO = os.path.join(PASTA_DADOS, "dourados.json")
+
+# nome -> (cenário, seed, episódios, codificador)
+CORRIDAS = {
+    "farol_seed0": ("farol", 0, 15, None),
+    "labirinto_seed4": ("labirinto", 4, 10, None),
+    "labirinto_janela_seed1": ("labirinto", 1, 10, "relativo+janela"),
+}
+
+METRICAS = ("recompensa_total", "passos_total", "colisoes")
+
+
+def _corre(nome_cenario, seed, episodios, codificador):
+    from cenarios import obter_cenario
+    from main import treinar_cenario
+
+    cenario = obter_cenario(nome_cenario)[0]
+    cenario["treino"]["episodios"] = episodios
+    agente, historico = treinar_cenario(cenario, verboso=False, graficos=False, seed=seed, codificador=codificador)
+    return {
+        # JSON guarda floats com repr, por isso a ida e volta é exata
+        "q_table": {repr(s): [linha[a] for a in sorted(linha)] for s, linha in agente.q_table.items()},
+        "metricas": [[ep[agente.nome][m] for m in METRICAS] for ep in historico],
+    }
+
+
+def _le():
+    if not os.path.exists(FICHEIRO):
+        return {}
+    with open(FICHEIRO, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def dourados(request):
+    dados = _le()
+    yield dados
+    if request.config.getoption("--atualiza-dourados"):
+        os.makedirs(PASTA_DADOS, exist_ok=True)
+        with open(FICHEIRO, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=1, sort_keys=True)
+            f.write("\n")
+
+
+@pytest.mark.parametrize("nome", sorted(CORRIDAS))
+def test_treino_igual_ao_dourado(nome, dourados, atualiza_dourados):
+    obtido = _corre(*CORRIDAS[nome])
+    if atualiza_dourados:
+        dourados[nome] = obtido
+        return
+    if nome not in dourados:
+        pytest.fail(f"sem referência para {nome}: correr com --atualiza-dourados")
+
+    esperado = dourados[nome]
+    assert [tuple(m) for m in obtido["metricas"]] == [tuple(m) for m in esperado["metricas"]]
+    assert obtido["q_table"].keys() == esperado["q_table"].keys()
+    diferentes = [s for s, q in obtido["q_table"].items() if q != esperado["q_table"][s]]
+    assert not diferentes, f"{len(diferentes)} estados com Q diferente, p.ex. {diferentes[:3]}"
@@ -0,0 +1,42 @@
+"""CacheGrelhas: chave na própria grelha e tamanho limitado."""
+from grelha import CacheGrelhas, Grelha
+
+
+def test_cache_grelhas_lru_limitada():
+    calculos = []
+
+    def calcula(grelha, objetivo):
+        calculos.append((grelha, objetivo))
+        return len(calculos)
+
+    cache = CacheGrelhas(maximo=2)
+    a, b, c = (Grelha(3, 3, [(2, 2)], []) for _ in range(3))
+    assert cache.obtem(a, (2, 2), calcula) == 1
+    assert cache.obtem(a, (2, 2), calcula) == 1
+    assert cache.obtem(a, (0, 0), calcula) == 2     # outro objetivo, outra entrada
+    assert cache.obtem(b, (2, 2), calcula) == 3     # grelha igual mas outro objeto
+    assert len(cache) == 2
+    assert cache.obtem(a, (2, 2), calcula) == 4     # a mais antiga saiu
+    cache.obtem(c, (2, 2), calcula)
+    assert len(cache) == 2
+
+
+def test_tabela_fixa_por_grelha_e_limitada():
+    import politica_fixa
+
+    grelhas = [Grelha(4, 4, [(3, 3)], [(1, 1)]) for _ in range(politica_fixa._tabelas.maximo + 5)]
+    tabelas = [politica_fixa.tabela_fixa(g, (3, 3)) for g in grelhas]
+    assert all(t.grelha is g for t, g in zip(tabelas, grelhas))
+    assert len(politica_fixa._tabelas) == politica_fixa._tabelas.maximo
+    assert politica_fixa.tabela_fixa(grelhas[-1], (3, 3)) is tabelas[-1]
+
+
+def test_codificador_tabela_por_grelha_e_limitada():
+    from codificadores import cria_codificador
+
+    cod = cria_codificador("relativo+janela")
+    grelhas = [Grelha(4, 4, [(3, 3)], [(k % 4, 1)]) for k in range(cod.max_grelhas + 3)]
+    for g in grelhas:
+        tabela = cod.tabela(g, (3, 3))
+        assert tabela == cod.ids_grelha(g, (3, 3)).tolist()
+    assert len(cod._cache) == cod.max_grelhas
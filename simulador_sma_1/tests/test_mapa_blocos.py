@@ -0,0 +1,23 @@
+"""MapaBlocos (mapa_blocos.py)."""
+import numpy as np
+import pytest
+
+from mapa_blocos import MapaBlocos
+
+
+@pytest.mark.parametrize("sem_bitwise_count", [False, True])
+def test_abre_conta_obstaculos_por_bloco(tmp_path, monkeypatch, sem_bitwise_count):
+    ficheiro = str(tmp_path / "mapa.bits")
+    mapa = MapaBlocos(100, 70, ficheiro=ficheiro, lado_bloco=32)
+    xs, ys = [0, 1, 31, 32, 99, 50, 50], [0, 0, 5, 5, 69, 40, 41]
+    mapa.adiciona(xs, ys)
+    mapa.guarda()
+    esperado = mapa.contagem.copy()
+
+    if sem_bitwise_count:
+        # NumPy < 2 não tem np.bitwise_count
+        monkeypatch.delattr(np, "bitwise_count", raising=False)
+    aberto = MapaBlocos.abre(ficheiro)
+    np.testing.assert_array_equal(aberto.contagem, esperado)
+    assert len(aberto) == len(xs)
+    assert sorted(aberto) == sorted(zip(xs, ys))
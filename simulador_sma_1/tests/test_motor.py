@@ -0,0 +1,63 @@
+"""MotorEpisodios com agentes e ambientes mínimos (só a interface de AgenteBase/AmbienteBase)."""
+import pytest
+
+from agente import AgenteBase
+from ambiente import AmbienteBase
+from motor import MotorEpisodios
+
+
+class AgenteMinimo(AgenteBase):
+    """Sem posicao, sensor nem Q-table: só o que AgenteBase exige."""
+
+    __slots__ = ("recompensas",)
+
+    def __init__(self):
+        self.recompensas = []
+
+    def age(self, obs):
+        return "parado"
+
+    def avaliacaoEstadoAtual(self, recompensa: float):
+        self.recompensas.append(recompensa)
+
+    def instala(self, sensor):
+        pass
+
+    def comunica(self, mensagem: str, de_agente: "AgenteBase"):
+        pass
+
+
+class AmbienteMinimo(AmbienteBase):
+    def observacaoPara(self, agente):
+        return {}
+
+    def agir(self, acao, agente):
+        return 1.0, False
+
+    def atualizacao(self):
+        pass
+
+    def verifica_objetivo_alcancado(self, agente) -> bool:
+        return False
+
+    def reset(self):
+        pass
+
+
+@pytest.mark.parametrize("simultaneo", [False, True])
+def test_agente_sem_posicao(simultaneo):
+    agentes = [AgenteMinimo(), AgenteMinimo()]
+    motor = MotorEpisodios(AmbienteMinimo(), agentes, simultaneo=simultaneo)
+    motor.adiciona("pos_acao", lambda m, ag, obs, acao, r, t: ag.avaliacaoEstadoAtual(r))
+    ep = motor.corre_episodio(3)
+    assert ep == {"recompensas_por_passo": [2.0, 2.0, 2.0], "passos": 3, "terminou": False}
+    assert motor.pos_antiga is None
+    assert all(ag.recompensas == [1.0, 1.0, 1.0] for ag in agentes)
+
+
+def test_simulador_com_agente_sem_posicao():
+    from simulador import Simulador
+
+    resultado = Simulador.cria(AmbienteMinimo(), [AgenteMinimo()]).executa(passos=4, visualizar=False)
+    assert resultado["passos_executados"] == 4
+    assert resultado["recompensa_total"] == 4.0
@@ -0,0 +1,305 @@
+"""
+Caminhos rápidos contra a implementação de referência, em grelhas aleatórias.
+
+Com hypothesis instalado as sementes vêm de @given (e os contraexemplos são reduzidos);
+sem ele cada teste corre para um conjunto fixo de sementes.
+"""
+import numpy as np
+import pytest
+
+from agente import Agente
+from ambiente import Ambiente
+from tabela_q import ACOES, TabelaQ
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:  # opcional
+    given = None
+
+
+def casos(n: int = 30):
+    """Decorador: o teste recebe `semente`, de hypothesis ou de range(n)."""
+    if given is None:
+        return pytest.mark.parametrize("semente", range(n))
+
+    def decora(teste):
+        return settings(max_examples=n, deadline=None)(given(semente=st.integers(0, 2 ** 32 - 1))(teste))
+
+    return decora
+
+
+def _dimensoes(semente):
+    gerador = np.random.default_rng(semente)
+    return int(gerador.integers(2, 12)), int(gerador.integers(2, 10)), float(gerador.uniform(0.0, 0.4))
+
+
+# ---------- dinâmica: avaliacao.tabela_transicoes / Populacao.aplica vs Ambiente.agir ----------
+
+@casos()
+def test_tabela_transicoes_igual_a_agir(grelha_aleatoria, semente):
+    from avaliacao import tabela_transicoes
+
+    largura, altura, densidade = _dimensoes(semente)
+    grelha = grelha_aleatoria(semente, largura, altura, densidade, n_objetivos=1 + semente % 2)
+    destino, recompensa, colisao = tabela_transicoes(grelha)
+
+    ambiente = Ambiente.a_partir_de_grelha(grelha, max_passos=10 ** 9)
+    agente = Agente("a", rng=0)
+    for y in range(altura):
+        for x in range(largura):
+            if (x, y) in grelha.conjunto_obstaculos:
+                continue
+            i = y * largura + x
+            for a, acao in enumerate(ACOES):
+                agente.posicao = (x, y)
+                r, _ = ambiente.agir(acao, agente)
+                assert recompensa[i, a] == r, (x, y, acao)
+                assert destino[i, a] == agente.posicao[1] * largura + agente.posicao[0]
+                assert colisao[i, a] == (agente.posicao == (x, y) and acao != "parado")
+
+
+@casos(15)
+def test_populacao_aplica_igual_a_agir(grelha_aleatoria, semente):
+    from modelagem import PenalizacaoRevisitas
+    from populacao import Populacao
+
+    largura, altura, densidade = _dimensoes(semente)
+    grelha = grelha_aleatoria(semente, largura, altura, densidade)
+    gerador = np.random.default_rng(semente)
+    livres = [(x, y) for y in range(altura) for x in range(largura) if (x, y) not in grelha.conjunto_obstaculos]
+    n = 6
+    posicoes = [livres[i] for i in gerador.integers(len(livres), size=n)]
+
+    ambiente_ref = Ambiente.a_partir_de_grelha(grelha, max_passos=25)
+    ambiente_ref.adicionaModelagem(PenalizacaoRevisitas())
+    agentes = []
+    for k, pos in enumerate(posicoes):
+        ag = Agente(f"a{k}", rng=0)
+        ambiente_ref.adicionaAgente(ag, pos)
+        agentes.append(ag)
+    ambiente_ref.modelagem[0].prepara(n, largura, altura)
+
+    ambiente = Ambiente.a_partir_de_grelha(grelha, max_passos=25)
+    ambiente.adicionaModelagem(PenalizacaoRevisitas())
+    populacao = Populacao(n, rng=0)
+    populacao.coloca(ambiente, posicoes)
+
+    for _ in range(5):
+        acoes = gerador.integers(len(ACOES), size=n)
+        esperado = [ambiente_ref.agir(ACOES[a], ag) for a, ag in zip(acoes, agentes)]
+        recompensa, terminou = populacao.aplica(acoes, ambiente)
+        assert recompensa.tolist() == [r for r, _ in esperado]
+        assert terminou.tolist() == [t for _, t in esperado]
+        assert list(zip(populacao.x.tolist(), populacao.y.tolist())) == [ag.posicao for ag in agentes]
+
+
+# ---------- caminhos: Grelha (BFS em índices planos) vs main.existe_caminho ----------
+
+@casos()
+def test_existe_caminho_igual_a_referencia(grelha_aleatoria, semente):
+    from main import existe_caminho
+
+    largura, altura, _ = _dimensoes(semente)
+    grelha = grelha_aleatoria(semente, largura, altura, densidade=0.45)
+    objetivo = grelha.objetivos[0]
+    for y in range(altura):
+        for x in range(largura):
+            if (x, y) in grelha.conjunto_obstaculos:
+                continue
+            assert grelha.existe_caminho((x, y)) == existe_caminho(
+                largura, altura, (x, y), objetivo, grelha.obstaculos
+            ), (x, y)
+
+
+# ---------- política fixa: tabela por célula vs cálculo com os obstáculos ----------
+
+@casos()
+def test_acao_fixa_tabelada_igual_ao_calculo(grelha_aleatoria, semente):
+    from politica_fixa import tabela_fixa
+
+    largura, altura, densidade = _dimensoes(semente)
+    grelha = grelha_aleatoria(semente, largura, altura, densidade)
+    objetivo = grelha.objetivos[0]
+    base = {"objetivos": [objetivo], "obstaculos": list(grelha.obstaculos), "largura": largura, "altura": altura}
+    referencia = Agente("r", tipo_politica="fixa", rng=semente)
+    rapido = Agente("f", tipo_politica="fixa", rng=semente)
+    tabela = tabela_fixa(grelha, objetivo)
+    for y in range(altura):
+        for x in range(largura):
+            if (x, y) in grelha.conjunto_obstaculos:
+                continue
+            obs = dict(base, posicao_agente=(x, y))
+            # mesma ação com o mesmo fluxo aleatório
+            a_ref = referencia._acao_fixa(dict(obs, grelha=None))
+            assert rapido._acao_fixa(dict(obs, grelha=grelha)) == a_ref
+            assert tabela.mascara[y, x, ACOES.index(a_ref)]
+
+
+# ---------- codificadores: tabela da grelha vs codifica_posicao ----------
+
+@casos(15)
+def test_codificadores_tabela_igual_a_posicao(grelha_aleatoria, semente):
+    from codificadores import CODIFICADORES
+
+    largura, altura, densidade = _dimensoes(semente)
+    grelha = grelha_aleatoria(semente, largura, altura, densidade)
+    objetivo = grelha.objetivos[0]
+    for nome, fabrica in CODIFICADORES.items():
+        cod = fabrica()
+        tabela = cod.tabela(grelha, objetivo)
+        for y in range(altura):
+            for x in range(largura):
+                if (x, y) in grelha.conjunto_obstaculos:
+                    continue
+                esperado = cod.codifica_posicao((x, y), objetivo, grelha.conjunto_obstaculos, largura, altura)
+                assert tabela[y][x] == esperado, (nome, x, y)
+
+
+@casos(15)
+def test_aproximador_ativos_cache_igual_a_posicao(grelha_aleatoria, semente, monkeypatch):
+    import aproximador_linear
+    from aproximador_linear import AproximadorLinear
+
+    largura, altura, densidade = _dimensoes(semente)
+    grelhas = [grelha_aleatoria(semente + k, largura, altura, densidade) for k in range(2)]
+    com_cache, sem_cache = AproximadorLinear(rng=0), AproximadorLinear(rng=0)
+    for grelha in grelhas:
+        objetivo = grelha.objetivos[0]
+        for y in range(altura):
+            for x in range(largura):
+                if (x, y) in grelha.conjunto_obstaculos:
+                    continue
+                obs = {"posicao_agente": (x, y), "objetivos": [objetivo], "grelha": grelha}
+                esperado = com_cache.ativos(dict(obs, grelha=None, obstaculos=list(grelha.obstaculos),
+                                                 largura=largura, altura=altura))
+                np.testing.assert_array_equal(com_cache.ativos(obs), esperado)
+                with monkeypatch.context() as m:
+                    m.setattr(aproximador_linear, "MAX_CELULAS_CACHE", 0)
+                    np.testing.assert_array_equal(sem_cache.ativos(obs), esperado)
+    # só a grelha em uso fica em cache
+    assert len(com_cache._cache) == 1 and len(sem_cache._cache) == 0
+
+
+# ---------- TabelaQ: cache incremental vs recalcular a linha ----------
+
+@casos()
+def test_tabela_q_cache_igual_a_recalcular(semente):
+    gerador = np.random.default_rng(semente)
+    tabela = TabelaQ(valor_inicial=float(gerador.choice([0.0, 1.0])))
+    estados = list(range(4))
+    for _ in range(200):
+        s = int(gerador.choice(estados))
+        if gerador.random() < 0.3:
+            tabela.atualiza_td(s, ACOES[gerador.integers(5)], float(gerador.normal()), int(gerador.choice(estados)),
+                               0.5, 0.9)
+        else:
+            # valores repetidos de propósito, para haver empates
+            tabela.escreve(s, ACOES[gerador.integers(5)], float(gerador.integers(-2, 3)))
+        for e in estados:
+            linha = tabela.linha(e)
+            maximo = max(linha.values())
+            assert tabela.maximo(e) == maximo
+            assert tabela.melhores(e) == tuple(a for a, q in linha.items() if q == maximo)
+
+
+# ---------- métricas e modelação: vetorizado vs ciclo ----------
+
+@casos(15)
+def test_retornos_descontados_igual_ao_ciclo(semente):
+    from metricas import retorno_descontado, retornos_descontados
+
+    gerador = np.random.default_rng(semente)
+    gamma = float(gerador.choice([0.0, 0.5, 0.9, 0.99, 1.0]))
+    r = gerador.normal(size=int(gerador.integers(0, 600)))
+    esperado = np.zeros_like(r)
+    g = 0.0
+    for t in range(len(r) - 1, -1, -1):
+        g = r[t] + gamma * g
+        esperado[t] = g
+    np.testing.assert_allclose(retornos_descontados(r, gamma), esperado, rtol=1e-9, atol=1e-9)
+    if len(r):
+        assert retorno_descontado(r, gamma) == pytest.approx(esperado[0], rel=1e-9, abs=1e-9)
+
+
+@casos(15)
+def test_media_movel_igual_a_convolve(semente):
+    from metricas import media_movel
+
+    gerador = np.random.default_rng(semente)
+    x = gerador.normal(size=int(gerador.integers(1, 100)))
+    janela = int(gerador.integers(1, 12))
+    esperado = np.convolve(x, np.ones(janela) / janela, mode="valid") if janela <= len(x) else np.zeros(0)
+    np.testing.assert_allclose(media_movel(x, janela), esperado, atol=1e-12)
+
+
+@casos(15)
+def test_modelagem_esparsa_igual_a_densa(semente):
+    from modelagem import BonusNovidade, PenalizacaoRevisitas
+
+    gerador = np.random.default_rng(semente)
+    n, largura, altura = 4, 6, 5
+    for classe in (PenalizacaoRevisitas, BonusNovidade):
+        densa, esparsa = classe(), classe()
+        esparsa.max_celulas_densas = 0
+        densa.prepara(n, largura, altura)
+        esparsa.prepara(n, largura, altura)
+        assert esparsa.esparsa and not densa.esparsa
+        agentes = [object() for _ in range(n + 2)]  # mais agentes que linhas: as linhas crescem
+        for _ in range(20):
+            ag = agentes[int(gerador.integers(len(agentes)))]
+            pos = (int(gerador.integers(largura)), int(gerador.integers(altura)))
+            assert esparsa.termo(ag, pos) == densa.termo(ag, pos)
+        xs, ys = gerador.integers(largura, size=n), gerador.integers(altura, size=n)
+        np.testing.assert_array_equal(esparsa.termos(np.arange(n), xs, ys), densa.termos(np.arange(n), xs, ys))
+
+
+@casos(15)
+def test_modelagem_termos_igual_a_termo(semente):
+    from modelagem import BonusNovidade, PenalizacaoRevisitas
+
+    gerador = np.random.default_rng(semente)
+    n, largura, altura = 5, 4, 3
+    for classe in (PenalizacaoRevisitas, BonusNovidade):
+        escalar, vetorial = classe(), classe()
+        escalar.prepara(n, largura, altura)
+        vetorial.prepara(n, largura, altura)
+        agentes = [object() for _ in range(n)]
+        for _ in range(10):
+            xs = gerador.integers(largura, size=n)
+            ys = gerador.integers(altura, size=n)
+            esperado = [escalar.termo(ag, (int(x), int(y))) for ag, x, y in zip(agentes, xs, ys)]
+            obtido = vetorial.termos(np.arange(n), xs, ys)
+            np.testing.assert_allclose(obtido, esperado)
+
+
+# ---------- motor de episódios vs ciclo antigo ----------
+
+@casos(5)
+def test_motor_igual_ao_ciclo_de_referencia(semente):
+    from aleatorio import fluxos
+    from cenarios import CENARIO_LABIRINTO, constroi_ambiente, normaliza_cenario
+    from motor import _ciclo_referencia_experiencia, motor_experiencia
+    from sensor import SensorPosicao
+
+    cenario = normaliza_cenario(CENARIO_LABIRINTO)
+
+    def monta():
+        rngs = fluxos(semente, 3)
+        ambiente = constroi_ambiente(cenario, "treino", rng=rngs[0])
+        agentes = []
+        for i in range(2):
+            ag = Agente(f"A{i}", modo="learn", rng=rngs[i + 1])
+            ag.instala(SensorPosicao())
+            ambiente.adicionaAgente(ag, cenario["inicio"])
+            agentes.append(ag)
+        return ambiente, agentes
+
+    ambiente, agentes = monta()
+    _ciclo_referencia_experiencia(ambiente, agentes, 3, 60)
+    ambiente_m, agentes_m = monta()
+    motor_experiencia(ambiente_m, agentes_m).corre(3, 60)
+    for ref, novo in zip(agentes, agentes_m):
+        assert (ref.recompensa_total, ref.posicao, ref.historico_passos) == (
+            novo.recompensa_total, novo.posicao, novo.historico_passos
+        )
+        assert ref.q_table == novo.q_table
@@ -0,0 +1,34 @@
+"""Servidor de políticas de teste: com a mesma semente os atrasos e as ações repetem-se."""
+import asyncio
+
+from servidor_politica import AgenteRemoto, ServidorPoliticaMock
+
+OBS = {"posicao_agente": (0, 0), "objetivos": [(3, 3)], "obstaculos": [], "largura": 4, "altura": 4}
+
+
+def _corre(rng, monkeypatch):
+    atrasos = []
+    dorme = asyncio.sleep
+
+    async def regista(segundos, *args, **kwargs):
+        atrasos.append(segundos)
+        await dorme(0)
+
+    async def pedidos():
+        async with ServidorPoliticaMock(variacao=0.5, rng=rng) as servidor:
+            agente = AgenteRemoto("A1", porta=servidor.porta)
+            acoes = [await agente.age_async(OBS) for _ in range(8)]
+            await agente.fecha()
+        return acoes
+
+    with monkeypatch.context() as m:
+        m.setattr(asyncio, "sleep", regista)
+        acoes = asyncio.run(pedidos())
+    return atrasos, acoes
+
+
+def test_variacao_reprodutivel_com_semente(monkeypatch):
+    atrasos, acoes = _corre(7, monkeypatch)
+    assert len(atrasos) == 8 and all(0.0 <= a <= 0.5 for a in atrasos)
+    assert _corre(7, monkeypatch) == (atrasos, acoes)
+    assert _corre(8, monkeypatch)[0] != atrasos
@@ -0,0 +1,101 @@
+"""Simulador: impressão do ambiente e condições de paragem."""
+from agente import Agente
+from ambiente import Ambiente
+from simulador import MAX_IMPRESSAO, Simulador
+
+
+def test_imprime_mapa_grande_so_a_janela(capsys, monkeypatch):
+    from mapa_blocos import MapaBlocos
+
+    mapa = MapaBlocos(4096, 4096, lado_bloco=64, objetivos=[(4000, 4000)])
+    mapa.add((1001, 1000))
+    # percorrer o mapa inteiro seria um passo por obstáculo do mapa todo
+    monkeypatch.setattr(MapaBlocos, "__iter__", lambda self: (_ for _ in ()).throw(AssertionError("iterou o mapa")))
+    ambiente = Ambiente.a_partir_de_mapa(mapa)
+    agente = Agente("a", rng=0)
+    ambiente.adicionaAgente(agente, (1000, 1000))
+
+    Simulador.cria(ambiente, [agente]).imprimeAmbiente()
+    linhas = [l for l in capsys.readouterr().out.splitlines() if l.startswith((". ", "A ", "X "))]
+    assert len(linhas) == MAX_IMPRESSAO
+    assert all(len(l.split()) == MAX_IMPRESSAO for l in linhas)
+    assert sum(l.count("A X") for l in linhas) == 1
+
+
+def test_imprime_grelha_pequena_inteira(capsys):
+    ambiente = Ambiente(4, 3, rng=0)
+    ambiente.adicionaObjetivo((3, 2))
+    ambiente.adicionaObstaculo((1, 0))
+    agente = Agente("a", rng=0)
+    ambiente.adicionaAgente(agente, (0, 0))
+
+    Simulador.cria(ambiente, [agente]).imprimeAmbiente()
+    linhas = [l for l in capsys.readouterr().out.splitlines() if l.strip() and not l.startswith("Legenda")]
+    assert linhas == ["A X . . ", ". . . . ", ". . . O "]
+
+
+def test_ambiente_compilado_sem_objetivos_para_logo():
+    ambiente = Ambiente(4, 3, rng=0)
+    agente = Agente("a", rng=0)
+    ambiente.adicionaAgente(agente, (0, 0))
+    ambiente.compila()
+    assert ambiente.objetivos == ()
+
+    resultado = Simulador.cria(ambiente, [agente]).executa(passos=20, visualizar=False)
+    assert resultado["passos_executados"] == 1
+
+
+def _cena(seed=0, objetivos=((4, 4),)):
+    ambiente = Ambiente(5, 5, max_passos=200, rng=seed)
+    for o in objetivos:
+        ambiente.adicionaObjetivo(o)
+    ambiente.adicionaObstaculo((2, 2))
+    agentes = [Agente(f"a{i}", modo="learn", rng=seed + i) for i in range(2)]
+    for ag, pos in zip(agentes, ((0, 0), (0, 4))):
+        ambiente.adicionaAgente(ag, pos)
+    return ambiente, agentes
+
+
+def test_executa_async_igual_a_executa_e_treina():
+    import asyncio
+
+    ambiente, agentes = _cena()
+    sincrono = Simulador.cria(ambiente, agentes).executa(passos=30, visualizar=False, treinar=True)
+    ambiente_a, agentes_a = _cena()
+    assincrono = asyncio.run(Simulador.cria(ambiente_a, agentes_a).executa_async(passos=30, treinar=True))
+
+    assert assincrono["recompensas_passo_a_passo"] == sincrono["recompensas_passo_a_passo"]
+    assert assincrono["timeouts"] == {"a0": 0, "a1": 0}
+    for ag, ag_a in zip(agentes, agentes_a):
+        assert ag_a.q_table and ag_a.q_table == ag.q_table
+
+
+def test_executa_async_para_sem_objetivos_e_tolera_falhas():
+    import asyncio
+
+    class AgenteFalha(Agente):
+        def avaliacaoEstadoAtual(self, recompensa):
+            raise RuntimeError("avaliação partida")
+
+    ambiente = Ambiente(5, 5, rng=0)
+    agentes = [AgenteFalha("f", rng=0), Agente("a", rng=1)]
+    for ag, pos in zip(agentes, ((0, 0), (1, 1))):
+        ambiente.adicionaAgente(ag, pos)
+    ambiente.compila()
+    resultado = asyncio.run(Simulador.cria(ambiente, agentes).executa_async(passos=20))
+    assert resultado["passos_executados"] == 1
+
+
+def test_executa_treinar_aplica_lote_linear_no_fim():
+    import numpy as np
+
+    ambiente = Ambiente(5, 5, max_passos=200, rng=0)
+    ambiente.adicionaObjetivo((4, 4))
+    agente = Agente("l", modo="learn", tipo_politica="linear", rng=0)
+    ambiente.adicionaAgente(agente, (0, 0))
+    antes = agente.aproximador.pesos.copy()
+
+    # 5 passos: menos do que um lote (32), por isso só o fim do episódio aplica as transições
+    Simulador.cria(ambiente, [agente]).executa(passos=5, visualizar=False, treinar=True)
+    assert agente.aproximador._lote == []
+    assert not np.array_equal(agente.aproximador.pesos, antes)
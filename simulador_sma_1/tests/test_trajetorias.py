@@ -0,0 +1,50 @@
+"""Gravação e leitura de trajetórias (trajetorias.py)."""
+from types import SimpleNamespace
+
+import numpy as np
+
+from trajetorias import GravadorTrajetorias, LeitorTrajetorias
+
+
+def _grava(base, fecha=True):
+    ambiente = SimpleNamespace(largura=5, altura=4, objetivos=[(4, 3)], obstaculos=[(2, 2)])
+    agentes = [SimpleNamespace(nome="a", posicao=(0, 0)), SimpleNamespace(nome="b", posicao=(1, 0))]
+    g = GravadorTrajetorias(base, tamanho_bloco=4)
+    for ep in range(3):
+        for ag in agentes:
+            ag.posicao = (ep, 0)
+        g.novo_episodio(ambiente, agentes)
+        for passo in range(ep + 2):
+            for ag in agentes:
+                ag.posicao = (ag.posicao[0], passo + 1)
+                g.regista(ag, "direita", -1.0, passo == ep + 1)
+            g.fim_passo()
+    if fecha:
+        g.fecha()
+    else:
+        g.despeja()
+    return g
+
+
+def test_leitura_depois_de_fecha(tmp_path):
+    _grava(str(tmp_path / "t"))
+    leitor = LeitorTrajetorias(str(tmp_path / "t"))
+    assert leitor.n_episodios == 3
+    assert leitor.agentes == ["a", "b"]
+    assert leitor.posicoes(2).shape == (5, 2, 2)
+    assert leitor.resumo()["passos"].tolist() == [2, 3, 4]
+
+
+def test_gravacao_interrompida_reconstroi_indice(tmp_path):
+    _grava(str(tmp_path / "completa"))
+    _grava(str(tmp_path / "interrompida"), fecha=False)  # sem fecha(): não há base.idx.npy
+    assert not (tmp_path / "interrompida.idx.npy").exists()
+
+    esperado = LeitorTrajetorias(str(tmp_path / "completa"))
+    leitor = LeitorTrajetorias(str(tmp_path / "interrompida"))
+    assert leitor.agentes == esperado.agentes
+    np.testing.assert_array_equal(leitor.indice, esperado.indice)
+    for k in range(esperado.n_episodios):
+        np.testing.assert_array_equal(leitor.posicoes(k), esperado.posicoes(k))
+        assert leitor.mapa(k) == esperado.mapa(k)
+    assert list(leitor.frames(1))[-1] == {"a": (1, 3), "b": (1, 3)}
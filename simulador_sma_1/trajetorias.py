@@ -0,0 +1,263 @@
+"""
+Registo binário de trajetórias e reprodução sem voltar a correr a política.
+
+Cada linha é um registo de largura fixa (REGISTO, 24 bytes) com
+(episodio, passo, agente, x, y, acao, recompensa, terminou). O passo 0 de cada
+episódio guarda a posição inicial de cada agente (acao = SEM_ACAO).
+
+Um registo "base" são três ficheiros:
+  base.traj     registos seguidos, escritos em blocos (GravadorTrajetorias)
+  base.idx.npy  índice do primeiro registo de cada episódio (+ total no fim)
+  base.json     nomes dos agentes, ações, dimensões e mapas de cada episódio
+
+base.json é escrito logo ao abrir e reescrito sempre que muda e um bloco vai para
+disco, por isso uma gravação interrompida (sem fecha()) continua legível: falta só
+base.idx.npy, que o leitor reconstrói a partir da coluna episodio.
+
+LeitorTrajetorias abre base.traj com np.memmap, por isso ir para o episódio k
+é uma fatia do índice (O(1)) e só as páginas lidas vão para memória.
+"""
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+REGISTO = np.dtype(
+    [
+        ("episodio", "<u4"),
+        ("passo", "<u4"),
+        ("agente", "<u2"),
+        ("x", "<i4"),
+        ("y", "<i4"),
+        ("acao", "u1"),
+        ("recompensa", "<f4"),
+        ("terminou", "?"),
+    ]
+)
+SEM_ACAO = 255
+
+
+def _ficheiros(base: str) -> Tuple[str, str, str]:
+    return base + ".traj", base + ".idx.npy", base + ".json"
+
+
+class GravadorTrajetorias:
+    def __init__(self, base: str, acoes: Optional[List[str]] = None, tamanho_bloco: int = 4096):
+        from agente import Agente
+
+        self.base = base
+        self.acoes = list(acoes) if acoes is not None else list(Agente.ACOES)
+        self._acao_id = {a: i for i, a in enumerate(self.acoes)}
+        self._bloco = np.empty(tamanho_bloco, dtype=REGISTO)
+        self._n_bloco = 0
+        self.n_registos = 0
+
+        self.agentes: List[str] = []
+        self._agente_id: Dict[str, int] = {}
+        self.inicios: List[int] = []
+        self.episodio = -1
+        self.passo = 0
+
+        # mapas distintos e o mapa de cada episódio (os obstáculos podem mudar entre episódios)
+        self.dimensoes: Optional[Tuple[int, int]] = None
+        self.mapas: List[Dict[str, Any]] = []
+        self.mapa_episodio: List[int] = []
+        self._mapa_id: Dict[Tuple, int] = {}
+        self._meta_suja = False
+
+        pasta = os.path.dirname(base)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._f = open(_ficheiros(base)[0], "wb")
+        self._escreve_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fecha()
+
+    # ---------- escrita ----------
+
+    def _id(self, agente) -> int:
+        nome = getattr(agente, "nome", str(agente))
+        ident = self._agente_id.get(nome)
+        if ident is None:
+            ident = self._agente_id[nome] = len(self.agentes)
+            self.agentes.append(nome)
+            self._meta_suja = True
+        return ident
+
+    def _escreve(self, agente, posicao, acao_id: int, recompensa: float, terminou: bool):
+        if self._n_bloco == len(self._bloco):
+            self.despeja()
+        self._bloco[self._n_bloco] = (
+            self.episodio, self.passo, self._id(agente), posicao[0], posicao[1], acao_id, recompensa, terminou
+        )
+        self._n_bloco += 1
+        self.n_registos += 1
+
+    def novo_episodio(self, ambiente, agentes) -> int:
+        """Abre um episódio e regista a posição inicial (passo 0) de cada agente."""
+        self.episodio += 1
+        self.passo = 0
+        self.inicios.append(self.n_registos)
+
+        self.dimensoes = (ambiente.largura, ambiente.altura)
+        # num mapa por blocos guarda-se só o ficheiro (a lista de obstáculos seria enorme)
+        mapa_blocos = getattr(ambiente, "_mapa", None)
+        obstaculos = ("ficheiro", mapa_blocos.ficheiro) if mapa_blocos is not None else tuple(ambiente.obstaculos)
+        chave = (tuple(ambiente.objetivos), obstaculos)
+        mapa = self._mapa_id.get(chave)
+        if mapa is None:
+            mapa = self._mapa_id[chave] = len(self.mapas)
+            entrada = {"objetivos": [list(p) for p in chave[0]]}
+            if mapa_blocos is not None:
+                entrada["mapa_blocos"] = mapa_blocos.ficheiro
+            else:
+                entrada["obstaculos"] = [list(p) for p in obstaculos]
+            self.mapas.append(entrada)
+        self.mapa_episodio.append(mapa)
+        self._meta_suja = True
+
+        for ag in agentes:
+            self._escreve(ag, ag.posicao, SEM_ACAO, 0.0, False)
+        self.passo = 1
+        return self.episodio
+
+    def regista(self, agente, acao, recompensa: float, terminou: bool):
+        """Transição de um agente no passo atual (posição já depois da ação)."""
+        self._escreve(agente, agente.posicao, self._acao_id.get(acao, SEM_ACAO), recompensa, terminou)
+
+    def fim_passo(self):
+        self.passo += 1
+
+    def despeja(self):
+        """Escreve o bloco em memória no fim de base.traj (e base.json, se mudou)."""
+        if self._n_bloco:
+            self._f.write(self._bloco[: self._n_bloco].tobytes())
+            self._f.flush()
+            self._n_bloco = 0
+            # os registos já em disco têm de ter agentes e mapas no base.json
+            if self._meta_suja:
+                self._escreve_meta()
+
+    def fecha(self):
+        if self._f.closed:
+            return
+        self.despeja()
+        self._f.close()
+        np.save(_ficheiros(self.base)[1], np.asarray(self.inicios + [self.n_registos], dtype=np.int64))
+        self._escreve_meta()
+
+    def _escreve_meta(self):
+        self._meta_suja = False
+        with open(_ficheiros(self.base)[2], "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "agentes": self.agentes,
+                    "acoes": self.acoes,
+                    "largura": self.dimensoes[0] if self.dimensoes else 0,
+                    "altura": self.dimensoes[1] if self.dimensoes else 0,
+                    "mapas": self.mapas,
+                    "mapa_episodio": self.mapa_episodio,
+                },
+                f,
+            )
+
+
+class LeitorTrajetorias:
+    def __init__(self, base: str):
+        traj, idx, meta = _ficheiros(base)
+        self.base = base
+        with open(meta, encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.agentes: List[str] = self.meta["agentes"]
+        self.acoes: List[str] = self.meta["acoes"]
+
+        n = os.path.getsize(traj) // REGISTO.itemsize
+        self.registos = np.memmap(traj, dtype=REGISTO, mode="r", shape=(n,)) if n else np.empty(0, REGISTO)
+        if os.path.exists(idx):
+            self.indice = np.load(idx)
+        else:
+            # gravação interrompida: reconstrói o índice a partir da coluna episodio
+            # (crescente; searchsorted dá também o início certo de episódios vazios)
+            ep = np.asarray(self.registos["episodio"])
+            n_ep = int(ep[-1]) + 1 if n else 0
+            self.indice = np.searchsorted(ep, np.arange(n_ep + 1)).astype(np.int64)
+
+    @property
+    def n_episodios(self) -> int:
+        return len(self.indice) - 1
+
+    def episodio(self, k: int) -> np.ndarray:
+        """Registos do episódio k (vista sobre o memmap, sem cópia)."""
+        if not -self.n_episodios <= k < self.n_episodios:
+            raise IndexError(f"Episódio {k} fora de 0..{self.n_episodios - 1}")
+        k %= self.n_episodios
+        return self.registos[self.indice[k]: self.indice[k + 1]]
+
+    def mapa(self, k: int) -> Dict[str, Any]:
+        return self.meta["mapas"][self.meta["mapa_episodio"][k]]
+
+    def posicoes(self, k: int) -> np.ndarray:
+        """Array (n_passos + 1, n_agentes, 2) com a posição de cada agente em cada passo do episódio k."""
+        regs = self.episodio(k)
+        n_passos = int(regs["passo"].max()) + 1 if len(regs) else 0
+        pos = np.zeros((n_passos, len(self.agentes), 2), dtype=np.int32)
+        # agentes sem registo num passo ficam onde estavam
+        presente = np.zeros((n_passos, len(self.agentes)), dtype=bool)
+        pos[regs["passo"], regs["agente"], 0] = regs["x"]
+        pos[regs["passo"], regs["agente"], 1] = regs["y"]
+        presente[regs["passo"], regs["agente"]] = True
+        for p in range(1, n_passos):
+            pos[p][~presente[p]] = pos[p - 1][~presente[p]]
+        return pos
+
+    def resumo(self) -> Dict[str, np.ndarray]:
+        """Recompensa total, nº de passos e se terminou, por episódio (colunas NumPy)."""
+        inicio = self.indice[:-1]
+        vazio = inicio == self.indice[1:]
+        validos = inicio[~vazio]
+        recompensa = np.zeros(self.n_episodios)
+        passos = np.zeros(self.n_episodios, dtype=np.int64)
+        terminou = np.zeros(self.n_episodios, dtype=bool)
+        if len(validos):
+            recompensa[~vazio] = np.add.reduceat(self.registos["recompensa"].astype(np.float64), validos)
+            passos[~vazio] = np.maximum.reduceat(self.registos["passo"], validos)
+            terminou[~vazio] = np.logical_or.reduceat(self.registos["terminou"], validos)
+        return {"recompensa_total": recompensa, "passos": passos, "terminou": terminou}
+
+    # ---------- reprodução ----------
+
+    def frames(self, k: int) -> Iterator[Dict[str, Tuple[int, int]]]:
+        """Posições {nome_agente: (x, y)} passo a passo no episódio k."""
+        for linha in self.posicoes(k):
+            yield {nome: (int(x), int(y)) for nome, (x, y) in zip(self.agentes, linha)}
+
+    def reproduz(self, k: int, fps: int = 10, visualizador=None):
+        """Mostra o episódio k no VisualizadorPygame (ou noutro com .agentes e .atualizar(fps))."""
+        from types import SimpleNamespace
+
+        mapa = self.mapa(k)
+        ambiente = SimpleNamespace(
+            largura=self.meta["largura"],
+            altura=self.meta["altura"],
+            objetivos=[tuple(p) for p in mapa["objetivos"]],
+            obstaculos=[tuple(p) for p in mapa.get("obstaculos", ())],
+        )
+        if "mapa_blocos" in mapa:
+            from mapa_blocos import MapaBlocos
+            ambiente.obstaculos = MapaBlocos.abre(mapa["mapa_blocos"])
+        agentes = [SimpleNamespace(nome=n, posicao=(0, 0)) for n in self.agentes]
+        if visualizador is None:
+            from visualizador import VisualizadorPygame
+            visualizador = VisualizadorPygame(ambiente, agentes)
+        else:
+            visualizador.ambiente, visualizador.agentes = ambiente, agentes
+
+        for linha in self.posicoes(k):
+            for ag, (x, y) in zip(agentes, linha):
+                ag.posicao = (int(x), int(y))
+            visualizador.atualizar(fps=fps)
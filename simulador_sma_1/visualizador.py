@@ -1,19 +1,29 @@
 import pygame
 from typing import List, Tuple
 
-from simulador import Simulador
-
 
 class VisualizadorPygame:
-    def __init__(self, ambiente, agentes, tamanho_celula=80):
+    def __init__(self, ambiente, agentes, tamanho_celula=80, max_px=(1000, 800), celula_minima=4):
+        """
+        A célula encolhe (até celula_minima px) para a grelha caber em max_px; se mesmo
+        assim não couber, só se desenha uma janela (vista) da grelha que segue o primeiro agente.
+        """
         pygame.init()
 
         self.ambiente = ambiente
         self.agentes = agentes
-        self.tamanho_celula = tamanho_celula
+        self.tamanho_celula = max(
+            celula_minima, min(tamanho_celula, max_px[0] // ambiente.largura, max_px[1] // ambiente.altura)
+        )
+
+        # vista em células (x0, y0, largura, altura)
+        self.vista_largura = min(ambiente.largura, max_px[0] // self.tamanho_celula)
+        self.vista_altura = min(ambiente.altura, max_px[1] // self.tamanho_celula)
+        self.x0 = 0
+        self.y0 = 0
 
-        self.largura_px = ambiente.largura * tamanho_celula
-        self.altura_px = ambiente.altura * tamanho_celula
+        self.largura_px = self.vista_largura * self.tamanho_celula
+        self.altura_px = self.vista_altura * self.tamanho_celula
 
         self.ecra = pygame.display.set_mode((self.largura_px, self.altura_px))
         pygame.display.set_caption('Simulador Pygame')
@@ -26,27 +36,60 @@ class VisualizadorPygame:
         self.COR_OBJETIVO = (0, 200, 0)
         self.COR_OBSTACULO = (50, 50, 50)
 
+    # ---------- vista ----------
+
+    def centrar_vista(self):
+        """Põe o primeiro agente no centro da vista (sem sair da grelha)."""
+        if not self.agentes:
+            return
+        x, y = self.agentes[0].posicao
+        self.x0 = min(max(0, x - self.vista_largura // 2), self.ambiente.largura - self.vista_largura)
+        self.y0 = min(max(0, y - self.vista_altura // 2), self.ambiente.altura - self.vista_altura)
+
+    def _na_vista(self, x, y) -> bool:
+        return self.x0 <= x < self.x0 + self.vista_largura and self.y0 <= y < self.y0 + self.vista_altura
+
+    def _rect(self, x, y):
+        t = self.tamanho_celula
+        return pygame.Rect((x - self.x0) * t, (y - self.y0) * t, t, t)
+
+    def _obstaculos_na_vista(self) -> List[Tuple[int, int]]:
+        obstaculos = self.ambiente.obstaculos
+        if hasattr(obstaculos, "janela"):
+            # mapa por blocos: só se lêem os blocos da vista
+            ocupacao = obstaculos.janela(
+                self.x0, self.y0, self.x0 + self.vista_largura, self.y0 + self.vista_altura
+            )
+            ys, xs = ocupacao.nonzero()
+            return list(zip((xs + self.x0).tolist(), (ys + self.y0).tolist()))
+        return [(x, y) for (x, y) in obstaculos if self._na_vista(x, y)]
+
+    # ---------- desenho ----------
+
     def desenhar_grelha(self):
-        for x in range(self.ambiente.largura):
-            for y in range(self.ambiente.altura):
-                rect = pygame.Rect(x * self.tamanho_celula, y * self.tamanho_celula, self.tamanho_celula, self.tamanho_celula)
-                pygame.draw.rect(self.ecra, self.COR_GRELHA, rect, 1)
+        if self.tamanho_celula < 8:
+            return  # com células tão pequenas as linhas tapam tudo
+        for x in range(self.x0, self.x0 + self.vista_largura):
+            for y in range(self.y0, self.y0 + self.vista_altura):
+                pygame.draw.rect(self.ecra, self.COR_GRELHA, self._rect(x, y), 1)
 
     def desenhar_objetivo(self):
         for (x, y) in self.ambiente.objetivos:
-            rect = pygame.Rect(x * self.tamanho_celula, y * self.tamanho_celula, self.tamanho_celula, self.tamanho_celula)
-            pygame.draw.rect(self.ecra, self.COR_OBJETIVO, rect)
+            if self._na_vista(x, y):
+                pygame.draw.rect(self.ecra, self.COR_OBJETIVO, self._rect(x, y))
 
     def desenhar_obstaculo(self):
-        for (x, y) in self.ambiente.obstaculos:
-            rect = pygame.Rect(x * self.tamanho_celula, y * self.tamanho_celula, self.tamanho_celula, self.tamanho_celula)
-            pygame.draw.rect(self.ecra, self.COR_OBSTACULO, rect)
+        for (x, y) in self._obstaculos_na_vista():
+            pygame.draw.rect(self.ecra, self.COR_OBSTACULO, self._rect(x, y))
 
     def desenhar_agentes(self):
+        t = self.tamanho_celula
         for ag in self.agentes:
             x, y = ag.posicao
-            centro = (x*self.tamanho_celula + self.tamanho_celula // 2, y*self.tamanho_celula + self.tamanho_celula // 2, )
-            pygame.draw.circle(self.ecra, self.COR_AGENTE, centro, self.tamanho_celula // 3)
+            if not self._na_vista(x, y):
+                continue
+            centro = ((x - self.x0) * t + t // 2, (y - self.y0) * t + t // 2, )
+            pygame.draw.circle(self.ecra, self.COR_AGENTE, centro, max(1, t // 3))
 
     def atualizar(self, fps=120):
         for event in pygame.event.get():
@@ -54,6 +97,9 @@ class VisualizadorPygame:
                 pygame.quit()
                 raise SystemExit
 
+        if self.vista_largura < self.ambiente.largura or self.vista_altura < self.ambiente.altura:
+            self.centrar_vista()
+
         self.ecra.fill(self.COR_FUNDO)
         self.desenhar_grelha()
         self.desenhar_objetivo()
@@ -61,4 +107,4 @@ class VisualizadorPygame:
         self.desenhar_agentes()
 
         pygame.display.flip()
-        self.clock.tick(fps)
\ No newline at end of file
+        self.clock.tick(fps)